@@ -0,0 +1,254 @@
+"""主窗口性能基准测试
+
+在 offscreen 平台下为 1k/10k/100k 条记录生成模拟的历史数据（业务名称按 public.ini 中的
+公共业务与普通业务混合、使用频率呈长尾分布），分别测量主窗口各操作的耗时，
+结果保存为 JSON；指定基准结果时逐项比较，超过阈值的变慢视为回退。
+
+用法：
+    python benchmarks/bench_main_window.py -o benchmarks/results/baseline.json
+    python benchmarks/bench_main_window.py --compare benchmarks/results/baseline.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.public_matcher import DEFAULT_PUBLIC_INI
+from core.record_store import new_record_id
+from core.reports import build_report
+from core.storage import open_storage, write_json_atomic
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+# 普通业务名称的数量，连同公共业务按 1/名次 的权重抽取
+NORMAL_BUSINESS_COUNT = 120
+# 模拟的历史跨度（天）
+HISTORY_DAYS = 365
+# 每个操作测量的次数，取中位数比较
+DEFAULT_REPEAT = 5
+# 连续删除的条数，报告单次删除的耗时
+DELETE_COUNT = 20
+# 比较时耗时差小于该值（毫秒）的变化视为噪声
+MIN_DELTA_MS = 2.0
+
+TASK_WORDS = ["排查", "告警", "变更", "发布", "扩容", "巡检", "配置", "权限申请", "数据修复",
+              "容量评估", "故障复盘", "版本升级", "脚本优化", "需求沟通", "文档整理"]
+
+
+def public_businesses():
+    return [line.strip() for line in DEFAULT_PUBLIC_INI.splitlines() if line.strip()]
+
+
+def generate_history(count, seed=1):
+    """生成 count 条按添加时间排列的模拟记录"""
+    rng = random.Random(seed)
+    names = public_businesses() + [f"业务系统{i:03d}" for i in range(NORMAL_BUSINESS_COUNT)]
+    rng.shuffle(names)
+    weights = [1.0 / rank for rank in range(1, len(names) + 1)]
+    today = date.today()
+    businesses = rng.choices(names, weights, k=count)
+    offsets = sorted((rng.randrange(HISTORY_DAYS) for _ in range(count)), reverse=True)
+    records = []
+    for business, offset in zip(businesses, offsets):
+        submit_date = today - timedelta(days=offset)
+        words = rng.sample(TASK_WORDS, 3)
+        records.append({
+            "id": new_record_id(),
+            "business": business,
+            "task": f"{words[0]}{words[1]}并{words[2]}，处理单号{rng.randint(10000, 99999)}",
+            "manual_time": rng.choice([0.5, 1.0, 1.5, 2.0, 3.0, 4.0]),
+            "submit_date": submit_date.isoformat(),
+            "timestamp": f"{submit_date.isoformat()} {rng.randint(9, 20):02d}:{rng.randint(0, 59):02d}:00",
+        })
+    return records, names
+
+
+def prepare_data_dir(home, records, names):
+    data_dir = os.path.join(home, ".bkitsm", "data")
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, "public.ini"), "w", encoding="utf-8") as f:
+        f.write(DEFAULT_PUBLIC_INI)
+    write_json_atomic(os.path.join(data_dir, "business.json"), names)
+    storage = open_storage(data_dir)
+    storage.save_all(records)
+    storage.close()
+
+
+def measure(func, repeat, setup=None):
+    """执行 repeat 次，返回每次耗时（毫秒）"""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def summarize(timings):
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "runs": len(timings),
+    }
+
+
+def bench_size(app, count, repeat):
+    from PySide6.QtCore import QEvent
+    from ui.main_window import MainWindow
+
+    home = tempfile.mkdtemp(prefix="bkitsm-bench-")
+    # 主窗口的数据目录在用户主目录下，指向临时目录
+    os.environ["HOME"] = os.environ["USERPROFILE"] = home
+    try:
+        records, names = generate_history(count)
+        prepare_data_dir(home, records, names)
+        results = {}
+
+        window = MainWindow()
+        # 本窗口自己的写入同样会触发文件监视，测量期间不做外部修改检查
+        window.file_watcher.blockSignals(True)
+        window.resize(1000, 800)
+        window.show()
+        app.processEvents()
+
+        # 启动时的加载：只加载本周、本月涉及的月份
+        results["load_current_months"] = measure(window.load_data, repeat)
+        # 完整加载：启动加载后再加载其余全部月份（非分区存储时 load_data 已加载全部记录）；
+        # 其余操作在全部历史记录上进行
+        results["load_all_records"] = measure(
+            lambda: (window.load_data(), window.ensure_range_loaded()), repeat)
+        results["update_table"] = measure(lambda: (window.update_table(), app.processEvents()), repeat)
+        results["update_stats"] = measure(window.update_stats, repeat)
+
+        def sort_setup():
+            window.reset_record_order()
+            app.processEvents()
+
+        results["sort_records_by_business"] = measure(
+            lambda: (window.sort_records_by_business(), app.processEvents()), repeat, sort_setup)
+        window.reset_record_order()
+
+        def touch_record():
+            # 整体保存时内容未变的分区会被跳过，每次先经主窗口的修改路径（记录集合、汇总、模型）改一条记录
+            record = window.records.at(len(window.records) - 1)
+            window.apply_record_field(record["id"], "manual_time", record["manual_time"] + 0.5)
+
+        results["save_data"] = measure(lambda: (window.save_data(), window.persistence.flush()),
+                                       repeat, touch_record)
+
+        results["generate_record_text"] = measure(window.generate_record_text, repeat)
+
+        # 统计报表：从存储读取为列式数据，再按周汇总全部一年的记录
+        results["report_columns"] = measure(window.report_columns, repeat)
+        columns = window.report_columns()
+        results["build_report"] = measure(lambda: build_report(columns), repeat)
+
+        results["delete_record"] = measure(lambda: (window.delete_record(0), app.processEvents()), DELETE_COUNT)
+        window.persistence.flush()
+
+        # 立即销毁窗口，再删除临时目录
+        window.close()
+        window.deleteLater()
+        app.sendPostedEvents(None, QEvent.DeferredDelete)
+        return {name: summarize(timings) for name, timings in results.items()}
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+def run(args):
+    from PySide6 import __version__ as pyside_version
+    from PySide6.QtWidgets import QApplication, QMessageBox
+
+    # 基准测试中所有确认框直接确认，提示框不弹出
+    QMessageBox.question = staticmethod(lambda *a, **k: QMessageBox.Yes)
+    QMessageBox.information = staticmethod(lambda *a, **k: QMessageBox.Ok)
+    QMessageBox.warning = staticmethod(lambda *a, **k: QMessageBox.Ok)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    report = {
+        "meta": {
+            "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "pyside": pyside_version,
+            "platform": platform.platform(),
+            "qpa": os.environ.get("QT_QPA_PLATFORM"),
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    saved_home = os.environ.get("HOME")
+    try:
+        for count in args.sizes:
+            print(f"测量 {count} 条记录 ...", flush=True)
+            results = bench_size(app, count, args.repeat)
+            report["results"][str(count)] = results
+            for name, summary in results.items():
+                print(f"  {name:<26} 中位数 {summary['median_ms']:10.2f}ms  最小 {summary['min_ms']:10.2f}ms")
+    finally:
+        if saved_home is not None:
+            os.environ["HOME"] = saved_home
+    return report
+
+
+def compare(report, baseline, threshold):
+    """与基准结果逐项比较中位数，返回回退项列表"""
+    regressions = []
+    print(f"与基准比较（阈值 {threshold:.0%}，忽略小于 {MIN_DELTA_MS}ms 的变化）:")
+    for size, results in report["results"].items():
+        base_results = baseline.get("results", {}).get(size, {})
+        for name, summary in results.items():
+            base = base_results.get(name)
+            if base is None:
+                continue
+            current, previous = summary["median_ms"], base["median_ms"]
+            ratio = current / previous if previous > 0 else float("inf")
+            regressed = ratio > 1 + threshold and current - previous > MIN_DELTA_MS
+            flag = "回退" if regressed else "    "
+            print(f"  {flag} {size:>7} {name:<26} {previous:10.2f}ms -> {current:10.2f}ms ({ratio - 1:+.0%})")
+            if regressed:
+                regressions.append((size, name, previous, current))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="主窗口性能基准测试（offscreen）")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="记录条数")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="每个操作测量的次数")
+    parser.add_argument("-o", "--output", help="保存结果的 JSON 文件")
+    parser.add_argument("--compare", metavar="BASELINE", help="与之比较的基准结果 JSON 文件")
+    parser.add_argument("--threshold", type=float, default=0.2, help="中位数变慢超过该比例视为回退")
+    return parser.parse_args(argv)
+
+
+def main(args):
+    report = run(args)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"发现 {len(regressions)} 项性能回退")
+            return 1
+        print("没有发现性能回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,104 @@
+"""记录内存占用基准测试
+
+生成模拟的历史记录写入 JSON Lines 临时文件，分别在独立的子进程中逐行读入为
+原来的字典列表和紧凑的 Record 列表，比较读入前后的进程内存 (RSS) 增量与读入耗时；
+两种方式都逐行转换，不同时保留整份字典列表。
+
+用法：
+    python benchmarks/bench_record_memory.py --count 100000
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_main_window import generate_history
+from core.perf_stats import process_rss
+from core.record import Record
+
+DEFAULT_COUNT = 100000
+# 比较的表示方式：名称 -> 每行 JSON 转为记录的函数
+VARIANTS = {
+    "dict": json.loads,
+    "record": lambda line: Record.from_dict(json.loads(line)),
+}
+
+
+def measure_variant(variant, path):
+    """在当前进程中读入记录，返回 RSS 增量、耗时与条数"""
+    convert = VARIANTS[variant]
+    gc.collect()
+    before = process_rss()
+    started = time.perf_counter()
+    with open(path, "r", encoding="utf-8") as f:
+        records = [convert(line) for line in f]
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    after = process_rss()
+    # 抽查内容与 JSON 一致
+    with open(path, "r", encoding="utf-8") as f:
+        assert dict(records[-1]) == json.loads(f.readlines()[-1])
+    return {
+        "count": len(records),
+        "rss_bytes": None if before is None or after is None else after - before,
+        "load_ms": round(elapsed * 1000, 1),
+    }
+
+
+def run_child(variant, path):
+    """启动独立的子进程测量，避免两种方式互相影响内存"""
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), "--child", variant, "--input", path])
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def main(args):
+    if args.child:
+        print(json.dumps(measure_variant(args.child, args.input)))
+        return 0
+    records, _ = generate_history(args.count)
+    fd, path = tempfile.mkstemp(prefix="bkitsm-memory-", suffix=".jsonl")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        del records
+        results = {variant: run_child(variant, path) for variant in VARIANTS}
+    finally:
+        os.remove(path)
+
+    print(f"{args.count} 条记录:")
+    for variant, result in results.items():
+        rss = result["rss_bytes"]
+        if rss is None:
+            print(f"  {variant:<8} 无法读取进程内存  读入 {result['load_ms']:8.1f}ms")
+            continue
+        print(f"  {variant:<8} RSS 增加 {rss / (1024 * 1024):7.1f} MB  每条 {rss / result['count']:6.0f} 字节"
+              f"  读入 {result['load_ms']:8.1f}ms")
+    base, compact = results["dict"]["rss_bytes"], results["record"]["rss_bytes"]
+    if base and compact is not None:
+        print(f"Record 占用为字典的 {compact / base:.0%}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"count": args.count, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="记录字典与紧凑 Record 的内存占用比较")
+    parser.add_argument("--count", type=int, default=DEFAULT_COUNT, help="记录条数")
+    parser.add_argument("-o", "--output", help="保存结果的 JSON 文件")
+    parser.add_argument("--child", choices=list(VARIANTS), help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,178 @@
+"""主题与样式表基准测试
+
+在 offscreen 平台下比较两种样式设置方式下的界面耗时：
+  widget       原来的做法：主窗口、表格、业务管理对话框各自 setStyleSheet，切换主题时重新生成样式表
+  application  ui/theme.py：按主题缓存的样式表只设置在 QApplication 上
+测量刷新表格（重置模型并重绘）、打开业务管理对话框与切换亮色 / 暗色主题的耗时；
+widget 方式下另外测量原来每行创建带样式表的删除按钮时的刷新耗时，作为参考。
+
+用法：
+    python benchmarks/bench_theme.py --count 1000
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_main_window import generate_history, prepare_data_dir, measure, summarize
+
+DEFAULT_COUNT = 1000
+DEFAULT_REPEAT = 5
+# 原来每行删除按钮上的样式表
+LEGACY_BUTTON_STYLE = """
+    QPushButton {
+        background-color: #ea3636;
+        color: white;
+        border: none;
+        padding: 2px;
+        border-radius: 3px;
+        font-size: 10px;
+    }
+    QPushButton:hover {
+        background-color: #c42b2b;
+    }
+    QPushButton:pressed {
+        background-color: #a12121;
+    }
+"""
+
+
+def flush_deleted(app):
+    """删除 deleteLater 的控件（processEvents 不处理），避免残留的控件影响之后的测量"""
+    from PySide6.QtCore import QEvent
+    app.sendPostedEvents(None, QEvent.DeferredDelete)
+
+
+def bench_mode(app, window, mode, repeat):
+    from PySide6.QtWidgets import QPushButton
+    from ui.business_dialog import BusinessDialog
+    from ui.record_model import ACTION_COLUMN
+    from ui.theme import theme_manager, build_stylesheet, PALETTES, LIGHT, DARK
+
+    state = {"theme": LIGHT}
+
+    def set_widget_styles(theme):
+        # 每次重新生成样式表，分别设置在主窗口与表格上
+        app.setStyleSheet("")
+        window.setStyleSheet(build_stylesheet(PALETTES[theme]))
+        window.table.setStyleSheet(build_stylesheet(PALETTES[theme]))
+
+    if mode == "widget":
+        theme_manager.theme = None
+        set_widget_styles(LIGHT)
+    else:
+        window.setStyleSheet("")
+        window.table.setStyleSheet("")
+        theme_manager.apply(LIGHT)
+    app.processEvents()
+
+    def refresh():
+        window.update_table()
+        app.processEvents()
+        window.table.viewport().repaint()
+
+    def refresh_row_buttons():
+        window.update_table()
+        model = window.table.model()
+        for row in range(model.rowCount()):
+            button = QPushButton("删除")
+            button.setFixedSize(60, 24)
+            button.setStyleSheet(LEGACY_BUTTON_STYLE)
+            window.table.setIndexWidget(model.index(row, ACTION_COLUMN), button)
+        app.processEvents()
+        window.table.viewport().repaint()
+
+    def open_business_dialog():
+        dialog = BusinessDialog(window, window.business_registry, window.undo_stack)
+        if mode == "widget":
+            dialog.setStyleSheet(build_stylesheet(PALETTES[state["theme"]]))
+        dialog.show()
+        app.processEvents()
+        dialog.close()
+        dialog.deleteLater()
+        flush_deleted(app)
+
+    def switch_theme():
+        state["theme"] = DARK if state["theme"] == LIGHT else LIGHT
+        if mode == "widget":
+            set_widget_styles(state["theme"])
+        else:
+            theme_manager.apply(state["theme"])
+        app.processEvents()
+        window.repaint()
+
+    results = {
+        "refresh": measure(refresh, repeat),
+        "open_business_dialog": measure(open_business_dialog, repeat),
+        "switch_theme": measure(switch_theme, repeat),
+    }
+    if mode == "widget":
+        results["refresh_row_buttons"] = measure(refresh_row_buttons, repeat, lambda: flush_deleted(app))
+        window.update_table()
+        flush_deleted(app)
+    return {name: summarize(timings) for name, timings in results.items()}
+
+
+def run(args):
+    from PySide6.QtWidgets import QApplication
+    from ui.main_window import MainWindow
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    home = tempfile.mkdtemp(prefix="bkitsm-bench-")
+    saved_home = os.environ.get("HOME")
+    os.environ["HOME"] = os.environ["USERPROFILE"] = home
+    try:
+        records, names = generate_history(args.count)
+        prepare_data_dir(home, records, names)
+        window = MainWindow()
+        window.file_watcher.blockSignals(True)
+        window.resize(1000, 800)
+        window.show()
+        window.ensure_range_loaded()
+        app.processEvents()
+        results = {mode: bench_mode(app, window, mode, args.repeat) for mode in ("widget", "application")}
+        window.persistence.flush()
+        window.close()
+        window.deleteLater()
+        flush_deleted(app)
+        return results
+    finally:
+        if saved_home is not None:
+            os.environ["HOME"] = saved_home
+        shutil.rmtree(home, ignore_errors=True)
+
+
+def main(args):
+    results = run(args)
+    print(f"{args.count} 条记录:")
+    widget, application = results["widget"], results["application"]
+    for name, summary in widget.items():
+        line = f"  {name:<22} widget {summary['median_ms']:9.2f}ms"
+        if name in application:
+            current = application[name]["median_ms"]
+            line += f"  application {current:9.2f}ms"
+            if summary["median_ms"] > 0:
+                line += f"  ({current / summary['median_ms'] - 1:+.0%})"
+        print(line)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"count": args.count, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="按控件与按应用设置样式表的界面耗时比较（offscreen）")
+    parser.add_argument("--count", type=int, default=DEFAULT_COUNT, help="记录条数")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="每个操作测量的次数")
+    parser.add_argument("-o", "--output", help="保存结果的 JSON 文件")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,141 @@
+"""增量汇总一致性检查
+
+在 offscreen 平台下打开主窗口，随机执行添加、删除、修改字段（含跨月修改提单日期）、
+撤销与重做，每一步之后用 RecordAggregates.verify 从头重新计算汇总并与增量结果比对，
+不一致时输出随机种子与出错的步骤并以非零状态退出。
+
+用法：
+    python benchmarks/check_aggregates.py [--count 2000] [--steps 1000] [--seed 1] [--storage json|journal|sqlite]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_main_window import HISTORY_DAYS, generate_history, prepare_data_dir
+
+DEFAULT_COUNT = 2000
+DEFAULT_STEPS = 1000
+# 各操作的权重
+OPERATIONS = {"add": 3, "delete": 2, "edit": 4, "undo": 2, "redo": 1}
+
+
+def random_record(rng, names):
+    submit_date = date.today() - timedelta(days=rng.randrange(HISTORY_DAYS))
+    return {
+        "id": None,
+        "business": rng.choice(names),
+        "task": f"一致性检查新增的任务描述 {rng.randint(10000, 99999)}",
+        "manual_time": rng.choice([0.5, 1.0, 1.5, 2.0]),
+        "submit_date": submit_date.isoformat(),
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def run_steps(app, window, names, steps, rng):
+    """执行 steps 步随机操作，返回 (完成的步数, 出错信息)"""
+    from core.record_store import new_record_id
+
+    operations = list(OPERATIONS)
+    weights = list(OPERATIONS.values())
+    for step in range(1, steps + 1):
+        op = rng.choices(operations, weights)[0]
+        ids = [record["id"] for record in window.records]
+        if op == "add":
+            records = [random_record(rng, names) for _ in range(rng.randint(1, 3))]
+            for record in records:
+                record["id"] = new_record_id()
+            window.add_records(records)
+        elif op == "delete" and ids:
+            record_id = rng.choice(ids)
+            row = window.sort_proxy.mapFromSource(
+                window.record_model.index(window.record_model.row_of(record_id), 0)).row()
+            if row < 0:
+                continue
+            window.delete_record(row)
+        elif op == "edit" and ids:
+            record_id = rng.choice(ids)
+            field = rng.choice(["business", "manual_time", "submit_date"])
+            if field == "business":
+                value = rng.choice(names)
+            elif field == "manual_time":
+                value = rng.choice(["0.5", "1", "2.5", "3"])
+            else:
+                value = (date.today() - timedelta(days=rng.randrange(HISTORY_DAYS))).isoformat()
+            window.on_table_item_changed(record_id, field, value)
+        elif op == "undo":
+            window.undo()
+        elif op == "redo":
+            window.redo()
+        # 跨月修改提单日期后在下一轮事件循环中加载该月
+        app.processEvents()
+        try:
+            window.records.aggregates.verify(window.records)
+        except AssertionError as e:
+            return step, f"第 {step} 步 ({op}) 后汇总不一致: {e}"
+    return steps, None
+
+
+def run(args):
+    from PySide6.QtWidgets import QApplication, QMessageBox
+    import ui.main_window
+    from ui.main_window import MainWindow
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    # 删除确认框直接确认
+    ui.main_window.QMessageBox.question = staticmethod(lambda *args, **kwargs: QMessageBox.Yes)
+    home = tempfile.mkdtemp(prefix="bkitsm-check-")
+    saved_home = os.environ.get("HOME")
+    os.environ["HOME"] = os.environ["USERPROFILE"] = home
+    try:
+        records, names = generate_history(args.count, args.seed)
+        data_dir = os.path.join(home, ".bkitsm", "data")
+        os.makedirs(data_dir, exist_ok=True)
+        with open(os.path.join(data_dir, "settings.json"), "w", encoding="utf-8") as f:
+            json.dump({"storage": args.storage}, f)
+        prepare_data_dir(home, records, names)
+        window = MainWindow()
+        window.file_watcher.blockSignals(True)
+        # 一半的情况下先加载全部月份，另一半从只加载本周、本月开始
+        rng = random.Random(args.seed)
+        if rng.random() < 0.5:
+            window.ensure_range_loaded()
+        steps, error = run_steps(app, window, names, args.steps, rng)
+        window.persistence.close()
+        window.close()
+        return steps, error, len(window.records)
+    finally:
+        if saved_home is not None:
+            os.environ["HOME"] = saved_home
+        shutil.rmtree(home, ignore_errors=True)
+
+
+def main(args):
+    steps, error, count = run(args)
+    print(f"存储: {args.storage}, 种子 {args.seed}, 执行 {steps} 步, 最终 {count} 条记录")
+    if error:
+        print(f"  失败: {error}")
+        return 1
+    print("  通过: 每一步的增量汇总均与重新计算的结果一致")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="随机增删改、撤销后校验增量汇总（offscreen）")
+    parser.add_argument("--count", type=int, default=DEFAULT_COUNT, help="初始记录条数")
+    parser.add_argument("--steps", type=int, default=DEFAULT_STEPS, help="随机操作的步数")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--storage", choices=["json", "journal", "sqlite"], default="json")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,202 @@
+"""多实例写入压力测试
+
+同时启动两个写入进程，对同一个数据目录反复增删改记录并增删业务名称，
+结束后检查两个进程的修改都完整保留、没有互相覆盖，分区清单与分区内容一致。
+业务名称与界面一样由各进程自己的 BusinessRegistry 经 write_business_names 保存。
+
+用法：
+    python benchmarks/stress_multi_instance.py [--storage json|journal|sqlite] [--batches 200]
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.business_registry import BusinessRegistry, write_business_names
+from core.record_store import new_record_id
+from core.storage import (
+    JournalStorage, PartitionedStorage, SqliteStorage, read_json_file,
+)
+
+# 记录分布在这些月份中，其中包括会被压缩的冷分区
+MONTHS = ["2026-01", "2026-05", "2026-09", "2026-10"]
+
+
+def open_test_storage(data_dir, kind):
+    if kind == "sqlite":
+        return SqliteStorage(os.path.join(data_dir, "records.db"))
+    # 阈值调小，让压缩与另一个进程的追加交错发生
+    if kind == "journal":
+        return JournalStorage(data_dir, compact_threshold=16 * 1024)
+    return PartitionedStorage(data_dir, compact_threshold=16 * 1024)
+
+
+def business_names(writer_id, batches):
+    """(最终应保留的名称, 中途被删除的名称)：每 10 批新增一个，其中每 50 批的那个在 20 批后删除"""
+    added = [(b, f"进程{writer_id}-业务{b}") for b in range(0, batches, 10)]
+    kept = [name for b, name in added if b % 50 != 0 or b + 20 >= batches]
+    removed = [name for b, name in added if b % 50 == 0 and b + 20 < batches]
+    return kept, removed
+
+
+def save_business_names(data_dir, registry):
+    """与界面保存业务名称的路径一致：以上次同步时的内容为基准，与文件中其他进程新增的名称合并"""
+    names, pinned = write_business_names(data_dir, registry.names(), registry.pinned_names(),
+                                         registry.mark_synced())
+    # 与界面的文件监视器一样重新加载合并后的内容
+    registry.replace_all(names, pinned)
+
+
+def writer(data_dir, kind, writer_id, batches, seed, result_queue):
+    rng = random.Random(seed)
+    storage = open_test_storage(data_dir, kind)
+    storage.load()
+    registry = BusinessRegistry()
+    # 本进程期望最终保留的记录：id -> 记录
+    expected = {}
+    for batch_no in range(batches):
+        ops = []
+        for _ in range(rng.randint(1, 5)):
+            action = rng.random()
+            if expected and action < 0.2:
+                record_id = rng.choice(list(expected))
+                del expected[record_id]
+                ops.append({"op": "delete", "id": record_id})
+            elif expected and action < 0.45:
+                record_id = rng.choice(list(expected))
+                fields = {"task": f"进程{writer_id} 第{batch_no}批修改后的任务描述"}
+                if rng.random() < 0.3:
+                    # 跨月修改提单日期，记录在分区间移动
+                    fields["submit_date"] = f"{rng.choice(MONTHS)}-{rng.randint(1, 28):02d}"
+                expected[record_id] = dict(expected[record_id], **fields)
+                ops.append({"op": "update", "id": record_id, "fields": fields})
+            else:
+                record = {
+                    "id": new_record_id(),
+                    "business": f"业务{writer_id}-{rng.randint(0, 20)}",
+                    "task": f"进程{writer_id} 第{batch_no}批新增的任务描述",
+                    "manual_time": rng.choice([0.5, 1.0, 1.5, 2.0]),
+                    "submit_date": f"{rng.choice(MONTHS)}-{rng.randint(1, 28):02d}",
+                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                }
+                expected[record["id"]] = record
+                ops.append({"op": "add", "record": record})
+        storage.apply_ops(ops)
+        storage.maybe_compact()
+        if batch_no % 10 == 0:
+            registry.add(f"进程{writer_id}-业务{batch_no}")
+            if batch_no % 50 == 20:
+                registry.remove(f"进程{writer_id}-业务{batch_no - 20}")
+            # 一部分保存之间不重新加载，模拟文件监视器尚未通知时的保存
+            if rng.random() < 0.5:
+                save_business_names(data_dir, registry)
+            else:
+                write_business_names(data_dir, registry.names(), registry.pinned_names(),
+                                     registry.mark_synced())
+    storage.close()
+    result_queue.put((writer_id, expected))
+
+
+def check(data_dir, kind, expected, batches):
+    errors = []
+    storage = open_test_storage(data_dir, kind)
+    records = storage.load()
+    ids = [r["id"] for r in records]
+    if len(ids) != len(set(ids)):
+        errors.append(f"存在重复的记录 id: {len(ids) - len(set(ids))} 条")
+    by_id = {r["id"]: r for r in records}
+    for record_id, record in expected.items():
+        stored = by_id.get(record_id)
+        if stored is None:
+            errors.append(f"记录丢失: {record_id}")
+        elif any(stored.get(k) != v for k, v in record.items()):
+            errors.append(f"记录内容不一致: {record_id}")
+    extra = set(by_id) - set(expected)
+    if extra:
+        errors.append(f"存在已删除或未知的记录: {len(extra)} 条")
+    if isinstance(storage, PartitionedStorage):
+        for month, (count, _) in storage.partition_summary().items():
+            actual = len(storage.load_months([month]))
+            if actual != count:
+                errors.append(f"清单条数与分区不一致: {month} 清单 {count} 条, 实际 {actual} 条")
+    storage.close()
+
+    names = read_json_file(os.path.join(data_dir, "business.json"))
+    kept = [name for w in (1, 2) for name in business_names(w, batches)[0]]
+    removed = [name for w in (1, 2) for name in business_names(w, batches)[1]]
+    missing = [name for name in kept if name not in names]
+    if missing:
+        errors.append(f"业务名称丢失: {missing[:5]} 等 {len(missing)} 个")
+    restored = [name for name in removed if name in names]
+    if restored:
+        errors.append(f"已删除的业务名称被写回: {restored[:5]} 等 {len(restored)} 个")
+    if len(names) != len(set(names)):
+        errors.append("业务名称重复")
+    leftovers = [name for _, _, files in os.walk(data_dir) for name in files if name.endswith(".tmp")]
+    if leftovers:
+        errors.append(f"残留临时文件: {leftovers}")
+    return errors, len(records)
+
+
+def main(args):
+    data_dir = tempfile.mkdtemp(prefix="bkitsm-stress-")
+    try:
+        # 子进程以 spawn 方式启动，与两个独立运行的实例一致
+        context = multiprocessing.get_context("spawn")
+        result_queue = context.Queue()
+        started = time.perf_counter()
+        processes = [
+            context.Process(target=writer, args=(data_dir, args.storage, writer_id, args.batches,
+                                                 args.seed + writer_id, result_queue))
+            for writer_id in (1, 2)
+        ]
+        for process in processes:
+            process.start()
+        expected = {}
+        finished = 0
+        while finished < len(processes):
+            try:
+                _, records = result_queue.get(timeout=1)
+            except queue.Empty:
+                # 写入进程异常退出时不会再返回结果
+                if any(process.exitcode not in (None, 0) for process in processes):
+                    break
+                continue
+            expected.update(records)
+            finished += 1
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+        if any(process.exitcode != 0 for process in processes):
+            print("写入进程异常退出")
+            return 1
+
+        errors, count = check(data_dir, args.storage, expected, args.batches)
+        print(f"存储: {args.storage}, 每个进程 {args.batches} 批, 最终 {count} 条记录, 耗时 {elapsed:.2f}s")
+        if errors:
+            for error in errors[:20]:
+                print(f"  失败: {error}")
+            return 1
+        print("  通过: 两个进程的修改均完整保留")
+        return 0
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="两个进程同时写入同一数据目录的压力测试")
+    parser.add_argument("--storage", choices=["json", "journal", "sqlite"], default="json")
+    parser.add_argument("--batches", type=int, default=200, help="每个进程写入的批次数")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,289 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from core.exporters import EXPORT_FORMATS, create_exporter, export_to_file, user_templates
+from core.file_lock import data_lock
+from core.line_template import TemplateError
+from core.paths import get_app_data_dir
+from core.public_matcher import PublicBusinessMatcher, read_public_businesses
+from core.record_index import RecordFilter
+from core.record_rules import RecordValidationError, build_record, normalize_submit_date
+from core.reports import (
+    PERIOD_TITLES, PERIOD_WEEK, DEFAULT_TOP_TASKS, DEFAULT_WORKDAY_HOURS, RecordColumns, build_report,
+    report_tables, format_cell, coverage_text
+)
+from core.storage import load_settings, open_storage, read_json_file, write_json_atomic
+
+# 导入文件中可用的列名：英文字段名或界面上的中文列名
+COLUMN_ALIASES = {
+    "business": "business", "业务": "business",
+    "task": "task", "任务": "task",
+    "manual_time": "manual_time", "耗时": "manual_time",
+    "submit_date": "submit_date", "提单时间": "submit_date",
+    "timestamp": "timestamp",
+}
+# 校验失败时最多逐行打印的错误数
+MAX_PRINTED_ERRORS = 50
+
+
+class ImportAborted(Exception):
+    """导入文件中有不合格的行，放弃整批导入"""
+
+
+def detect_format(path, fmt):
+    if fmt:
+        return fmt
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def iter_rows(path, fmt):
+    """逐行读取导入文件，返回 (行号, 字段字典)，不把整个文件读入内存"""
+    if fmt == "jsonl":
+        with open(path, "r", encoding="utf-8-sig") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    yield line_no, None
+                    continue
+                yield line_no, row if isinstance(row, dict) else None
+    else:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                # 表头占第 1 行，行号与表格软件中看到的一致
+                yield reader.line_num, row
+
+
+def parse_row(row, timestamp):
+    """按添加记录的规则校验一行，返回新记录"""
+    if row is None:
+        raise RecordValidationError("无法解析的行")
+    fields = {}
+    for key, value in row.items():
+        field = COLUMN_ALIASES.get(str(key).strip()) if key is not None else None
+        if field is not None:
+            fields[field] = value
+    return build_record(
+        fields.get("business"), fields.get("task"), fields.get("manual_time"),
+        fields.get("submit_date"), fields.get("timestamp") or timestamp,
+    )
+
+
+def iter_records(path, fmt, timestamp, on_error=None):
+    """逐行校验，返回合格的记录；不合格的行交给 on_error(行号, 消息)"""
+    for line_no, row in iter_rows(path, fmt):
+        try:
+            yield parse_row(row, timestamp)
+        except RecordValidationError as e:
+            if on_error is not None:
+                on_error(line_no, str(e))
+
+
+def add_business_names(data_dir, names):
+    """把导入记录中的新业务名称追加到 business.json，与界面添加记录时一致"""
+    path = os.path.join(data_dir, "business.json")
+    with data_lock(data_dir):
+        existing = read_json_file(path) if os.path.exists(path) else []
+        known = set(existing)
+        added = [name for name in sorted(names) if name not in known]
+        if added:
+            write_json_atomic(path, existing + added)
+    return added
+
+
+def cmd_import(args):
+    fmt = detect_format(args.file, args.format)
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    started = time.perf_counter()
+
+    valid = errors = 0
+    businesses = set()
+
+    def report(line_no, message):
+        nonlocal errors
+        errors += 1
+        if errors <= MAX_PRINTED_ERRORS:
+            print(f"第 {line_no} 行: {message}", file=sys.stderr)
+
+    def records():
+        # 边读边校验；存储在全部读完后才整批提交，最后抛出异常即放弃整批
+        nonlocal valid
+        for record in iter_records(args.file, fmt, timestamp, report):
+            valid += 1
+            businesses.add(record["business"])
+            yield record
+        if errors > MAX_PRINTED_ERRORS:
+            print(f"... 共 {errors} 行不合格", file=sys.stderr)
+        if errors and not args.skip_invalid:
+            raise ImportAborted()
+
+    if args.dry_run:
+        try:
+            for _ in records():
+                pass
+        except ImportAborted:
+            pass
+        print(f"校验完成: 合格 {valid} 行, 不合格 {errors} 行")
+        return 1 if errors else 0
+
+    storage = open_storage(args.data_dir)
+    try:
+        count = storage.append_records(records())
+    except ImportAborted:
+        print(f"有 {errors} 行不合格，未导入任何记录（使用 --skip-invalid 跳过不合格的行）", file=sys.stderr)
+        return 1
+    finally:
+        storage.close()
+    added = add_business_names(args.data_dir, businesses)
+    elapsed = time.perf_counter() - started
+    print(f"已导入 {count} 条记录，跳过 {errors} 行，新增业务名称 {len(added)} 个，耗时 {elapsed:.2f}s")
+    return 0
+
+
+def export_records(args, exporter, records_filter=None):
+    """按区间逐条读取记录交给导出器，写到 -o 指定的文件或标准输出，返回条数"""
+    storage = open_storage(args.data_dir)
+    try:
+        records = storage.iter_range(args.start, args.end, args.business, exporter.newest_first)
+        if records_filter is not None:
+            records = filter(records_filter, records)
+        if args.output:
+            return export_to_file(exporter, records, args.output)
+        if exporter.binary:
+            count = exporter.write(records, sys.stdout.buffer)
+        else:
+            count = exporter.write(records, sys.stdout)
+        sys.stdout.flush()
+        return count
+    finally:
+        storage.close()
+
+
+def build_exporter(args, fmt):
+    template, header = args.template, args.header
+    # --template 可以是 settings.json 中 export_templates 定义的名称
+    templates = user_templates(load_settings(args.data_dir))
+    if template in templates:
+        template, header = templates[template][0], header or templates[template][1]
+    matcher = PublicBusinessMatcher(read_public_businesses(args.data_dir)) if fmt == "xiaojing" else None
+    return create_exporter(fmt, matcher, template, header)
+
+
+def cmd_export(args):
+    if args.format == "xlsx" and not args.output and sys.stdout.isatty():
+        print("导出 xlsx 时请用 -o 指定输出文件", file=sys.stderr)
+        return 1
+    try:
+        exporter = build_exporter(args, args.format)
+    except TemplateError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    count = export_records(args, exporter)
+    if args.output:
+        print(f"已导出 {count} 条记录到 {args.output}")
+    return 0
+
+
+def cmd_text(args):
+    try:
+        exporter = build_exporter(args, "xiaojing")
+    except TemplateError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    records_filter = None
+    if args.kind != RecordFilter.KIND_ALL:
+        want_public = args.kind == RecordFilter.KIND_PUBLIC
+        records_filter = lambda r: exporter.matcher.is_public(r.get("business", "")) == want_public
+    if not export_records(args, exporter, records_filter):
+        print("没有记录可以生成文本", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_report(args):
+    storage = open_storage(args.data_dir)
+    try:
+        matcher = PublicBusinessMatcher(read_public_businesses(args.data_dir))
+        columns = RecordColumns(storage.iter_range(args.start, args.end, args.business), matcher)
+    finally:
+        storage.close()
+    workday_hours = load_settings(args.data_dir).get("workday_hours", DEFAULT_WORKDAY_HOURS)
+    report = build_report(columns, args.period, args.start, args.end, top=args.top, workday_hours=workday_hours)
+    # 各表以制表符分隔输出，可直接粘贴到 Excel
+    for title, headers, rows in report_tables(report):
+        print(f"# {title}")
+        print("\t".join(headers))
+        for values in rows:
+            print("\t".join(format_cell(value) for value in values))
+        print()
+    print(f"共 {report.record_count} 条，合计 {report.total_hours:.1f} 小时；{coverage_text(report)}")
+    return 0
+
+
+def date_argument(value):
+    try:
+        return normalize_submit_date(value)
+    except RecordValidationError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def add_range_arguments(parser):
+    parser.add_argument("--start", type=date_argument, help="提单日期起始 yyyy-MM-dd")
+    parser.add_argument("--end", type=date_argument, help="提单日期结束 yyyy-MM-dd")
+    parser.add_argument("--business", help="只包含该业务")
+    parser.add_argument("-o", "--output", help="输出文件，默认输出到标准输出")
+    parser.add_argument("--template", help="自定义行模板，如 \"{date} {business} {task} {manual_time:.1f}\"，"
+                                           "或 settings.json 中 export_templates 定义的名称")
+    parser.add_argument("--header", default="", help="自定义模板输出前的表头行")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="main.py cli", description="工作记录工具命令行，不启动界面")
+    parser.add_argument("--data-dir", default=get_app_data_dir(), help="数据目录，默认与界面相同")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="从 CSV / JSONL 批量导入记录")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--format", choices=["csv", "jsonl"], help="默认按文件后缀判断")
+    import_parser.add_argument("--dry-run", action="store_true", help="只校验，不导入")
+    import_parser.add_argument("--skip-invalid", action="store_true", help="跳过不合格的行，导入其余记录")
+    import_parser.set_defaults(func=cmd_import)
+
+    export_parser = commands.add_parser("export", help="导出提单日期区间内的记录")
+    add_range_arguments(export_parser)
+    export_parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    export_parser.set_defaults(func=cmd_export)
+
+    text_parser = commands.add_parser("text", help="输出小鲸批量创建记录单 / 公共记录单文本")
+    add_range_arguments(text_parser)
+    text_parser.add_argument("--kind", choices=[RecordFilter.KIND_ALL, RecordFilter.KIND_PUBLIC,
+                                                RecordFilter.KIND_NORMAL], default=RecordFilter.KIND_ALL)
+    text_parser.set_defaults(func=cmd_text)
+
+    report_parser = commands.add_parser("report", help="按业务 × 周 / 月汇总耗时，含公共 / 普通拆分、每日工时与任务排行")
+    report_parser.add_argument("--start", type=date_argument, help="提单日期起始 yyyy-MM-dd，默认最早的记录")
+    report_parser.add_argument("--end", type=date_argument, help="提单日期结束 yyyy-MM-dd，默认最晚的记录")
+    report_parser.add_argument("--business", help="只包含该业务")
+    report_parser.add_argument("--period", choices=list(PERIOD_TITLES), default=PERIOD_WEEK)
+    report_parser.add_argument("--top", type=int, default=DEFAULT_TOP_TASKS, help="任务排行列出的条数")
+    report_parser.set_defaults(func=cmd_report)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    os.makedirs(args.data_dir, exist_ok=True)
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # 输出被管道提前关闭（如 | head）时安静退出
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
@@ -0,0 +1,124 @@
+from datetime import date, timedelta
+
+# 耗时按微小时整数累加，增减多次也不会产生浮点误差
+_UNITS_PER_HOUR = 1000000
+
+
+def _to_units(hours):
+    try:
+        return int(round(float(hours) * _UNITS_PER_HOUR))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _to_hours(units):
+    return units / _UNITS_PER_HOUR
+
+
+class RecordAggregates:
+    """记录的增量汇总
+
+    按提单日期、业务以及 (日期, 业务) 维护条数和耗时，
+    每次增删改只调整受影响的计数器，查询无需遍历全部记录。
+    """
+
+    def __init__(self, records=()):
+        self.rebuild(records)
+
+    def rebuild(self, records):
+        self.count = 0
+        self._units = 0
+        # key -> [条数, 耗时单位]
+        self.by_date = {}
+        self.by_business = {}
+        self.by_date_business = {}
+        for record in records:
+            self.add(record)
+
+    @staticmethod
+    def _bump(counters, key, count, units):
+        entry = counters.get(key)
+        if entry is None:
+            entry = counters[key] = [0, 0]
+        entry[0] += count
+        entry[1] += units
+        if entry[0] == 0:
+            del counters[key]
+
+    def _apply(self, record, sign):
+        units = sign * _to_units(record.get("manual_time", 0))
+        submit_date = record.get("submit_date", "")
+        business = record.get("business", "")
+        self.count += sign
+        self._units += units
+        self._bump(self.by_date, submit_date, sign, units)
+        self._bump(self.by_business, business, sign, units)
+        self._bump(self.by_date_business, (submit_date, business), sign, units)
+
+    def add(self, record):
+        self._apply(record, 1)
+
+    def remove(self, record):
+        self._apply(record, -1)
+
+    # ---- 查询 ----
+    @property
+    def total_hours(self):
+        return _to_hours(self._units)
+
+    def date_total(self, submit_date):
+        """返回某天的 (条数, 耗时)，日期格式 yyyy-MM-dd"""
+        count, units = self.by_date.get(submit_date, (0, 0))
+        return count, _to_hours(units)
+
+    def business_total(self, business):
+        count, units = self.by_business.get(business, (0, 0))
+        return count, _to_hours(units)
+
+    def date_business_total(self, submit_date, business):
+        count, units = self.by_date_business.get((submit_date, business), (0, 0))
+        return count, _to_hours(units)
+
+    def range_total(self, start, end):
+        """返回 [start, end] 日期区间（date 对象）的 (条数, 耗时)，按天查表"""
+        count = units = 0
+        day = start
+        while day <= end:
+            entry = self.by_date.get(day.isoformat())
+            if entry is not None:
+                count += entry[0]
+                units += entry[1]
+            day += timedelta(days=1)
+        return count, _to_hours(units)
+
+    def week_total(self, day=None):
+        """返回 day 所在自然周（周一至周日）的 (条数, 耗时)"""
+        day = day or date.today()
+        monday = day - timedelta(days=day.weekday())
+        return self.range_total(monday, monday + timedelta(days=6))
+
+    def filter_total(self, record_filter):
+        """返回满足筛选条件的 (条数, 耗时)，只遍历汇总键而不遍历记录"""
+        count = units = 0
+        if record_filter.business is None and record_filter.kind == record_filter.KIND_ALL:
+            for submit_date, entry in self.by_date.items():
+                if record_filter.matches_date(submit_date):
+                    count += entry[0]
+                    units += entry[1]
+        else:
+            for (submit_date, business), entry in self.by_date_business.items():
+                if record_filter.matches_key(submit_date, business):
+                    count += entry[0]
+                    units += entry[1]
+        return count, _to_hours(units)
+
+    # ---- 一致性校验 ----
+    def verify(self, records):
+        """从头重新计算并与增量结果比对，不一致时抛出 AssertionError"""
+        expected = RecordAggregates(records)
+        for name in ("count", "_units", "by_date", "by_business", "by_date_business"):
+            actual_value = getattr(self, name)
+            expected_value = getattr(expected, name)
+            if actual_value != expected_value:
+                raise AssertionError(f"汇总数据 {name} 不一致: {actual_value!r} != {expected_value!r}")
+        return True
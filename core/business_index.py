@@ -0,0 +1,233 @@
+import heapq
+from bisect import bisect_left, insort
+from datetime import date
+from core.pinyin import full_pinyin, initials
+
+# 匹配类别，数值越小排序越靠前
+MATCH_EXACT = 0
+MATCH_PREFIX = 1
+MATCH_PINYIN_PREFIX = 2
+MATCH_SUBSTRING = 3
+MATCH_FUZZY = 4
+
+# 每次查询最多收集的匹配数，单字查询时避免遍历、排序全部名称
+MAX_CANDIDATES = 500
+# 模糊匹配时首字相同、第二个字不同的键最多检查的数量
+MAX_FUZZY_SCAN = 100
+
+
+def _fuzzy_limit(query):
+    # 查询越长允许的编辑距离越大
+    return 1 if len(query) <= 5 else 2
+
+
+def _prefix_distance_one(query, key):
+    """limit 为 1 时的快速判断：找到第一个不同的字后，比较替换、多字、少字三种情况"""
+    i = 0
+    n = min(len(query), len(key))
+    while i < n and query[i] == key[i]:
+        i += 1
+    if i == len(query):
+        return 0
+    rest = query[i + 1:]
+    if key.startswith(rest, i + 1) or key.startswith(rest, i) or key.startswith(query[i:], i + 1):
+        return 1
+    return None
+
+
+def _prefix_distance(query, key, limit):
+    """query 与 key 某个前缀之间的最小编辑距离，超过 limit 时返回 None"""
+    if limit == 1:
+        return _prefix_distance_one(query, key)
+    key = key[:len(query) + limit]
+    previous = list(range(len(key) + 1))
+    for i, qc in enumerate(query, 1):
+        current = [i]
+        for j, kc in enumerate(key, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (qc != kc)))
+        if min(current) > limit:
+            return None
+        previous = current
+    distance = min(previous)
+    return distance if distance <= limit else None
+
+
+class BusinessNameIndex:
+    """业务名称补全索引
+
+    每个名称登记原文（小写）、拼音首字母及完整拼音（需要 pypinyin）三种键：
+    排序后的键列表用 bisect 做前缀查找，相当于压平的前缀树；
+    单字与相邻两字的倒排索引用于子串查找；前缀与子串都不足时再按编辑距离模糊匹配。
+    结果先按匹配类别、再按 usage（BusinessRegistry）给出的使用热度排序，名称增删时增量维护。
+    """
+
+    def __init__(self, names=(), usage=None):
+        self._names = []
+        # 名称 id -> [(键, 是否为原文键)]
+        self._forms = []
+        # 小写名称 -> 名称 id
+        self._ids = {}
+        # (键, 名称 id, 是否为原文键)，按键排序
+        self._keys = []
+        # 单字 / 两字 -> 名称 id 集合，名称原文及首字母键都会登记
+        self._grams = {}
+        # 提供 usage_score(name, today) 的对象，为 None 时只按名称排序
+        self.usage = usage
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, name):
+        return name.lower() in self._ids
+
+    # ---- 名称维护 ----
+    @staticmethod
+    def _key_forms(name):
+        lowered = name.lower()
+        forms = [(lowered, True)]
+        for key in (initials(name), full_pinyin(name)):
+            if key and key != lowered:
+                forms.append((key, False))
+        return forms
+
+    @staticmethod
+    def _gram_keys(key):
+        grams = set(key)
+        grams.update(key[i:i + 2] for i in range(len(key) - 1))
+        return grams
+
+    def add(self, name):
+        """登记一个名称，已存在时忽略"""
+        lowered = name.lower()
+        if not name or lowered in self._ids:
+            return False
+        name_id = len(self._names)
+        forms = self._key_forms(name)
+        self._names.append(name)
+        self._forms.append(forms)
+        self._ids[lowered] = name_id
+        for key, is_name in forms:
+            insort(self._keys, (key, name_id, is_name))
+            for gram in self._gram_keys(key):
+                self._grams.setdefault(gram, set()).add(name_id)
+        return True
+
+    def remove(self, name):
+        name_id = self._ids.pop(name.lower(), None)
+        if name_id is None:
+            return False
+        for key, is_name in self._forms[name_id]:
+            entry = (key, name_id, is_name)
+            pos = bisect_left(self._keys, entry)
+            if pos < len(self._keys) and self._keys[pos] == entry:
+                del self._keys[pos]
+            for gram in self._gram_keys(key):
+                ids = self._grams.get(gram)
+                if ids is not None:
+                    ids.discard(name_id)
+                    if not ids:
+                        del self._grams[gram]
+        self._names[name_id] = None
+        self._forms[name_id] = ()
+        return True
+
+    def sync(self, names):
+        """与给定名称集合同步，只增删有变化的名称"""
+        wanted = {name.lower(): name for name in names if name}
+        for lowered in [key for key in self._ids if key not in wanted]:
+            self.remove(self._names[self._ids[lowered]])
+        for lowered, name in wanted.items():
+            if lowered not in self._ids:
+                self.add(name)
+
+    # ---- 查询 ----
+    def _key_range(self, prefix):
+        """键以 prefix 开头的条目，按键顺序逐个返回"""
+        keys = self._keys
+        pos = bisect_left(keys, (prefix,))
+        while pos < len(keys) and keys[pos][0].startswith(prefix):
+            yield keys[pos]
+            pos += 1
+
+    def _prefix_matches(self, query, matches):
+        for _, name_id, is_name in self._key_range(query):
+            if len(matches) >= MAX_CANDIDATES:
+                break
+            kind = MATCH_PREFIX if is_name else MATCH_PINYIN_PREFIX
+            if kind < matches.get(name_id, MATCH_FUZZY + 1):
+                matches[name_id] = kind
+
+    def _substring_candidates(self, query):
+        if len(query) <= 2:
+            return self._grams.get(query, ())
+        # 取查询中最少见的两字组合作为候选，再逐个确认
+        best = None
+        for i in range(len(query) - 1):
+            ids = self._grams.get(query[i:i + 2])
+            if not ids:
+                return ()
+            if best is None or len(ids) < len(best):
+                best = ids
+        return best
+
+    def _substring_matches(self, query, matches):
+        # 一两个字的查询直接由倒排索引命中，无需逐个确认
+        verify = len(query) > 2
+        for name_id in self._substring_candidates(query):
+            if len(matches) >= MAX_CANDIDATES:
+                break
+            if name_id in matches:
+                continue
+            if not verify or any(query in key for key, _ in self._forms[name_id]):
+                matches[name_id] = MATCH_SUBSTRING
+
+    def _fuzzy_scan(self, query, prefix, scan_limit, matches):
+        limit = _fuzzy_limit(query)
+        query_counts = [(ch, query.count(ch)) for ch in set(query)]
+        required = len(query) - limit
+        for scanned, (key, name_id, _) in enumerate(self._key_range(prefix)):
+            if scanned >= scan_limit:
+                break
+            if name_id in matches and matches[name_id] < MATCH_FUZZY:
+                continue
+            head = key[:len(query) + limit]
+            # 每次编辑最多让查询中的一个字失去对应，共有字数不足时不必计算编辑距离；
+            # 距离上限为 1 时直接判断比筛选更快
+            if limit > 1 and sum(min(count, head.count(ch)) for ch, count in query_counts) < required:
+                continue
+            distance = _prefix_distance(query, head, limit)
+            if distance is not None and MATCH_FUZZY + distance < matches.get(name_id, MATCH_FUZZY + limit + 1):
+                matches[name_id] = MATCH_FUZZY + distance
+
+    def _fuzzy_matches(self, query, matches):
+        # 输入补全时首字很少输错，只在首字相同的键中查找：
+        # 先查前两个字相同的键（错在后面），再有限地查看其余首字相同的键
+        self._fuzzy_scan(query, query[:2], MAX_CANDIDATES, matches)
+        self._fuzzy_scan(query, query[0], MAX_FUZZY_SCAN, matches)
+
+    def search(self, text, limit=20):
+        """返回与输入匹配的名称，按匹配类别、使用热度、名称排序"""
+        query = text.strip().lower()
+        if not query:
+            return []
+        matches = {}
+        exact = self._ids.get(query)
+        if exact is not None:
+            matches[exact] = MATCH_EXACT
+        self._prefix_matches(query, matches)
+        if len(matches) < limit:
+            self._substring_matches(query, matches)
+        # 没有前缀或子串匹配时才按编辑距离查找，避免在已有结果后追加大量近似项
+        if not matches and len(query) >= 2:
+            self._fuzzy_matches(query, matches)
+        names = self._names
+        if self.usage is None:
+            key = lambda item: (item[1], names[item[0]])
+        else:
+            today = date.today().toordinal()
+            usage_score = self.usage.usage_score
+            key = lambda item: (item[1], -usage_score(names[item[0]], today), names[item[0]])
+        best = heapq.nsmallest(limit, matches.items(), key=key)
+        return [names[name_id] for name_id, _ in best]
@@ -0,0 +1,256 @@
+import os
+from collections import OrderedDict
+from datetime import date, datetime
+from .file_cache import data_file_cache, read_json
+from .file_lock import data_lock
+from .record import date_ordinal
+from .storage import read_json_file, write_json_atomic
+
+# 使用热度的半衰期（天），越久没用的业务排序越靠后
+USAGE_HALF_LIFE_DAYS = 30
+
+# 数据目录下的业务名称（置顶的在前）与置顶标记文件
+BUSINESS_FILE = "business.json"
+BUSINESS_PINS_FILE = "business_pins.json"
+
+# 变更通知的类型
+ADDED = "added"          # 名称追加到末尾
+REMOVED = "removed"      # 名称被删除
+MOVED_TO_TOP = "moved"   # 名称被置顶，移到最前
+PIN_CHANGED = "pin"      # 置顶标记变化，顺序不变
+RESET = "reset"          # 整体替换，需要重新加载全部名称
+EDITED = "edited"        # 批量修改（业务管理对话框确认、撤销），需要重新加载全部名称并保存
+
+
+def _date_ordinal(value):
+    """提单日期或时间戳（yyyy-MM-dd 开头）转为日期序数，无法解析时返回 None"""
+    ordinal = date_ordinal(str(value)[:10])
+    if ordinal is not None:
+        return ordinal
+    try:
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d").toordinal()
+    except ValueError:
+        return None
+
+
+def merge_names(ours, base, theirs):
+    """三方合并名称列表，保持本实例 (ours) 的顺序
+
+    base 为本实例上次读取或写入文件时的名称，theirs 为文件中当前的名称：
+    其他实例或命令行在 base 之后新增的名称追加到末尾，任何一方删除的名称都不再写回。
+    """
+    base = set(base)
+    theirs_set = set(theirs)
+    ours_set = set(ours)
+    merged = [name for name in ours if name in theirs_set or name not in base]
+    merged.extend(name for name in theirs if name not in base and name not in ours_set)
+    return merged
+
+
+def write_business_names(data_dir, names, pinned, base=((), ())):
+    """在数据目录锁内重新读取业务名称与置顶文件，与其他实例的修改合并后原子写入
+
+    base 为上次同步时的 (名称, 置顶名称)，见 BusinessRegistry.mark_synced；返回实际写入的 (名称, 置顶名称)。
+    """
+    names_path = os.path.join(data_dir, BUSINESS_FILE)
+    pins_path = os.path.join(data_dir, BUSINESS_PINS_FILE)
+    with data_lock(data_dir):
+        theirs = read_json_file(names_path) if os.path.exists(names_path) else []
+        names = merge_names(names, base[0], theirs)
+        theirs = read_json_file(pins_path) if os.path.exists(pins_path) else []
+        known = set(names)
+        pinned = [name for name in merge_names(pinned, base[1], theirs) if name in known]
+        write_json_atomic(names_path, names)
+        write_json_atomic(pins_path, pinned)
+    # 写入后立即更新缓存，下次读取无需重新解析
+    data_file_cache.store(names_path, read_json, names)
+    data_file_cache.store(pins_path, read_json, pinned)
+    return names, pinned
+
+
+class BusinessRegistry:
+    """业务名称登记表，主窗口与业务管理对话框共用同一个实例
+
+    名称保存在有序字典中，兼具集合的 O(1) 查找、增删与列表的顺序，
+    置顶即移到最前（O(1)）并记录置顶标记；使用次数与最近使用时间由记录及存储中未加载月份的统计推算，不写入文件。
+    每次变更通知订阅者 (类型, 名称)，界面只需更新受影响的条目。
+    """
+
+    def __init__(self, names=(), pinned=()):
+        self._names = OrderedDict()
+        self._pinned = set()
+        self._listeners = []
+        # 业务名称 -> [使用次数, 最近使用日期序数]，可以包含不在登记表中的名称（如公共业务）
+        self._usage = {}
+        # 按最近使用先后排列的业务名称，最近使用的在末尾
+        self._recent = OrderedDict()
+        # 当天的热度缓存，使用记录变化或跨天时失效
+        self._scores = {}
+        self._score_day = None
+        self._load(names, pinned)
+        # 上次与文件同步（读取或写入）时的 (名称, 置顶名称)，保存时用于区分本实例删除与其他实例新增的名称
+        self._synced = (self.names(), self.pinned_names())
+
+    def _load(self, names, pinned):
+        self._names = OrderedDict((name, None) for name in names if name)
+        self._pinned = {name for name in pinned if name in self._names}
+
+    # ---- 订阅 ----
+    def subscribe(self, listener):
+        """listener(kind, name)，RESET 时 name 为 None"""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, kind, name=None):
+        for listener in list(self._listeners):
+            listener(kind, name)
+
+    # ---- 集合操作 ----
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def names(self):
+        return list(self._names)
+
+    def pinned_names(self):
+        """置顶的名称，按显示顺序"""
+        return [name for name in self._names if name in self._pinned]
+
+    def is_pinned(self, name):
+        return name in self._pinned
+
+    def add(self, name):
+        """追加名称，已存在时返回 False"""
+        if not name or name in self._names:
+            return False
+        self._names[name] = None
+        self._notify(ADDED, name)
+        return True
+
+    def remove(self, name):
+        if name not in self._names:
+            return False
+        del self._names[name]
+        self._pinned.discard(name)
+        self._notify(REMOVED, name)
+        return True
+
+    def pin(self, name):
+        """置顶：移到最前并标记，重复置顶同样移到最前"""
+        if name not in self._names:
+            return False
+        self._names.move_to_end(name, last=False)
+        self._pinned.add(name)
+        self._notify(MOVED_TO_TOP, name)
+        return True
+
+    def unpin(self, name):
+        """取消置顶标记，位置保持不变"""
+        if name not in self._pinned:
+            return False
+        self._pinned.discard(name)
+        self._notify(PIN_CHANGED, name)
+        return True
+
+    def replace_all(self, names, pinned=()):
+        """整体替换为文件中的内容，同时作为新的同步点"""
+        self._load(names, pinned)
+        self._synced = (self.names(), self.pinned_names())
+        self._notify(RESET)
+
+    def update_all(self, names, pinned=()):
+        """整体替换为修改后的名称顺序与置顶标记，只通知一次（EDITED），由订阅者保存"""
+        self._load(names, pinned)
+        self._notify(EDITED)
+
+    def mark_synced(self):
+        """保存前调用：返回上次同步时的 (名称, 置顶名称)，并以当前内容作为新的同步点"""
+        base = self._synced
+        self._synced = (self.names(), self.pinned_names())
+        return base
+
+    # ---- 使用统计 ----
+    def record_use(self, name, when=None):
+        """登记一次使用，when 为提单日期或时间戳"""
+        ordinal = _date_ordinal(when) if when else date.today().toordinal()
+        self._scores.pop(name, None)
+        usage = self._usage.get(name)
+        if usage is None:
+            usage = self._usage[name] = [0, ordinal]
+        usage[0] += 1
+        if ordinal is not None and (usage[1] is None or ordinal >= usage[1]):
+            usage[1] = ordinal
+            self._recent[name] = ordinal
+            self._recent.move_to_end(name)
+
+    def rebuild_usage(self, records, archived=None):
+        """由已加载的记录重新统计使用次数
+
+        archived 为尚未加载月份的 业务 -> (使用次数, 最近提单日期)（见 RecordStorage.business_usage），
+        与 records 合计后，使用次数与排序不随已加载的月份变化。
+        """
+        self._usage = {name: [count, _date_ordinal(day) if day else None]
+                       for name, (count, day) in (archived or {}).items()}
+        self._scores = {}
+        for record in records:
+            name = record.get("business", "")
+            ordinal = _date_ordinal(record.get("submit_date") or record.get("timestamp"))
+            usage = self._usage.get(name)
+            if usage is None:
+                usage = self._usage[name] = [0, ordinal]
+            usage[0] += 1
+            if ordinal is not None and (usage[1] is None or ordinal > usage[1]):
+                usage[1] = ordinal
+        # 按最近使用日期排序一次，之后随使用增量调整
+        self._recent = OrderedDict(sorted(
+            ((name, usage[1]) for name, usage in self._usage.items() if usage[1] is not None),
+            key=lambda item: item[1],
+        ))
+
+    def usage_count(self, name):
+        usage = self._usage.get(name)
+        return usage[0] if usage else 0
+
+    def last_used(self, name):
+        """最近使用日期，没有使用过时返回 None"""
+        usage = self._usage.get(name)
+        if usage is None or usage[1] is None:
+            return None
+        return date.fromordinal(usage[1])
+
+    def most_recent(self, limit=10):
+        """最近使用的业务名称，最近的在前"""
+        result = []
+        for name in reversed(self._recent):
+            result.append(name)
+            if len(result) >= limit:
+                break
+        return result
+
+    def usage_score(self, name, today=None):
+        """使用次数按最近使用时间衰减后的热度"""
+        today = today or date.today().toordinal()
+        if self._score_day != today:
+            self._scores = {}
+            self._score_day = today
+        score = self._scores.get(name)
+        if score is None:
+            usage = self._usage.get(name)
+            if usage is None:
+                score = 0.0
+            elif usage[1] is None:
+                score = float(usage[0])
+            else:
+                days = max(0, today - usage[1])
+                score = usage[0] * 0.5 ** (days / USAGE_HALF_LIFE_DAYS)
+            self._scores[name] = score
+        return score
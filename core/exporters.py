@@ -0,0 +1,238 @@
+import csv
+import json
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape as xml_escape
+from .line_template import compile_template
+from .record import record_dict
+from .record_rules import RECORD_FIELDS
+from .record_text import WRITE_CHUNK_LINES, write_record_text
+
+# 写入导出文件时的缓冲区大小
+WRITE_BUFFER_SIZE = 1 << 16
+
+# XML 1.0 不允许的控制字符，写入 XLSX 前去掉
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class Exporter:
+    """把记录逐条写入输出流
+
+    records 可以是任意可迭代对象（如存储按月分区逐条读取的生成器），
+    导出过程中不保存记录也不拼接整段文本，内存占用与记录条数无关。
+    """
+
+    title = ""
+    suffix = ""
+    # 为 True 时输出为字节流（XLSX），否则为文本
+    binary = False
+    # 记录的输出顺序是否为最新添加的在前
+    newest_first = False
+    # 写入文件时使用的编码
+    encoding = "utf-8"
+
+    def write(self, records, out):
+        """写出全部记录，返回条数"""
+        raise NotImplementedError
+
+
+class XiaojingExporter(Exporter):
+    """小鲸批量创建记录单 / 公共记录单，与“生成文本”的内容相同"""
+
+    title = "小鲸提单文本"
+    suffix = ".txt"
+    newest_first = True
+
+    def __init__(self, matcher, template=None):
+        self.matcher = matcher
+        self.render = compile_template(template) if template else None
+
+    def write(self, records, out):
+        if self.render is None:
+            return write_record_text(records, out, self.matcher)
+        return write_record_text(records, out, self.matcher, self.render)
+
+
+class TemplateExporter(Exporter):
+    """每条记录按行模板输出一行，header 为模板之前的若干行"""
+
+    title = "自定义模板"
+    suffix = ".txt"
+
+    def __init__(self, template, header="", escape=None):
+        self.render = compile_template(template, escape)
+        self.header = header
+
+    def write(self, records, out):
+        if self.header:
+            out.write(self.header + "\n")
+        return _write_lines(records, out, self.render)
+
+
+def _write_lines(records, out, render):
+    """逐条渲染并每 WRITE_CHUNK_LINES 行写出一次，返回条数"""
+    count = 0
+    chunk = []
+    for record in records:
+        chunk.append(render(record))
+        if len(chunk) >= WRITE_CHUNK_LINES:
+            out.write("\n".join(chunk) + "\n")
+            count += len(chunk)
+            chunk.clear()
+    if chunk:
+        out.write("\n".join(chunk) + "\n")
+        count += len(chunk)
+    return count
+
+
+def escape_markdown(text):
+    return text.replace("\\", "\\\\").replace("|", "\\|").replace("\r", "").replace("\n", "<br>")
+
+
+class MarkdownExporter(TemplateExporter):
+    title = "Markdown 表格"
+    suffix = ".md"
+
+    def __init__(self):
+        super().__init__(
+            "| {business} | {submit_date} | {task} | {manual_time:.1f} |",
+            "| 业务 | 提单时间 | 任务 | 耗时 |\n| --- | --- | --- | ---: |",
+            escape_markdown,
+        )
+
+
+class CsvExporter(Exporter):
+    """CSV 的列与命令行导入相同，带 BOM 便于 Excel 识别中文，导入时同样接受"""
+
+    title = "CSV"
+    suffix = ".csv"
+    encoding = "utf-8-sig"
+
+    def write(self, records, out):
+        writer = csv.writer(out)
+        writer.writerow(RECORD_FIELDS)
+        count = 0
+        for record in records:
+            writer.writerow([record.get(field, "") for field in RECORD_FIELDS])
+            count += 1
+        return count
+
+
+class JsonLinesExporter(Exporter):
+    title = "JSON Lines"
+    suffix = ".jsonl"
+
+    def write(self, records, out):
+        return _write_lines(records, out, lambda record: json.dumps(record_dict(record), ensure_ascii=False))
+
+
+def escape_xml(text):
+    return xml_escape(_XML_ILLEGAL.sub("", text))
+
+
+_XLSX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+</Types>"""
+_XLSX_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+_XLSX_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="工作记录" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+_XLSX_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+</Relationships>"""
+_XLSX_SHEET_HEAD = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>
+"""
+_XLSX_SHEET_TAIL = "</sheetData></worksheet>"
+
+
+def _xlsx_cell(field):
+    if field == "manual_time":
+        return f"<c><v>{{{field}}}</v></c>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{{{field}}}</t></is></c>'
+
+
+class XlsxExporter(Exporter):
+    """Excel 工作簿，不依赖第三方库
+
+    工作表按行模板逐行写入 zip 流（单元格使用内联字符串，无需共享字符串表），
+    不在内存中构建整个工作表。
+    """
+
+    title = "Excel 工作簿"
+    suffix = ".xlsx"
+    binary = True
+    columns = (("business", "业务"), ("submit_date", "提单时间"), ("task", "任务"), ("manual_time", "耗时"))
+
+    def __init__(self):
+        self.render = compile_template(
+            "<row>" + "".join(_xlsx_cell(field) for field, _ in self.columns) + "</row>", escape_xml)
+        self.header = "<row>" + "".join(
+            f'<c t="inlineStr"><is><t>{escape_xml(title)}</t></is></c>' for _, title in self.columns) + "</row>"
+
+    def write(self, records, out):
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as workbook:
+            workbook.writestr("[Content_Types].xml", _XLSX_CONTENT_TYPES)
+            workbook.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+            workbook.writestr("xl/workbook.xml", _XLSX_WORKBOOK)
+            workbook.writestr("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS)
+            with workbook.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as raw:
+                sheet = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+                sheet.write(_XLSX_SHEET_HEAD + self.header + "\n")
+                count = _write_lines(records, sheet, self.render)
+                sheet.write(_XLSX_SHEET_TAIL)
+                sheet.flush()
+                sheet.detach()
+        return count
+
+
+# 导出格式名 -> 导出器类，命令行与界面共用
+EXPORT_FORMATS = {
+    "xiaojing": XiaojingExporter,
+    "csv": CsvExporter,
+    "jsonl": JsonLinesExporter,
+    "markdown": MarkdownExporter,
+    "xlsx": XlsxExporter,
+}
+
+
+def user_templates(settings):
+    """settings.json 中 export_templates 定义的模板，返回 {名称: (行模板, 表头)}
+
+    每项可以是行模板字符串，或 {"template": 行模板, "header": 表头}。
+    """
+    templates = {}
+    for name, value in (settings.get("export_templates") or {}).items():
+        if isinstance(value, dict):
+            templates[name] = (value.get("template", ""), value.get("header", ""))
+        else:
+            templates[name] = (str(value), "")
+    return templates
+
+
+def create_exporter(fmt, matcher=None, template=None, header=""):
+    """按格式名创建导出器；指定 template 时按自定义行模板逐行输出（小鲸格式下替换提单行）"""
+    if fmt == "xiaojing":
+        return XiaojingExporter(matcher, template)
+    if template:
+        return TemplateExporter(template, header)
+    return EXPORT_FORMATS[fmt]()
+
+
+def export_to_file(exporter, records, path):
+    """把记录导出到文件，返回条数"""
+    if exporter.binary:
+        with open(path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+            return exporter.write(records, f)
+    with open(path, "w", encoding=exporter.encoding, newline="", buffering=WRITE_BUFFER_SIZE) as f:
+        return exporter.write(records, f)
@@ -0,0 +1,79 @@
+import os
+import json
+
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_lines(path):
+    """读取非空行，返回元组"""
+    with open(path, "r", encoding="utf-8") as f:
+        return tuple(line.strip() for line in f if line.strip())
+
+
+class DataFileCache:
+    """按路径缓存解析后的数据文件
+
+    文件的 (mtime, size, inode) 未变化时直接返回上次解析的结果，只有文件变化后才重新解析。
+    被文件监视器接管的路径不再逐次 stat，由监视器回调 invalidate 使缓存失效。
+    返回的对象为共享缓存，调用方需要修改时请自行复制。
+    """
+
+    def __init__(self):
+        # path -> (签名, 解析函数, 解析结果)
+        self._entries = {}
+        self._watched = set()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _signature(path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def get(self, path, parser, default=None):
+        entry = self._entries.get(path)
+        if entry is not None and entry[1] is parser and path in self._watched:
+            self.hits += 1
+            return entry[2]
+        try:
+            signature = self._signature(path)
+        except OSError:
+            self._entries.pop(path, None)
+            return default
+        if entry is not None and entry[0] == signature and entry[1] is parser:
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        value = parser(path)
+        self._entries[path] = (signature, parser, value)
+        return value
+
+    def store(self, path, parser, value):
+        """写入文件后直接更新缓存，避免下次读取时重新解析"""
+        try:
+            self._entries[path] = (self._signature(path), parser, value)
+        except OSError:
+            self._entries.pop(path, None)
+
+    def invalidate(self, path=None):
+        if path is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(path, None)
+
+    def set_watched(self, path, watched):
+        """标记路径是否由文件监视器负责通知变化"""
+        if watched:
+            self._watched.add(path)
+        else:
+            self._watched.discard(path)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+# 主窗口与业务管理对话框共用的缓存
+data_file_cache = DataFileCache()
@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+import threading
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+# 等待其他进程释放锁的最长时间（秒）
+DEFAULT_LOCK_TIMEOUT = 10.0
+# 数据目录下的锁文件
+LOCK_FILE_NAME = ".lock"
+
+
+class FileLock:
+    """跨进程的建议锁（POSIX flock / Windows msvcrt.locking）
+
+    同时运行的多个实例在写入数据文件前获取同一把锁，避免交错写入；
+    同一进程内的多个线程通过内部的可重入锁串行，同一线程可以嵌套获取。
+    """
+
+    def __init__(self, path, timeout=DEFAULT_LOCK_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._lock_file()
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            self._unlock_file()
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    def _lock_file(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        f = open(self.path, "a+b")
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if sys.platform == "win32":
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    f.close()
+                    raise TimeoutError(f"等待文件锁超时: {self.path}")
+                time.sleep(0.01)
+        self._file = f
+
+    def _unlock_file(self):
+        f, self._file = self._file, None
+        try:
+            if sys.platform == "win32":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        finally:
+            f.close()
+
+
+# 锁文件路径 -> FileLock，同一进程内共用，保证可重入
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def data_lock(data_dir):
+    """数据目录的写入锁，记录与业务名称等文件的写入都在该锁内进行"""
+    path = os.path.abspath(os.path.join(data_dir, LOCK_FILE_NAME))
+    with _locks_guard:
+        lock = _locks.get(path)
+        if lock is None:
+            lock = _locks[path] = FileLock(path)
+        return lock
+
+
+def file_signature(path):
+    """文件的 (修改时间, 大小)，用于判断是否被其他进程修改，文件不存在时返回 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
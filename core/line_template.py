@@ -0,0 +1,86 @@
+from string import Formatter
+from .record import Record, _MISSING
+
+# 模板中可用的字段及其取值表达式；date 为去掉横线的提单日期 (yyyymmdd)
+FIELD_EXPRESSIONS = {
+    "id": "r.get('id', '')",
+    "business": "r.get('business', '')",
+    "task": "r.get('task', '')",
+    "manual_time": "r.get('manual_time', 0.0)",
+    "submit_date": "r.get('submit_date', '')",
+    "date": "d",
+    "timestamp": "r.get('timestamp', '')",
+}
+# Record 中直接按属性读取的字段，不经过 get()
+RECORD_ATTRIBUTES = {"id", "business", "task", "manual_time"}
+# 需要 format() 转为文字的字段，其余字段本身就是文字
+NUMERIC_FIELDS = {"manual_time"}
+# str.format 的 !r / !s / !a 转换
+CONVERSIONS = {"r": "repr", "s": "str", "a": "ascii"}
+# 编译时用于检查格式说明的示例记录
+_SAMPLE_RECORD = {"id": "0" * 32, "business": "业务", "task": "任务描述", "manual_time": 1.5,
+                  "submit_date": "2024-01-31", "timestamp": "2024-01-31 09:00:00"}
+
+
+class TemplateError(ValueError):
+    """行模板无法编译，消息可直接展示给用户"""
+
+
+def compile_template(template, escape=None):
+    """把 str.format 风格的行模板（如 "{business} {date} {task} {manual_time:.1f}"）编译为函数
+
+    返回的 render(record) 直接拼接各段文字，不再逐条记录解析模板；
+    escape 不为 None 时作用于每个字段格式化后的文字（如 Markdown、XML 转义）。
+    """
+    try:
+        parsed = list(Formatter().parse(template))
+    except ValueError as e:
+        raise TemplateError(f"模板格式错误: {e}")
+    parts = []
+    record_parts = []
+    uses_date = False
+    for literal, field, spec, conversion in parsed:
+        if literal:
+            parts.append(repr(literal))
+            record_parts.append(repr(literal))
+        if field is None:
+            continue
+        if field not in FIELD_EXPRESSIONS:
+            raise TemplateError(f"模板中有未知的字段: {{{field}}}，可用字段: {', '.join(FIELD_EXPRESSIONS)}")
+        if "{" in (spec or ""):
+            raise TemplateError("模板不支持嵌套的格式说明")
+        if conversion and conversion not in CONVERSIONS:
+            raise TemplateError(f"模板中有未知的转换: !{conversion}，可用转换: "
+                                f"{', '.join('!' + name for name in CONVERSIONS)}")
+        uses_date = uses_date or field == "date"
+        expr = FIELD_EXPRESSIONS[field]
+        record_expr = expr
+        if field in RECORD_ATTRIBUTES:
+            default = "0.0" if field in NUMERIC_FIELDS else "''"
+            record_expr = f"(r.{field} if r.{field} is not _MISSING else {default})"
+        for exprs, value in ((parts, expr), (record_parts, record_expr)):
+            if conversion:
+                value = f"{CONVERSIONS[conversion]}({value})"
+            if spec or field in NUMERIC_FIELDS:
+                value = f"format({value}, {spec or ''!r})"
+            if escape is not None:
+                value = f"_escape({value})"
+            exprs.append(value)
+    # Record 与字典各生成一段：Record 直接读属性、取按天缓存的日期文字
+    lines = ["def render(r):", "    if r.__class__ is _Record:"]
+    if uses_date:
+        lines.append("        d = r.compact_date")
+    lines.append(f"        return ''.join(({', '.join(record_parts)}{',' if record_parts else ''}))")
+    if uses_date:
+        # 日期只转换一次
+        lines.append("    d = (r.get('submit_date') or '').replace('-', '')")
+    lines.append(f"    return ''.join(({', '.join(parts)}{',' if parts else ''}))")
+    namespace = {"_escape": escape, "_Record": Record, "_MISSING": _MISSING}
+    exec(compile("\n".join(lines), "<line template>", "exec"), namespace)
+    render = namespace["render"]
+    try:
+        render(_SAMPLE_RECORD)
+        render(Record.from_dict(_SAMPLE_RECORD))
+    except (ValueError, TypeError) as e:
+        raise TemplateError(f"模板格式错误: {e}")
+    return render
@@ -0,0 +1,8 @@
+import os
+
+
+def get_app_data_dir():
+    """获取应用程序数据目录"""
+    # 所有平台统一使用用户主目录的 .bkitsm/data
+    home = os.path.expanduser('~')
+    return os.path.join(home, '.bkitsm', 'data')
@@ -0,0 +1,165 @@
+import functools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 每个操作保留最近多少次耗时用于计算分位数
+ROLLING_WINDOW = 500
+
+
+class OperationStats:
+    """单个操作的耗时统计：总次数、历史最大值与最近 ROLLING_WINDOW 次的耗时（秒）"""
+
+    __slots__ = ("count", "max", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.max = 0.0
+        self.recent = deque(maxlen=ROLLING_WINDOW)
+
+    def add(self, elapsed):
+        self.count += 1
+        if elapsed > self.max:
+            self.max = elapsed
+        self.recent.append(elapsed)
+
+    def summary(self):
+        recent = sorted(self.recent)
+        return {
+            "count": self.count,
+            "p50_ms": round(_percentile(recent, 0.50) * 1000, 3),
+            "p95_ms": round(_percentile(recent, 0.95) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "last_ms": round(self.recent[-1] * 1000, 3) if self.recent else 0.0,
+        }
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    # 取最近秩，样本少时不做插值
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class PerfStats:
+    """热点操作的耗时统计
+
+    用 timed(name) 装饰函数或用 measure(name) 包住代码块；未启用时只多一次属性判断，
+    不计时也不分配对象。统计结果可在诊断面板中查看，或导出为 JSON 附在问题反馈中。
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.operations = {}
+        # 后台写入线程也会记录耗时
+        self._lock = threading.Lock()
+
+    def record(self, name, elapsed):
+        with self._lock:
+            stats = self.operations.get(name)
+            if stats is None:
+                stats = self.operations[name] = OperationStats()
+            stats.add(elapsed)
+
+    def timed(self, name):
+        """装饰器：启用时统计每次调用的耗时"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def measure(self, name):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def summary(self):
+        """{操作名: {count, p50_ms, p95_ms, max_ms, last_ms}}，按操作名排序"""
+        with self._lock:
+            return {name: self.operations[name].summary() for name in sorted(self.operations)}
+
+    def reset(self):
+        with self._lock:
+            self.operations.clear()
+
+    def snapshot(self, extra=None):
+        """问题反馈用的快照：运行环境、进程内存与各操作的耗时统计"""
+        data = {
+            "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "rss_bytes": process_rss(),
+            "operations": self.summary(),
+        }
+        if extra:
+            data.update(extra)
+        return data
+
+    def dump(self, path, extra=None):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(extra), f, ensure_ascii=False, indent=2)
+
+
+def process_rss():
+    """当前进程的常驻内存（字节），无法获取时返回 None"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        if sys.platform.startswith("linux"):
+            with open("/proc/self/statm", "r") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class ProcessMemoryCounters(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            get_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+            get_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if get_memory_info(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return None
+        # macOS 等没有当前值时退回峰值（macOS 单位为字节）
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except (OSError, ValueError, AttributeError, ImportError):
+        return None
+
+
+# 主窗口与后台写入线程共用；main.py 启动界面时启用，命令行与基准测试中默认不统计
+perf_stats = PerfStats()
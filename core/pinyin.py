@@ -0,0 +1,90 @@
+from bisect import bisect_right
+from functools import lru_cache
+
+try:
+    # 可选依赖：安装 pypinyin 后支持完整拼音
+    from pypinyin import lazy_pinyin
+except ImportError:
+    lazy_pinyin = None
+
+# GB2312 一级汉字按拼音排列，以下为各声母首字的区位码，用于推算拼音首字母
+_INITIAL_BOUNDARIES = [
+    45217, 45253, 45761, 46318, 46826, 47010, 47297, 47614, 48119, 49062, 49324, 49896,
+    50371, 50614, 50622, 50906, 51387, 51446, 52218, 52698, 52980, 53689, 54481, 55290,
+]
+_INITIAL_LETTERS = "abcdefghjklmnopqrstwxyz"
+
+
+def is_hanzi(ch):
+    return "\u4e00" <= ch <= "\u9fff"
+
+
+def has_full_pinyin():
+    """是否可以得到完整拼音（需要安装 pypinyin）"""
+    return lazy_pinyin is not None
+
+
+def _gb2312_code(ch):
+    try:
+        encoded = ch.encode("gb2312")
+    except UnicodeEncodeError:
+        return None
+    if len(encoded) != 2:
+        return None
+    return encoded[0] * 256 + encoded[1]
+
+
+@lru_cache(maxsize=None)
+def char_pinyin(ch):
+    """单个汉字的拼音；未安装 pypinyin 时只返回首字母，无法识别时返回 None"""
+    if not is_hanzi(ch):
+        return None
+    if lazy_pinyin is not None:
+        return lazy_pinyin(ch)[0]
+    code = _gb2312_code(ch)
+    if code is None or not _INITIAL_BOUNDARIES[0] <= code < _INITIAL_BOUNDARIES[-1]:
+        return None
+    return _INITIAL_LETTERS[bisect_right(_INITIAL_BOUNDARIES, code) - 1]
+
+
+@lru_cache(maxsize=None)
+def initials(text):
+    """拼音首字母，如 "容器管理平台" -> "rqglpt"，非汉字按小写原样保留"""
+    parts = []
+    for ch in text:
+        pinyin = char_pinyin(ch)
+        parts.append(pinyin[0] if pinyin else ch.lower())
+    return "".join(parts)
+
+
+@lru_cache(maxsize=None)
+def full_pinyin(text):
+    """完整拼音，如 "蓝盾" -> "landun"；未安装 pypinyin 时返回 None"""
+    if lazy_pinyin is None:
+        return None
+    return "".join(char_pinyin(ch) or ch.lower() for ch in text)
+
+
+def _char_key(ch):
+    # (类别, 主键, 次键)：数字在前，字母与汉字按拼音交错排列，其余字符在后
+    if ch.isdigit():
+        return (0, ch, "")
+    if ch.isascii() and ch.isalpha():
+        return (1, ch.lower(), ch)
+    pinyin = char_pinyin(ch)
+    if pinyin is not None:
+        # 同音字按 GB2312 编码区分，排在同名字母之后
+        code = _gb2312_code(ch)
+        return (1, pinyin, "\uffff" + (f"{code:05d}" if code else ch))
+    return (2, ch, "")
+
+
+_collation_keys = {}
+
+
+def collation_key(text):
+    """按拼音排序的比较键，每个不同字符串只计算一次"""
+    key = _collation_keys.get(text)
+    if key is None:
+        key = _collation_keys[text] = tuple(_char_key(ch) for ch in text)
+    return key
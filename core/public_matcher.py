@@ -0,0 +1,148 @@
+import os
+from collections import deque
+from .file_cache import read_lines
+
+# public.ini 不存在时创建的默认内容
+DEFAULT_PUBLIC_INI = """BKChat
+全面运维质量评估
+HomePage
+货币化
+PowerAPP
+CDN防盗刷
+TGSRE门户
+发海魔北的质量管理
+蓝鲸社区
+员工培训
+招聘
+SreData
+海外测速
+业务交接专项
+项目管理
+子公司效率提升
+ASKR
+故障应急体系
+实时充值流水对账
+海外Gcloud平台组件风险消除
+用户管理
+权限中心
+配置平台
+作业平台
+PaaS3.0
+APIGateway
+标准运维
+流程服务
+节点管理
+监控平台
+日志平台
+容器管理平台
+蓝盾
+DBM
+审计中心
+BSCP
+图表平台
+BKBase
+海垒
+BKFlow
+业务受理
+BKSec
+BKSAM
+WeTerm
+CodeCC
+自动化建设
+安全产品
+运营产品
+通用测试
+二方技术服务
+能力发展​
+学习探索
+混沌工程
+ITSM规范化项目
+TGPA
+部门年会筹备
+724运维大会筹备
+中心年会筹备
+微享项目
+SRE商店
+研发流程数字化
+云研发P4
+Avatar测试环境管理
+岗位智能体
+运维操作看板
+云研发软件安装
+云研发自动化助手
+SRE研发服务
+团队例会"""
+
+
+class PublicBusinessMatcher:
+    """公共业务匹配器
+
+    由 public.ini 中的业务名称构建 Aho-Corasick 自动机，业务名称中包含任一
+    公共业务名称即视为公共业务（与逐个子串判断的结果一致），一次扫描即可得出结论；
+    同一业务名称的判断结果会被缓存。
+    """
+
+    def __init__(self, patterns):
+        self.patterns = tuple(p for p in patterns if p)
+        # 每个状态的转移表、失败指针及是否命中任一模式
+        self._goto = [{}]
+        self._fail = [0]
+        self._hit = [False]
+        self._cache = {}
+        for pattern in self.patterns:
+            self._insert(pattern)
+        self._build_fail_links()
+
+    def _insert(self, pattern):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._hit.append(False)
+            state = nxt
+        self._hit[state] = True
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # 后缀命中模式时当前状态同样命中，例如 "蓝盾" 之于 "xx蓝盾"
+                self._hit[nxt] = self._hit[nxt] or self._hit[self._fail[nxt]]
+
+    def _scan(self, text):
+        goto, fail, hit = self._goto, self._fail, self._hit
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if hit[state]:
+                return True
+        return False
+
+    def is_public(self, business_name):
+        """业务名称中包含任一公共业务名称时返回 True"""
+        result = self._cache.get(business_name)
+        if result is None:
+            result = self._scan(business_name)
+            self._cache[business_name] = result
+        return result
+
+
+def read_public_businesses(data_dir):
+    """读取 public.ini 中的公共业务名称，文件不存在时使用默认列表"""
+    public_file = os.path.join(data_dir, "public.ini")
+    if os.path.exists(public_file):
+        return read_lines(public_file)
+    return tuple(line.strip() for line in DEFAULT_PUBLIC_INI.splitlines() if line.strip())
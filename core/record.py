@@ -0,0 +1,300 @@
+import sys
+from collections.abc import MutableMapping
+from datetime import date
+
+# 1970-01-01 的日期序数，时间戳按不带时区的本地时间换算为秒数
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_SECONDS_PER_DAY = 86400
+
+# 提单日期文字 (yyyy-MM-dd) -> 日期序数，同一天的记录共用同一个整数对象
+_ordinals = {}
+# 日期序数 -> yyyy-MM-dd / yyyymmdd，显示时按需生成并缓存，所有记录共用
+_date_texts = {}
+_compact_dates = {}
+# 时刻文字 (HH:MM:SS) <-> 当天的秒数，各最多 86400 项
+_clock_seconds = {}
+_clock_texts = {}
+
+
+def date_ordinal(text):
+    """规范的 yyyy-MM-dd 转为日期序数，其他内容返回 None"""
+    if text.__class__ is not str:
+        return None
+    ordinal = _ordinals.get(text)
+    if ordinal is None and len(text) == 10 and text[4] == text[7] == "-":
+        try:
+            day = date(int(text[:4]), int(text[5:7]), int(text[8:]))
+        except ValueError:
+            return None
+        # 只接受格式化后与原文完全相同的写法，保证写回 JSON 时内容不变
+        if day.isoformat() == text:
+            ordinal = _ordinals[text] = day.toordinal()
+    return ordinal
+
+
+def date_text(ordinal):
+    text = _date_texts.get(ordinal)
+    if text is None:
+        text = _date_texts[ordinal] = date.fromordinal(ordinal).isoformat()
+    return text
+
+
+def compact_date_text(ordinal):
+    """yyyymmdd，表格与提单行中显示的日期"""
+    text = _compact_dates.get(ordinal)
+    if text is None:
+        text = _compact_dates[ordinal] = date_text(ordinal).replace("-", "")
+    return text
+
+
+def timestamp_seconds(text):
+    """规范的 yyyy-MM-dd HH:MM:SS 转为自 1970-01-01 起的秒数，其他内容返回 None"""
+    if text.__class__ is not str or len(text) != 19 or text[10] != " ":
+        return None
+    day = text[:10]
+    ordinal = _ordinals.get(day) or date_ordinal(day)
+    if ordinal is None:
+        return None
+    clock = text[11:]
+    seconds = _clock_seconds.get(clock)
+    if seconds is None:
+        parts = clock[:2], clock[3:5], clock[6:]
+        if clock[2] != ":" or clock[5] != ":" or not all(part.isdigit() for part in parts):
+            return None
+        hours, minutes, seconds = map(int, parts)
+        if hours > 23 or minutes > 59 or seconds > 59:
+            return None
+        seconds = _clock_seconds[clock] = hours * 3600 + minutes * 60 + seconds
+    return (ordinal - _EPOCH_ORDINAL) * _SECONDS_PER_DAY + seconds
+
+
+def timestamp_text(seconds):
+    days, seconds = divmod(seconds, _SECONDS_PER_DAY)
+    clock = _clock_texts.get(seconds)
+    if clock is None:
+        minutes, second = divmod(seconds, 60)
+        clock = _clock_texts[seconds] = f"{minutes // 60:02d}:{minutes % 60:02d}:{second:02d}"
+    return date_text(days + _EPOCH_ORDINAL) + " " + clock
+
+
+# 没有该字段时的占位值，与 None 区分
+_MISSING = object()
+
+
+class Record(MutableMapping):
+    """内存中的一条工作记录
+
+    用 __slots__ 保存字段，不为每条记录创建字典；业务名称驻留为同一个字符串对象，
+    提单日期保存为日期序数、时间戳保存为秒数，读取 submit_date / timestamp 时再格式化
+    （日期文字按天缓存，所有记录共用）。不规范的日期、时间戳按原文保存，其他字段放在 _extra 中，
+    与字典一样按键读写，dict(record) 得到的内容与原来的 JSON 记录完全相同。
+    字段顺序与通常的顺序（_GETTERS，其他字段在后）不同时（如迁移时在末尾补充 id 的老记录），
+    在 _order 中保存原来的顺序（相同的顺序共用一个元组），写回文件时保持不变。
+    """
+
+    __slots__ = ("id", "business", "task", "manual_time", "_day", "_stamp", "_extra", "_order")
+
+    def __init__(self, fields=()):
+        self.id = _MISSING
+        self.business = _MISSING
+        self.task = _MISSING
+        self.manual_time = _MISSING
+        self._day = _MISSING
+        self._stamp = _MISSING
+        self._extra = None
+        self._order = None
+        for key, value in (fields.items() if hasattr(fields, "items") else fields):
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, record):
+        """字典转为 Record，已是 Record 时原样返回"""
+        if record.__class__ is cls:
+            return record
+        if record.__class__ is not dict:
+            return cls(record)
+        # 加载时每条记录都要转换，直接按字段赋值，不逐键分派
+        self = cls.__new__(cls)
+        get = record.get
+        self.id = get("id", _MISSING)
+        business = get("business", _MISSING)
+        self.business = sys.intern(business) if business.__class__ is str else business
+        self.task = get("task", _MISSING)
+        self.manual_time = get("manual_time", _MISSING)
+        day = get("submit_date", _MISSING)
+        ordinal = _ordinals.get(day) if day.__class__ is str else None
+        if ordinal is None and day is not _MISSING:
+            ordinal = date_ordinal(day)
+        self._day = day if ordinal is None else ordinal
+        stamp = get("timestamp", _MISSING)
+        seconds = timestamp_seconds(stamp) if stamp.__class__ is str else None
+        self._stamp = stamp if seconds is None else seconds
+        self._extra = None
+        # 已知字段的个数与字典的键数相同时没有额外的字段（通常正好是六个字段）
+        known = len(_GETTERS) - ((self.id is _MISSING) + (business is _MISSING) + (self.task is _MISSING)
+                                 + (self.manual_time is _MISSING) + (day is _MISSING) + (stamp is _MISSING))
+        if len(record) != known:
+            self._extra = {key: value for key, value in record.items() if key not in _GETTERS}
+        self._order = _key_order(tuple(record))
+        return self
+
+    # ---- 日期与时间戳 ----
+    @property
+    def day(self):
+        """提单日期序数，没有或不规范时返回 None"""
+        day = self._day
+        return day if day.__class__ is int else None
+
+    @property
+    def submit_date(self):
+        day = self._day
+        if day.__class__ is int:
+            return date_text(day)
+        return None if day is _MISSING else day
+
+    @property
+    def compact_date(self):
+        """yyyymmdd，没有提单日期时为空字符串"""
+        day = self._day
+        if day.__class__ is int:
+            return compact_date_text(day)
+        return "" if day is _MISSING or not day else str(day).replace("-", "")
+
+    @property
+    def timestamp(self):
+        stamp = self._stamp
+        if stamp.__class__ is int:
+            return timestamp_text(stamp)
+        return None if stamp is _MISSING else stamp
+
+    # ---- 按键读写，与记录字典兼容 ----
+    def __getitem__(self, key):
+        getter = _GETTERS.get(key)
+        value = getter(self) if getter is not None else (self._extra or {}).get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        getter = _GETTERS.get(key)
+        if getter is None:
+            return (self._extra or {}).get(key, default)
+        value = getter(self)
+        return default if value is _MISSING else value
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            # 与字典一样，新增的字段排在最后
+            self._order = _key_order(tuple(self.to_dict()) + (key,))
+        if key == "business":
+            self.business = sys.intern(value) if value.__class__ is str else value
+        elif key == "submit_date":
+            ordinal = date_ordinal(value)
+            self._day = value if ordinal is None else ordinal
+        elif key == "timestamp":
+            seconds = timestamp_seconds(value)
+            self._stamp = value if seconds is None else seconds
+        elif key in _GETTERS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if key in _SLOTS:
+            setattr(self, _SLOTS[key], _MISSING)
+        else:
+            del self._extra[key]
+        if self._order is not None:
+            self._order = _key_order(tuple(name for name in self._order if name != key))
+
+    def __contains__(self, key):
+        getter = _GETTERS.get(key)
+        if getter is None:
+            return bool(self._extra) and key in self._extra
+        return getter(self) is not _MISSING
+
+    def to_dict(self):
+        """与原来的 JSON 记录相同的字典（字段顺序也相同）"""
+        if self._order is not None:
+            get = self.get
+            return {key: get(key) for key in self._order}
+        result = {}
+        if self.id is not _MISSING:
+            result["id"] = self.id
+        if self.business is not _MISSING:
+            result["business"] = self.business
+        if self.task is not _MISSING:
+            result["task"] = self.task
+        if self.manual_time is not _MISSING:
+            result["manual_time"] = self.manual_time
+        day = self._day
+        if day is not _MISSING:
+            result["submit_date"] = date_text(day) if day.__class__ is int else day
+        stamp = self._stamp
+        if stamp is not _MISSING:
+            result["timestamp"] = timestamp_text(stamp) if stamp.__class__ is int else stamp
+        if self._extra:
+            result.update(self._extra)
+        return result
+
+    # 遍历时先生成一次字典，不逐键判断是否存在
+    def __iter__(self):
+        return iter(self.to_dict())
+
+    def __len__(self):
+        return len(self.to_dict())
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def values(self):
+        return self.to_dict().values()
+
+    def copy(self):
+        return Record(self.items())
+
+    def __repr__(self):
+        return f"Record({self.to_dict()!r})"
+
+
+def record_dict(record):
+    """记录的字典副本（写入文件前使用），Record 直接生成字典"""
+    return record.to_dict() if record.__class__ is Record else dict(record)
+
+
+# 各字段的读取方式，顺序即 JSON 中的字段顺序
+_GETTERS = {
+    "id": lambda r: r.id,
+    "business": lambda r: r.business,
+    "task": lambda r: r.task,
+    "manual_time": lambda r: r.manual_time,
+    "submit_date": lambda r: date_text(r._day) if r._day.__class__ is int else r._day,
+    "timestamp": lambda r: timestamp_text(r._stamp) if r._stamp.__class__ is int else r._stamp,
+}
+# 字段顺序元组 -> 与通常顺序相同时为 None，否则为共用的元组
+_orders = {}
+
+
+def _key_order(keys):
+    """记录的字段顺序：通常的顺序返回 None，其他顺序返回共用的元组"""
+    try:
+        return _orders[keys]
+    except KeyError:
+        pass
+    known = [key for key in keys if key in _GETTERS]
+    standard = (tuple(known) == keys[:len(known)]
+                and known == sorted(known, key=list(_GETTERS).index))
+    order = _orders[keys] = None if standard else keys
+    return order
+
+
+# 字段 -> 保存该字段的槽位
+_SLOTS = {"id": "id", "business": "business", "task": "task", "manual_time": "manual_time",
+          "submit_date": "_day", "timestamp": "_stamp"}
@@ -0,0 +1,116 @@
+from bisect import bisect_left, bisect_right, insort
+
+# 比所有 id 都大的哨兵，用于日期区间的右边界
+_MAX_ID = "\U0010ffff"
+
+
+class RecordFilter:
+    """记录筛选条件：提单日期区间、业务名称、公共/普通业务"""
+
+    KIND_ALL = "all"
+    KIND_PUBLIC = "public"
+    KIND_NORMAL = "normal"
+
+    def __init__(self, start_date=None, end_date=None, business=None, kind=KIND_ALL, matcher=None):
+        # 日期格式 yyyy-MM-dd，None 表示不限
+        self.start_date = start_date or None
+        self.end_date = end_date or None
+        self.business = business or None
+        self.kind = kind
+        # 按公共/普通筛选时使用的 PublicBusinessMatcher
+        self.matcher = matcher
+
+    def is_empty(self):
+        return (self.start_date is None and self.end_date is None
+                and self.business is None and self.kind == self.KIND_ALL)
+
+    def has_date_range(self):
+        return self.start_date is not None or self.end_date is not None
+
+    def matches_business(self, business):
+        if self.business is not None and business != self.business:
+            return False
+        if self.kind == self.KIND_ALL:
+            return True
+        return self.matcher.is_public(business) == (self.kind == self.KIND_PUBLIC)
+
+    def matches_date(self, submit_date):
+        if self.start_date is not None and submit_date < self.start_date:
+            return False
+        if self.end_date is not None and submit_date > self.end_date:
+            return False
+        return True
+
+    def matches_key(self, submit_date, business):
+        return self.matches_date(submit_date) and self.matches_business(business)
+
+    def matches(self, record):
+        return self.matches_key(record.get("submit_date", ""), record.get("business", ""))
+
+
+class RecordIndex:
+    """记录的二级索引
+
+    按 (submit_date, id) 排序的列表用于 bisect 查询日期区间，
+    业务 → id 集合的倒排索引用于按业务筛选；两者都随记录增删改增量维护。
+    """
+
+    def __init__(self, records=()):
+        self.rebuild(records)
+
+    def rebuild(self, records):
+        self._dates = sorted((r.get("submit_date", ""), r["id"]) for r in records)
+        self._by_business = {}
+        for record in records:
+            self._by_business.setdefault(record.get("business", ""), set()).add(record["id"])
+
+    def add(self, record):
+        insort(self._dates, (record.get("submit_date", ""), record["id"]))
+        self._by_business.setdefault(record.get("business", ""), set()).add(record["id"])
+
+    def remove(self, record):
+        key = (record.get("submit_date", ""), record["id"])
+        pos = bisect_left(self._dates, key)
+        if pos < len(self._dates) and self._dates[pos] == key:
+            del self._dates[pos]
+        business = record.get("business", "")
+        ids = self._by_business.get(business)
+        if ids is not None:
+            ids.discard(record["id"])
+            if not ids:
+                del self._by_business[business]
+
+    def _range_bounds(self, start_date, end_date):
+        lo = bisect_left(self._dates, (start_date, "")) if start_date else 0
+        hi = bisect_right(self._dates, (end_date, _MAX_ID)) if end_date else len(self._dates)
+        return lo, hi
+
+    def ids_in_range(self, start_date=None, end_date=None):
+        """提单日期在 [start_date, end_date] 内的记录 id，O(log n + k)"""
+        lo, hi = self._range_bounds(start_date, end_date)
+        return [record_id for _, record_id in self._dates[lo:hi]]
+
+    def ids_for_business(self, business):
+        return self._by_business.get(business, set())
+
+    def businesses(self):
+        return self._by_business.keys()
+
+    def candidate_ids(self, record_filter):
+        """返回可能满足条件的 id 集合，调用方仍需逐条用 matches 复核"""
+        if record_filter.has_date_range():
+            lo, hi = self._range_bounds(record_filter.start_date, record_filter.end_date)
+            # 同时指定业务时取两个索引中较小的候选集
+            if record_filter.business is not None:
+                business_ids = self.ids_for_business(record_filter.business)
+                if len(business_ids) < hi - lo:
+                    return business_ids
+            return [record_id for _, record_id in self._dates[lo:hi]]
+        if record_filter.business is not None:
+            return self.ids_for_business(record_filter.business)
+        # 只按公共/普通筛选：先按业务名分类，再合并对应的 id
+        ids = []
+        for business, business_ids in self._by_business.items():
+            if record_filter.matches_business(business):
+                ids.extend(business_ids)
+        return ids
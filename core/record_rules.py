@@ -0,0 +1,62 @@
+from datetime import date, datetime
+from .record_store import new_record_id
+
+# 任务描述的最少字数
+MIN_TASK_LENGTH = 10
+
+# 记录中的字段，导入导出时按此顺序
+RECORD_FIELDS = ("id", "business", "task", "manual_time", "submit_date", "timestamp")
+
+
+class RecordValidationError(ValueError):
+    """记录字段校验失败，消息可直接展示给用户"""
+
+
+def check_task(task):
+    if len(task) < MIN_TASK_LENGTH:
+        raise RecordValidationError(f"任务描述至少需要{MIN_TASK_LENGTH}个字符")
+    return task
+
+
+def parse_manual_time(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise RecordValidationError("耗时必须是数字")
+
+
+def normalize_submit_date(value):
+    """提单日期统一为 yyyy-MM-dd，兼容 yyyyMMdd"""
+    value = str(value).strip()
+    # 直接拆分年月日，比 strptime 快得多，批量导入时每行都要调用
+    if len(value) == 10 and value[4] == value[7] == "-":
+        parts = (value[:4], value[5:7], value[8:])
+    elif len(value) == 8:
+        parts = (value[:4], value[4:6], value[6:])
+    else:
+        parts = ()
+    if parts and all(part.isdigit() for part in parts):
+        try:
+            return date(*map(int, parts)).isoformat()
+        except ValueError:
+            pass
+    raise RecordValidationError("提单时间格式应为 yyyy-MM-dd")
+
+
+def build_record(business, task, manual_time, submit_date, timestamp=None):
+    """按添加记录的规则校验字段并生成新记录，校验失败时抛出 RecordValidationError"""
+    business = str(business or "").strip()
+    task = str(task or "").strip()
+    manual_time = str(manual_time if manual_time is not None else "").strip()
+    submit_date = str(submit_date or "").strip()
+    if not all([business, task, manual_time, submit_date]):
+        raise RecordValidationError("请填写所有字段")
+    check_task(task)
+    return {
+        "id": new_record_id(),
+        "business": business,
+        "task": task,
+        "manual_time": parse_manual_time(manual_time),
+        "submit_date": normalize_submit_date(submit_date),
+        "timestamp": timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
@@ -0,0 +1,229 @@
+import uuid
+from .aggregates import RecordAggregates
+from .record import Record
+from .record_index import RecordIndex
+
+
+def new_record_id():
+    """生成记录的唯一 id"""
+    return uuid.uuid4().hex
+
+
+class _FenwickTree:
+    """树状数组，统计每个槽位是否存活，用于 位置 ↔ 槽位 的 O(log n) 换算"""
+
+    def __init__(self, flags=()):
+        # O(n) 建树：每个节点把自身累加到父节点
+        self._tree = [0] + list(flags)
+        size = len(self._tree)
+        for i in range(1, size):
+            parent = i + (i & -i)
+            if parent < size:
+                self._tree[parent] += self._tree[i]
+
+    def __len__(self):
+        return len(self._tree) - 1
+
+    def append(self, value):
+        # 新节点 i 覆盖区间 (i - lowbit(i), i]，由已有前缀和推出
+        i = len(self._tree)
+        self._tree.append(value + self.prefix_sum(i - 1) - self.prefix_sum(i - (i & -i)))
+
+    def add(self, slot, delta):
+        i = slot + 1
+        size = len(self._tree)
+        while i < size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, count):
+        """前 count 个槽位之和"""
+        total = 0
+        i = count
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, k):
+        """返回第 k 个（从 0 开始）存活槽位的下标"""
+        pos = 0
+        remaining = k + 1
+        size = len(self._tree) - 1
+        step = 1 << size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= size and self._tree[nxt] < remaining:
+                pos = nxt
+                remaining -= self._tree[nxt]
+            step >>= 1
+        return pos
+
+
+class RecordStore:
+    """内存中的记录集合
+
+    按添加顺序保存记录，并维护 id → 槽位 索引：按 id 查找为 O(1)，
+    删除只留下空槽并在树状数组中扣减，位置与 id 互查为 O(log n)；
+    空槽过多时整体压缩一次。所有修改同步更新 aggregates 中的汇总数据
+    和 index 中的日期、业务索引。传入的记录字典在加入时转为紧凑的 Record 保存。
+    """
+
+    def __init__(self, records=()):
+        self.replace_all(records)
+
+    def replace_all(self, records):
+        self._slots = []
+        self._positions = {}
+        for record in records:
+            record = Record.from_dict(record)
+            # 缺失或重复的 id 重新分配，保证索引一一对应
+            if not record.get("id") or record["id"] in self._positions:
+                record["id"] = new_record_id()
+            self._positions[record["id"]] = len(self._slots)
+            self._slots.append(record)
+        self._tree = _FenwickTree([1] * len(self._slots))
+        self._live = len(self._slots)
+        self.aggregates = RecordAggregates(self._slots)
+        self.index = RecordIndex(self._slots)
+
+    # ---- 只读访问 ----
+    def __len__(self):
+        return self._live
+
+    def __bool__(self):
+        return self._live > 0
+
+    def __iter__(self):
+        return (record for record in self._slots if record is not None)
+
+    def __reversed__(self):
+        return (record for record in reversed(self._slots) if record is not None)
+
+    def __contains__(self, record_id):
+        return record_id in self._positions
+
+    def get(self, record_id):
+        slot = self._positions.get(record_id)
+        return None if slot is None else self._slots[slot]
+
+    def at(self, index):
+        """按添加顺序取第 index 条记录"""
+        if not 0 <= index < self._live:
+            raise IndexError(index)
+        return self._slots[self._tree.find(index)]
+
+    def index_of(self, record_id):
+        """返回记录在添加顺序中的位置，不存在时返回 -1"""
+        slot = self._positions.get(record_id)
+        if slot is None:
+            return -1
+        return self._tree.prefix_sum(slot)
+
+    def to_list(self):
+        return list(self)
+
+    def query(self, record_filter):
+        """按筛选条件返回记录，保持添加顺序；借助索引只检查候选记录"""
+        if record_filter.is_empty():
+            return self.to_list()
+        records = (self._slots[self._positions[i]] for i in self.index.candidate_ids(record_filter))
+        matched = [r for r in records if record_filter.matches(r)]
+        # 槽位顺序即添加顺序
+        matched.sort(key=lambda r: self._positions[r["id"]])
+        return matched
+
+    # ---- 修改 ----
+    def append(self, record):
+        """追加记录，字典转为 Record 保存，返回其位置"""
+        record = Record.from_dict(record)
+        if not record.get("id"):
+            record["id"] = new_record_id()
+        if record["id"] in self._positions:
+            raise ValueError(f"记录 id 重复: {record['id']}")
+        self._positions[record["id"]] = len(self._slots)
+        self._slots.append(record)
+        self._tree.append(1)
+        self._live += 1
+        self.aggregates.add(record)
+        self.index.add(record)
+        return self._live - 1
+
+    def insert(self, index, record):
+        """插入到添加顺序的第 index 个位置（撤销删除时恢复原位置），返回实际位置"""
+        if index >= self._live:
+            return self.append(record)
+        record = Record.from_dict(record)
+        if not record.get("id"):
+            record["id"] = new_record_id()
+        if record["id"] in self._positions:
+            raise ValueError(f"记录 id 重复: {record['id']}")
+        index = max(0, index)
+        slot = self._free_slot(index)
+        if slot is not None:
+            # 前后两条记录之间有空槽（通常正是删除时留下的）时直接放回，无需移动其他记录
+            self._positions[record["id"]] = slot
+            self._slots[slot] = record
+            self._tree.add(slot, 1)
+            self._live += 1
+            self.aggregates.add(record)
+            self.index.add(record)
+        else:
+            records = self.to_list()
+            records.insert(index, record)
+            self.replace_all(records)
+        return index
+
+    def _free_slot(self, index):
+        """第 index - 1 与第 index 条记录之间最靠前的空槽，没有时返回 None
+
+        取最靠前的一个，连续删除的几条记录按位置升序放回时依次占用同一段空槽。
+        """
+        slot = self._tree.find(index)
+        previous = self._tree.find(index - 1) if index > 0 else -1
+        return previous + 1 if slot - previous > 1 else None
+
+    def can_insert_in_place(self, index):
+        """插入到第 index 个位置是否无需重建（追加到末尾或有空槽可以放回）"""
+        return index >= self._live or self._free_slot(max(0, index)) is not None
+
+    def insert_many(self, items):
+        """把 [(位置, 记录)]（按位置升序）按位置归并到现有记录中，整体重建一次"""
+        existing = iter(self.to_list())
+        merged = []
+        for index, record in items:
+            while len(merged) < index:
+                current = next(existing, None)
+                if current is None:
+                    break
+                merged.append(current)
+            merged.append(record)
+        merged.extend(existing)
+        self.replace_all(merged)
+
+    def update(self, record_id, fields):
+        record = self.get(record_id)
+        if record is None:
+            raise KeyError(record_id)
+        self.aggregates.remove(record)
+        self.index.remove(record)
+        record.update(fields)
+        self.aggregates.add(record)
+        self.index.add(record)
+        return record
+
+    def remove(self, record_id):
+        """删除记录，返回被删除的记录"""
+        slot = self._positions.pop(record_id)
+        record = self._slots[slot]
+        self._slots[slot] = None
+        self._tree.add(slot, -1)
+        self._live -= 1
+        self.aggregates.remove(record)
+        self.index.remove(record)
+        if len(self._slots) - self._live > max(64, self._live):
+            self.replace_all(self.to_list())
+        return record
+
+    def clear(self):
+        self.replace_all([])
@@ -0,0 +1,119 @@
+import io
+import shutil
+import tempfile
+from .line_template import compile_template
+from .record_rules import RecordValidationError, build_record
+
+# 小鲸提单文本的标题行
+PUBLIC_TITLE = "小鲸 公共记录单"
+BATCH_TITLE = "小鲸 批量创建记录单"
+# 写出文本时每次合并写出的行数
+WRITE_CHUNK_LINES = 1000
+# 公共记录在内存中缓冲的上限，超过后写入临时文件
+SPOOL_SIZE = 4 * 1024 * 1024
+
+
+# 提单行：业务 yyyymmdd 任务 耗时
+XIAOJING_LINE_TEMPLATE = "{business} {date} {task} {manual_time:.1f}"
+
+format_record_line = compile_template(XIAOJING_LINE_TEMPLATE)
+format_record_line.__doc__ = "单条记录的提单行：业务 yyyymmdd 任务 耗时"
+
+
+def split_public_records(records, matcher):
+    """按添加顺序倒序（最新的在前）分为 (普通记录, 公共记录)"""
+    public_records = []
+    normal_records = []
+    for record in reversed(records):
+        # 检查是否为公共业务（自动机一次扫描，同名业务结果缓存）
+        if matcher.is_public(record.get("business", "")):
+            public_records.append(record)
+        else:
+            normal_records.append(record)
+    return normal_records, public_records
+
+
+def write_record_text(records, out, matcher, render=format_record_line):
+    """把记录逐行写入 out：先批量创建记录单，再公共记录单，records 按输出顺序（最新的在前）给出
+
+    每 WRITE_CHUNK_LINES 行写出一次，普通记录直接写到 out，公共记录先写入临时缓冲
+    （超过 SPOOL_SIZE 时落盘），全程不拼接整段文本；返回写出的记录条数。
+    """
+    count = 0
+    has_normal = False
+    normal_chunk = []
+    public_chunk = []
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE, mode="w+", encoding="utf-8") as public_lines:
+        for record in records:
+            count += 1
+            # 检查是否为公共业务（自动机一次扫描，同名业务结果缓存）
+            if matcher.is_public(record.get("business", "")):
+                public_chunk.append(render(record))
+                if len(public_chunk) >= WRITE_CHUNK_LINES:
+                    public_lines.write("\n".join(public_chunk) + "\n")
+                    public_chunk.clear()
+                continue
+            if not has_normal:
+                out.write(BATCH_TITLE + "\n")
+                has_normal = True
+            normal_chunk.append(render(record))
+            if len(normal_chunk) >= WRITE_CHUNK_LINES:
+                out.write("\n".join(normal_chunk) + "\n")
+                normal_chunk.clear()
+        if normal_chunk:
+            out.write("\n".join(normal_chunk) + "\n")
+        if public_chunk or public_lines.tell():
+            if has_normal:
+                out.write("\n")
+            out.write(PUBLIC_TITLE + "\n")
+            public_lines.seek(0)
+            shutil.copyfileobj(public_lines, out)
+            if public_chunk:
+                out.write("\n".join(public_chunk) + "\n")
+    return count
+
+
+def generate_record_text(records, matcher):
+    """生成批量创建记录单与公共记录单文本，没有记录时返回空字符串"""
+    buffer = io.StringIO()
+    write_record_text(reversed(records), buffer, matcher)
+    return buffer.getvalue().strip()
+
+
+def _looks_like_date(token):
+    if len(token) == 8:
+        return token.isdigit()
+    return len(token) == 10 and token[4] == token[7] == "-" and token.replace("-", "").isdigit()
+
+
+def parse_record_line(line):
+    """拆分一行提单文本（业务 yyyymmdd 任务 耗时），返回四个字段的字符串
+
+    字段之间为制表符时按制表符拆分；否则按空白拆分，业务名称与任务描述中可以有空格：
+    第一个日期形式的词之前为业务名称，最后一个词为耗时，其余为任务描述。
+    """
+    if "\t" in line:
+        fields = [field.strip() for field in line.strip().split("\t")]
+        if len(fields) == 4:
+            return tuple(fields)
+    else:
+        tokens = line.split()
+        for i in range(1, len(tokens) - 2):
+            if _looks_like_date(tokens[i]):
+                return " ".join(tokens[:i]), tokens[i], " ".join(tokens[i + 1:-1]), tokens[-1]
+    raise RecordValidationError("格式应为: 业务 yyyymmdd 任务 耗时")
+
+
+def parse_record_lines(text, timestamp=None):
+    """一次解析多行提单文本，返回 (记录列表, [(行号, 错误信息)])，空行与标题行跳过"""
+    records = []
+    errors = []
+    for line_no, line in enumerate(text.splitlines(), 1):
+        if not line.strip() or line.strip() in (BATCH_TITLE, PUBLIC_TITLE):
+            continue
+        try:
+            business, submit_date, task, manual_time = parse_record_line(line)
+            records.append(build_record(business, task, manual_time, submit_date, timestamp))
+        except RecordValidationError as e:
+            errors.append((line_no, str(e)))
+    return records, errors
@@ -0,0 +1,336 @@
+import heapq
+from array import array
+from datetime import date, timedelta
+
+try:
+    # 可选依赖：安装 numpy 后分组汇总使用 bincount 向量化计算，否则逐条累加
+    import numpy
+except ImportError:
+    numpy = None
+
+# 汇总周期
+PERIOD_WEEK = "week"
+PERIOD_MONTH = "month"
+PERIOD_TITLES = {PERIOD_WEEK: "按周", PERIOD_MONTH: "按月"}
+# 每个工作日的标准工时，可在 settings.json 中用 workday_hours 修改
+DEFAULT_WORKDAY_HOURS = 8.0
+# 任务排行默认列出的条数
+DEFAULT_TOP_TASKS = 10
+
+
+def _week_start(ordinal):
+    """日期序数所在周的周一；序数 1 (0001-01-01) 是周一"""
+    return ordinal - (ordinal - 1) % 7
+
+
+class RecordColumns:
+    """按列保存的记录：提单日期序数、月份编号与耗时为定长数组，业务与任务为整数编码
+
+    业务名称、任务描述各自去重后只保存一份（codes 为下标），
+    公共业务按 matcher 对每个业务名称只判断一次。
+    """
+
+    def __init__(self, records=(), matcher=None):
+        self.matcher = matcher
+        self.days = array("i")
+        # 月份编号：年 * 12 + 月 - 1
+        self.months = array("i")
+        self.businesses = array("i")
+        self.tasks = array("i")
+        self.hours = array("d")
+        self.business_names = []
+        self.task_names = []
+        # 与 business_names 对应的公共业务标记
+        self.public_flags = []
+        # 提单日期缺失或无法解析而未计入的记录条数
+        self.skipped = 0
+        self._business_codes = {}
+        self._task_codes = {}
+        self._date_cache = {}
+        self.extend(records)
+
+    def __len__(self):
+        return len(self.hours)
+
+    def _business_code(self, name):
+        code = self._business_codes.get(name)
+        if code is None:
+            code = self._business_codes[name] = len(self.business_names)
+            self.business_names.append(name)
+            self.public_flags.append(bool(self.matcher and self.matcher.is_public(name)))
+        return code
+
+    def _task_code(self, task):
+        code = self._task_codes.get(task)
+        if code is None:
+            code = self._task_codes[task] = len(self.task_names)
+            self.task_names.append(task)
+        return code
+
+    def _parse_date(self, value):
+        try:
+            day = date(int(value[:4]), int(value[5:7]), int(value[8:10]))
+        except (TypeError, ValueError):
+            return None
+        return day.toordinal(), day.year * 12 + day.month - 1
+
+    def extend(self, records):
+        """追加记录，records 可以是任意可迭代对象（如按月分区逐条读取的生成器）"""
+        date_cache = self._date_cache
+        business_codes = self._business_codes
+        task_codes = self._task_codes
+        days, months, businesses, tasks, hours = self.days, self.months, self.businesses, self.tasks, self.hours
+        for record in records:
+            submit_date = record.get("submit_date")
+            parsed = date_cache.get(submit_date)
+            if parsed is None:
+                parsed = date_cache[submit_date] = self._parse_date(submit_date) or False
+            if parsed is False:
+                self.skipped += 1
+                continue
+            try:
+                manual_time = float(record.get("manual_time", 0.0))
+            except (TypeError, ValueError):
+                self.skipped += 1
+                continue
+            business = record.get("business", "")
+            business_code = business_codes.get(business)
+            if business_code is None:
+                business_code = self._business_code(business)
+            task = record.get("task", "")
+            task_code = task_codes.get(task)
+            if task_code is None:
+                task_code = self._task_code(task)
+            days.append(parsed[0])
+            months.append(parsed[1])
+            businesses.append(business_code)
+            tasks.append(task_code)
+            hours.append(manual_time)
+
+    def day_range(self):
+        """(最早, 最晚) 提单日期序数，没有记录时返回 None"""
+        if not self.days:
+            return None
+        return min(self.days), max(self.days)
+
+
+class Report:
+    """一个日期区间的汇总结果
+
+    periods 为各周期的标签（周一日期 yyyy-MM-dd 或 yyyy-MM），
+    business_hours 为 {业务: [各周期耗时]}，按区间合计从高到低排列；
+    public_hours / normal_hours 为各周期公共、普通业务耗时；
+    daily 为区间内每天的 (日期, 耗时)；top_tasks 为 [(任务, 条数, 耗时)]。
+    """
+
+    def __init__(self, period, start, end):
+        self.period = period
+        self.start = start
+        self.end = end
+        self.periods = []
+        self.business_hours = {}
+        self.public_hours = []
+        self.normal_hours = []
+        self.daily = []
+        self.top_tasks = []
+        self.record_count = 0
+        self.total_hours = 0.0
+        self.workday_hours = DEFAULT_WORKDAY_HOURS
+        self.backend = "python"
+
+    def coverage(self, today=None):
+        """工作日（周一至周五）的工时覆盖情况，今天之后的日期不计入"""
+        last = min(self.end, today or date.today())
+        workdays = recorded = full = 0
+        hours = 0.0
+        for day, day_hours in self.daily:
+            if day > last or day.weekday() >= 5:
+                continue
+            workdays += 1
+            hours += day_hours
+            if day_hours > 0:
+                recorded += 1
+            if day_hours >= self.workday_hours - 1e-9:
+                full += 1
+        return {
+            "workdays": workdays,
+            "recorded_days": recorded,
+            "full_days": full,
+            "average_hours": hours / workdays if workdays else 0.0,
+        }
+
+
+def _period_layout(period, first, last):
+    """区间内各周期的 (标签, 起始值)，起始值与 _aggregate_* 中的周期编号一致"""
+    if period == PERIOD_WEEK:
+        starts = range(_week_start(first), _week_start(last) + 1, 7)
+        return [date.fromordinal(start).isoformat() for start in starts], _week_start(first)
+    first_day, last_day = date.fromordinal(first), date.fromordinal(last)
+    first_month = first_day.year * 12 + first_day.month - 1
+    last_month = last_day.year * 12 + last_day.month - 1
+    labels = [f"{month // 12:04d}-{month % 12 + 1:02d}" for month in range(first_month, last_month + 1)]
+    return labels, first_month
+
+
+def _aggregate_python(columns, period, first, last, base, period_count, top):
+    # 先按 (日期, 业务) 合并，周期、每日与公共 / 普通拆分再由合并后的少量单元推算
+    business_count = len(columns.business_names)
+    cells = [0.0] * ((last - first + 1) * business_count)
+    task_hours = [0.0] * len(columns.task_names)
+    task_counts = [0] * len(columns.task_names)
+    offset = first * business_count
+    count = 0
+    for day, business, task, hours in zip(columns.days, columns.businesses, columns.tasks, columns.hours):
+        if first <= day <= last:
+            cells[day * business_count + business - offset] += hours
+            task_hours[task] += hours
+            task_counts[task] += 1
+            count += 1
+    matrix = [[0.0] * period_count for _ in range(business_count)]
+    public = [0.0] * period_count
+    normal = [0.0] * period_count
+    daily = [0.0] * (last - first + 1)
+    public_flags = columns.public_flags
+    by_week = period == PERIOD_WEEK
+    month_index = {}
+    for key, hours in enumerate(cells):
+        if not hours:
+            continue
+        day, business = divmod(key + offset, business_count)
+        if by_week:
+            index = (_week_start(day) - base) // 7
+        else:
+            index = month_index.get(day)
+            if index is None:
+                value = date.fromordinal(day)
+                index = month_index[day] = value.year * 12 + value.month - 1 - base
+        matrix[business][index] += hours
+        if public_flags[business]:
+            public[index] += hours
+        else:
+            normal[index] += hours
+        daily[day - first] += hours
+    # 耗时、条数相同时编号小（先出现）的在前
+    ranked = heapq.nlargest(top, zip(task_hours, task_counts, range(0, -len(task_counts), -1)))
+    return count, matrix, public, normal, daily, [(-code, n, hours) for hours, n, code in ranked if n]
+
+
+def _aggregate_numpy(columns, period, first, last, base, period_count, top):
+    days = numpy.frombuffer(columns.days, dtype=numpy.int32)
+    hours = numpy.frombuffer(columns.hours, dtype=numpy.float64)
+    businesses = numpy.frombuffer(columns.businesses, dtype=numpy.int32)
+    tasks = numpy.frombuffer(columns.tasks, dtype=numpy.int32)
+    months = numpy.frombuffer(columns.months, dtype=numpy.int32)
+    mask = (days >= first) & (days <= last)
+    if not mask.all():
+        days, hours, businesses, tasks, months = days[mask], hours[mask], businesses[mask], tasks[mask], months[mask]
+    if period == PERIOD_WEEK:
+        index = (days - (days - 1) % 7 - base) // 7
+    else:
+        index = months - base
+    business_count = len(columns.business_names)
+    cells = numpy.bincount(businesses * period_count + index, weights=hours,
+                           minlength=business_count * period_count)
+    public_mask = numpy.array(columns.public_flags, dtype=bool)[businesses]
+    public = numpy.bincount(index[public_mask], weights=hours[public_mask], minlength=period_count)
+    normal = numpy.bincount(index[~public_mask], weights=hours[~public_mask], minlength=period_count)
+    daily = numpy.bincount(days - first, weights=hours, minlength=last - first + 1)
+    task_hours = numpy.bincount(tasks, weights=hours)
+    task_counts = numpy.bincount(tasks)
+    # 先用 partition 找到第 top 大的耗时，只对不少于它的任务排序（并列的一并参与排序）
+    candidates = numpy.flatnonzero(task_counts)
+    if top <= 0:
+        candidates = candidates[:0]
+    elif len(candidates) > top:
+        threshold = numpy.partition(task_hours[candidates], len(candidates) - top)[len(candidates) - top]
+        candidates = candidates[task_hours[candidates] >= threshold]
+    order = numpy.lexsort((candidates, -task_counts[candidates], -task_hours[candidates]))[:top]
+    ranked = candidates[order].tolist()
+    return (int(len(hours)), cells.reshape(business_count, period_count).tolist(), public.tolist(),
+            normal.tolist(), daily.tolist(), [(code, int(task_counts[code]), float(task_hours[code])) for code in ranked])
+
+
+def build_report(records, period=PERIOD_WEEK, start_date=None, end_date=None, matcher=None,
+                 top=DEFAULT_TOP_TASKS, workday_hours=DEFAULT_WORKDAY_HOURS, use_numpy=None):
+    """按业务 × 周 / 月汇总耗时，并统计公共 / 普通业务拆分、每日工时覆盖与任务排行
+
+    records 可以是 RecordColumns 或记录的可迭代对象；公共业务的判断规则与生成文本相同。
+    start_date / end_date 为 yyyy-MM-dd，不指定时取记录中最早 / 最晚的提单日期。
+    use_numpy 为 None 时安装了 numpy 就使用。
+    """
+    columns = records if isinstance(records, RecordColumns) else RecordColumns(records, matcher)
+    day_range = columns.day_range()
+    first = date.fromisoformat(start_date).toordinal() if start_date else (day_range or (date.today().toordinal(),))[0]
+    last = date.fromisoformat(end_date).toordinal() if end_date else (day_range or (None, first))[1]
+    last = max(first, last)
+    report = Report(period, date.fromordinal(first), date.fromordinal(last))
+    report.workday_hours = workday_hours
+    report.periods, base = _period_layout(period, first, last)
+
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    aggregate = _aggregate_numpy if use_numpy and len(columns) else _aggregate_python
+    report.backend = "numpy" if aggregate is _aggregate_numpy else "python"
+    count, matrix, public, normal, daily, top_tasks = aggregate(
+        columns, period, first, last, base, len(report.periods), top)
+
+    report.record_count = count
+    report.public_hours = public
+    report.normal_hours = normal
+    report.total_hours = sum(public) + sum(normal)
+    # 只列出区间内有记录的业务，按合计从高到低
+    totals = [(sum(row), code) for code, row in enumerate(matrix)]
+    for total, code in sorted(totals, key=lambda item: (-item[0], columns.business_names[item[1]])):
+        if total > 0:
+            report.business_hours[columns.business_names[code]] = matrix[code]
+    report.daily = [(date.fromordinal(first + offset), hours) for offset, hours in enumerate(daily)]
+    report.top_tasks = [(columns.task_names[code], n, hours) for code, n, hours in top_tasks]
+    return report
+
+
+def report_tables(report):
+    """把汇总结果整理为 [(标题, 表头, 行)]，界面与命令行共用"""
+    tables = []
+    headers = ["业务"] + report.periods + ["合计"]
+    rows = [[name] + hours + [sum(hours)] for name, hours in report.business_hours.items()]
+    rows.append(["合计"] + [p + n for p, n in zip(report.public_hours, report.normal_hours)] + [report.total_hours])
+    tables.append(("业务汇总", headers, rows))
+
+    headers = ["周期", "公共业务", "普通业务", "合计"]
+    rows = [[label, public, normal, public + normal]
+            for label, public, normal in zip(report.periods, report.public_hours, report.normal_hours)]
+    tables.append(("公共 / 普通", headers, rows))
+
+    headers = ["日期", "星期", "耗时", "达标"]
+    weekdays = "一二三四五六日"
+    rows = []
+    for day, hours in report.daily:
+        workday = day.weekday() < 5
+        rows.append([day.isoformat(), weekdays[day.weekday()], hours,
+                     ("是" if hours >= report.workday_hours - 1e-9 else "否") if workday else ""])
+    tables.append(("每日工时", headers, rows))
+
+    headers = ["任务", "条数", "耗时"]
+    tables.append(("任务排行", headers, [[task, count, hours] for task, count, hours in report.top_tasks]))
+    return tables
+
+
+def format_cell(value):
+    if isinstance(value, float):
+        return f"{value:.1f}"
+    return str(value)
+
+
+def coverage_text(report, today=None):
+    coverage = report.coverage(today)
+    return (f"工作日 {coverage['workdays']} 天，有记录 {coverage['recorded_days']} 天，"
+            f"满 {report.workday_hours:g} 小时 {coverage['full_days']} 天，"
+            f"日均 {coverage['average_hours']:.1f} 小时")
+
+
+def month_bounds(day, months_back=0):
+    """day 所在月往前 months_back 个月的 (月初, 月末)"""
+    month = day.year * 12 + day.month - 1 - months_back
+    start = date(month // 12, month % 12 + 1, 1)
+    end = date((month + 1) // 12, (month + 1) % 12 + 1, 1) - timedelta(days=1)
+    return start, end
@@ -0,0 +1,54 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """启动耗时分析
+
+    按阶段记录开始时刻（相对进程启动）与耗时，使用 --profile-startup 启动时
+    在首帧显示、延后初始化完成后打印各阶段耗时；未启用时不做任何记录。
+    """
+
+    def __init__(self, enabled=False, origin=None):
+        self.enabled = enabled
+        self.origin = time.perf_counter() if origin is None else origin
+        # (阶段名, 开始时刻, 耗时)，单位秒
+        self.phases = []
+
+    def start(self, origin=None):
+        """启用分析，origin 为 main.py 最早记录的时刻"""
+        self.enabled = True
+        if origin is not None:
+            self.origin = origin
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, started - self.origin, time.perf_counter() - started))
+
+    def mark(self, name):
+        """记录一个时间点，例如首帧显示"""
+        if self.enabled:
+            self.phases.append((name, time.perf_counter() - self.origin, 0.0))
+
+    def report(self):
+        lines = ["启动耗时分析 (ms):", f"  {'开始':>8}  {'耗时':>8}  阶段"]
+        # 嵌套阶段先结束先记录，按开始时刻排序后外层阶段在前
+        for name, offset, duration in sorted(self.phases, key=lambda phase: phase[1]):
+            lines.append(f"  {offset * 1000:8.1f}  {duration * 1000:8.1f}  {name}")
+        lines.append(f"  合计 {(time.perf_counter() - self.origin) * 1000:.1f}ms")
+        return "\n".join(lines)
+
+    def print_report(self):
+        if self.enabled:
+            print(self.report(), flush=True)
+
+
+# main.py 与主窗口共用
+startup_profiler = StartupProfiler()
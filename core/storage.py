@@ -0,0 +1,1200 @@
+import os
+import gzip
+import json
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from .file_lock import data_lock, file_signature
+from .record_store import new_record_id
+
+try:
+    # 可选依赖：安装 zstandard 后冷分区使用 zstd 压缩，否则使用 gzip
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 追加日志超过该大小（字节）后触发压缩
+DEFAULT_COMPACT_THRESHOLD = 256 * 1024
+
+
+# 每个文件最近一次写入内容的摘要及写入后的文件状态，内容与文件均未变化时跳过写入
+_last_digests = {}
+
+
+# 压缩格式对应的文件后缀
+COMPRESSED_SUFFIXES = {"zstd": ".zst", "gzip": ".gz"}
+
+
+def default_codec():
+    """冷数据使用的压缩格式"""
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def _codec_of(path):
+    for codec, suffix in COMPRESSED_SUFFIXES.items():
+        if path.endswith(suffix):
+            return codec
+    return None
+
+
+def _compress(payload, codec):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(payload)
+    # mtime 固定为 0，内容相同时压缩结果也相同；级别 6 比 9 快约 4 倍，体积只大约 6%
+    return gzip.compress(payload, compresslevel=6, mtime=0)
+
+
+def _decompress(payload, codec):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("读取 .zst 文件需要安装 zstandard")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(payload)
+    return gzip.decompress(payload)
+
+
+def read_json_file(path):
+    """读取 JSON 文件，按后缀自动解压 .gz / .zst"""
+    with open(path, "rb") as f:
+        payload = f.read()
+    codec = _codec_of(path)
+    if codec is not None:
+        payload = _decompress(payload, codec)
+    return json.loads(payload.decode("utf-8"))
+
+
+def write_json_atomic(path, data, indent=2):
+    """原子写入 JSON：写临时文件并 fsync 后再重命名，崩溃时不会留下写了一半的文件
+
+    路径以 .gz / .zst 结尾时压缩写入；内容与上次写入相同、且文件没有被其他进程改动时跳过，
+    返回是否实际写入。
+    """
+    payload = json.dumps(data, ensure_ascii=False, indent=indent).encode("utf-8")
+    digest = hashlib.sha1(payload).digest()
+    last = _last_digests.get(path)
+    if last is not None and last == (digest, file_signature(path)):
+        return False
+    codec = _codec_of(path)
+    if codec is not None:
+        payload = _compress(payload, codec)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(os.path.dirname(path))
+    _last_digests[path] = (digest, file_signature(path))
+    return True
+
+
+def _fsync_dir(dir_path):
+    # 重命名后同步目录项；Windows 不支持打开目录，忽略即可
+    try:
+        fd = os.open(dir_path or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class RecordStorage:
+    """记录存储接口，主窗口只通过这些方法读写记录
+
+    写入操作由后台保存线程串行调用，同一时间只有一个线程写入。
+    """
+
+    def load(self):
+        """加载全部记录，按添加顺序返回列表"""
+        raise NotImplementedError
+
+    def load_range(self, start_date=None, end_date=None, business=None):
+        """加载提单日期在 [start_date, end_date] 内的记录，日期格式 yyyy-MM-dd"""
+        return [r for r in self.load() if _in_range(r, start_date, end_date, business)]
+
+    def iter_range(self, start_date=None, end_date=None, business=None, newest_first=False):
+        """逐条返回区间内的记录（用于导出），newest_first 时从最新添加的开始"""
+        records = self.load_range(start_date, end_date, business)
+        return reversed(records) if newest_first else iter(records)
+
+    def summarize(self, start_date=None, end_date=None, business=None):
+        """返回区间内的 (记录数, 总耗时)"""
+        records = self.load_range(start_date, end_date, business)
+        return len(records), sum(r["manual_time"] for r in records)
+
+    def append_record(self, record):
+        raise NotImplementedError
+
+    def update_record(self, record_id, fields):
+        raise NotImplementedError
+
+    def delete_record(self, record_id):
+        raise NotImplementedError
+
+    def apply_ops(self, ops):
+        """批量执行增删改操作，操作格式与追加日志一致"""
+        for op in ops:
+            kind = op.get("op")
+            if kind == "add":
+                self.append_record(op["record"])
+            elif kind == "update":
+                self.update_record(op["id"], op["fields"])
+            elif kind == "delete":
+                self.delete_record(op["id"])
+
+    def append_records(self, records):
+        """批量追加记录（可以是生成器），一次提交，返回追加的条数
+
+        迭代 records 的过程中抛出异常时不写入任何记录。
+        """
+        ops = [{"op": "add", "record": record} for record in records]
+        self.apply_ops(ops)
+        return len(ops)
+
+    def save_all(self, records):
+        """整体替换全部记录"""
+        raise NotImplementedError
+
+    def maybe_compact(self):
+        return False
+
+    def close(self):
+        pass
+
+    # ---- 多实例 ----
+    def watch_paths(self):
+        """需要监视的文件与目录，其他进程修改后调用 changed_months 查询"""
+        return []
+
+    def changed_months(self, months):
+        """months 中被其他进程修改过、需要重新加载的月份；不支持检测的存储返回空列表"""
+        return []
+
+    # ---- 按月加载 ----
+    # 非分区存储一次加载全部记录，以下默认实现供调用方统一按月份处理
+    partitioned = False
+
+    def months(self):
+        """有记录的月份（yyyy-MM），升序"""
+        return sorted({month_of(r) for r in self.load()})
+
+    def load_months(self, months):
+        wanted = set(months)
+        return [r for r in self.load() if month_of(r) in wanted]
+
+    def partition_summary(self):
+        """每个月份的 (记录数, 总耗时)"""
+        summary = {}
+        for record in self.load():
+            count, hours = summary.get(month_of(record), (0, 0.0))
+            summary[month_of(record)] = (count + 1, hours + float(record.get("manual_time", 0) or 0))
+        return summary
+
+    def business_usage(self, months):
+        """months 内每个业务的 (使用次数, 最近提单日期 yyyy-MM-dd)，供未加载的月份计入使用统计"""
+        usage = {}
+        for record in self.load_months(months):
+            _use(usage, record.get("business", ""), 1, _day_of(record))
+        return {name: tuple(value) for name, value in usage.items()}
+
+
+# 提单日期无法识别的记录归入该分区
+UNKNOWN_MONTH = "0000-00"
+
+
+def month_of(record):
+    """记录所属的月份分区，按提单日期（兼容 yyyyMMdd），缺失时按时间戳"""
+    value = str(record.get("submit_date") or record.get("timestamp") or "")
+    if len(value) >= 7 and value[4] == "-" and value[:4].isdigit() and value[5:7].isdigit():
+        return value[:7]
+    if len(value) == 8 and value.isdigit():
+        return f"{value[:4]}-{value[4:6]}"
+    return UNKNOWN_MONTH
+
+
+def _day_of(record):
+    """记录的提单日期（缺失时为时间戳的日期部分），用于使用统计中的最近使用日期"""
+    return str(record.get("submit_date") or record.get("timestamp") or "")[:10]
+
+
+def _use(usage, business, count, day=None):
+    """在 业务 -> [使用次数, 最近日期] 中登记 count 次使用（负数为撤销），次数为 0 时删除"""
+    value = usage.get(business)
+    if value is None:
+        value = usage[business] = [0, day or ""]
+    value[0] += count
+    if value[0] <= 0:
+        del usage[business]
+    elif day and day > value[1]:
+        value[1] = day
+
+
+def _usage_of(records):
+    usage = {}
+    for record in records:
+        _use(usage, record.get("business", ""), 1, _day_of(record))
+    return usage
+
+
+def months_in_range(months, start_date=None, end_date=None):
+    """与提单日期区间 [start_date, end_date] 有交集的月份"""
+    start = start_date[:7] if start_date else None
+    end = end_date[:7] if end_date else None
+    return [m for m in months if (start is None or m >= start) and (end is None or m <= end)]
+
+
+def _in_range(record, start_date, end_date, business):
+    date = record.get("submit_date", "")
+    if start_date and date < start_date:
+        return False
+    if end_date and date > end_date:
+        return False
+    if business is not None and record.get("business") != business:
+        return False
+    return True
+
+
+def read_journal(path):
+    """逐条读取追加日志中的操作，文件不存在时不返回任何操作"""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # 进程异常退出时最后一行可能不完整，直接忽略
+                print(f"忽略无法解析的日志行: {line[:80]}")
+
+
+def append_journal(path, chunks):
+    """把编码好的操作行追加到日志末尾并 fsync"""
+    with open(path, "a+b") as f:
+        # 上次写入中断留下不完整的行时先补换行，避免与新操作粘连
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+        for chunk in chunks:
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class JournalStorage(RecordStorage):
+    """records.json 快照 + records.journal 追加日志
+
+    每次增删改只向日志追加一行 JSON 操作，启动时回放快照与日志；
+    日志超过阈值后由写入线程合并为新的快照。
+    """
+
+    def __init__(self, data_dir, compact_threshold=DEFAULT_COMPACT_THRESHOLD):
+        self.data_dir = data_dir
+        self.compact_threshold = compact_threshold
+        self.snapshot_path = os.path.join(data_dir, "records.json")
+        self.journal_path = os.path.join(data_dir, "records.journal")
+        # 与其他实例共用的数据目录锁
+        self._lock = data_lock(data_dir)
+        # 最近一次加载或本进程写入后快照与日志的文件状态，用于发现其他进程的写入
+        self._signature = None
+        self._stale = False
+        # changed_months 回放的结果，等待 load_months 取用
+        self._reloaded = None
+
+    def _files_signature(self):
+        return file_signature(self.snapshot_path), file_signature(self.journal_path)
+
+    def _check_external_write(self):
+        # 写入前发现文件已被其他进程改动时标记，等待调用方重新加载
+        if self._signature is not None and self._files_signature() != self._signature:
+            self._stale = True
+
+    def _written(self):
+        if self._signature is not None:
+            self._signature = self._files_signature()
+
+    # ---- 读取 ----
+    def load(self):
+        """加载快照并回放日志，返回记录列表"""
+        with self._lock:
+            records = self._load()
+            self._signature = self._files_signature()
+            self._stale = False
+            return records
+
+    def _load(self):
+        records = []
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+
+        # 兼容老数据：没有 id 的记录补充 id，并写回快照完成迁移
+        migrated = False
+        for record in records:
+            if not record.get("id"):
+                record["id"] = new_record_id()
+                migrated = True
+
+        by_id = {record["id"]: record for record in records}
+        for op in read_journal(self.journal_path):
+            by_id = self._apply(by_id, op)
+
+        records = list(by_id.values())
+        if migrated:
+            self.save_all(records)
+        return records
+
+    @staticmethod
+    def _apply(by_id, op):
+        """回放一条操作，返回回放后的 by_id（插入到中间时为新的字典）"""
+        # 所有操作按 id 幂等，重复回放不会产生重复记录
+        kind = op.get("op")
+        if kind == "add":
+            record = op["record"]
+            index = op.get("index")
+            if record["id"] in by_id or index is None or index >= len(by_id):
+                by_id[record["id"]] = record
+            else:
+                # 撤销删除等放回原位置的记录，按添加顺序中的位置插入
+                items = list(by_id.items())
+                items.insert(max(0, index), (record["id"], record))
+                by_id = dict(items)
+        elif kind == "update":
+            record = by_id.get(op["id"])
+            if record is not None:
+                record.update(op["fields"])
+        elif kind == "delete":
+            by_id.pop(op["id"], None)
+        return by_id
+
+    # ---- 写入 ----
+    def apply_ops(self, ops):
+        """把一批操作一次性追加到日志并 fsync"""
+        if not ops:
+            return
+        payload = "".join(json.dumps(op, ensure_ascii=False) + "\n" for op in ops).encode("utf-8")
+        with self._lock:
+            self._check_external_write()
+            append_journal(self.journal_path, [payload])
+            self._written()
+
+    def append_records(self, records):
+        """先把操作写入临时文件，全部生成后再一次追加到日志，不在内存中累积"""
+        count = 0
+        encode = json.JSONEncoder(ensure_ascii=False).encode
+        with tempfile.TemporaryFile() as spool:
+            for record in records:
+                spool.write((encode({"op": "add", "record": record}) + "\n").encode("utf-8"))
+                count += 1
+            spool.seek(0)
+            with self._lock:
+                self._check_external_write()
+                append_journal(self.journal_path, iter(lambda: spool.read(1024 * 1024), b""))
+                self._written()
+        return count
+
+    def append_record(self, record):
+        self.apply_ops([{"op": "add", "record": record}])
+
+    def update_record(self, record_id, fields):
+        self.apply_ops([{"op": "update", "id": record_id, "fields": fields}])
+
+    def delete_record(self, record_id):
+        self.apply_ops([{"op": "delete", "id": record_id}])
+
+    def save_all(self, records):
+        """整体重写快照并清空日志（清空等批量变更时使用）"""
+        with self._lock:
+            self._check_external_write()
+            write_json_atomic(self.snapshot_path, records)
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._written()
+
+    # ---- 压缩 ----
+    def journal_size(self):
+        try:
+            return os.path.getsize(self.journal_path)
+        except OSError:
+            return 0
+
+    def maybe_compact(self):
+        """日志超过阈值时回放快照与日志，合并为新的快照"""
+        with self._lock:
+            if self.journal_size() < self.compact_threshold:
+                return False
+            self.save_all(self._load())
+            return True
+
+    # ---- 多实例 ----
+    def watch_paths(self):
+        # 日志是原地追加，需要监视文件本身；目录用于发现文件的创建与替换
+        return [self.data_dir, self.snapshot_path, self.journal_path]
+
+    def changed_months(self, months):
+        # 回放一次，结果留给随后的 load_months 使用，不再重复回放
+        with self._lock:
+            if not self._stale and self._files_signature() == self._signature:
+                return []
+            self._reloaded = self.load()
+            return sorted(set(months) | {month_of(r) for r in self._reloaded})
+
+    def load_months(self, months):
+        records, self._reloaded = self._reloaded, None
+        if records is None:
+            records = self.load()
+        wanted = set(months)
+        return [r for r in records if month_of(r) in wanted]
+
+
+# 当前月与上个月的分区保持未压缩，更早的为冷分区
+HOT_MONTHS = 2
+
+
+def _hours_of(record):
+    return float(record.get("manual_time", 0) or 0)
+
+
+def _known_of(record):
+    return month_of(record), _hours_of(record), record.get("business", ""), _day_of(record)
+
+
+class PartitionedStorage(RecordStorage):
+    """按提单月份分区的记录存储
+
+    records/2026-10.json 等每月一个文件，records/manifest.json 记录各分区的文件名、
+    条数、总耗时与各业务的使用次数。调用方可以只加载需要的月份，其余月份的合计直接读清单；
+    冷分区压缩保存（安装 zstandard 时用 zstd，否则 gzip）。
+    每批增删改只向受影响月份的 records/2026-10.journal 追加操作并重写清单，
+    读取分区时回放该月的日志；日志超过阈值后由写入线程合并进分区。
+    首次使用时自动从 records.json 迁移。
+    """
+
+    partitioned = True
+
+    def __init__(self, data_dir, hot_months=HOT_MONTHS, compact_threshold=DEFAULT_COMPACT_THRESHOLD):
+        self.data_dir = data_dir
+        self.hot_months = hot_months
+        self.compact_threshold = compact_threshold
+        self.records_dir = os.path.join(data_dir, "records")
+        self.manifest_path = os.path.join(self.records_dir, "manifest.json")
+        # 读取在界面线程、写入在保存线程，同时可能有其他实例写入，
+        # 读写均在数据目录的跨进程锁内进行（同一线程可重入）
+        self._lock = data_lock(data_dir)
+        # 月份 -> {"file", "count", "hours", "usage", "journal"}，usage 为 业务 -> [使用次数, 最近提单日期]，
+        # journal 为该月日志的字节数
+        self._manifest = None
+        self._manifest_signature = None
+        # 已加载分区中记录 id -> (月份, 耗时, 业务, 提单日期)，修改、删除时据此找到所在分区并更新清单中的合计
+        self._known = {}
+        # 调用方已加载的月份 -> 加载或本进程最近一次写入后的分区文件状态
+        self._signatures = {}
+        # 本进程写入前发现已被其他进程改动过的月份，等待调用方重新加载
+        self._stale_months = set()
+
+    # ---- 清单 ----
+    def _ensure_manifest(self):
+        """读取清单，其他进程改动过清单时重新读取；需在锁内调用"""
+        signature = file_signature(self.manifest_path)
+        if self._manifest is not None and signature == self._manifest_signature:
+            return
+        if signature is not None:
+            self._manifest = read_json_file(self.manifest_path).get("partitions", {})
+            self._manifest_signature = signature
+            return
+        self._manifest = {}
+        self._migrate()
+
+    def _migrate(self):
+        """把单文件的 records.json（含追加日志）迁移为按月分区，原文件改名保留"""
+        legacy = JournalStorage(self.data_dir)
+        legacy_files = [p for p in (legacy.snapshot_path, legacy.journal_path) if os.path.exists(p)]
+        records = legacy.load() if legacy_files else []
+        os.makedirs(self.records_dir, exist_ok=True)
+        self._write_all(records)
+        for path in legacy_files:
+            os.replace(path, path + ".migrated")
+        if legacy_files:
+            print(f"已将 {len(records)} 条记录迁移到按月分区存储: {self.records_dir}")
+
+    def _write_manifest(self):
+        write_json_atomic(self.manifest_path, {"version": 1, "partitions": self._manifest})
+        self._manifest_signature = file_signature(self.manifest_path)
+
+    def _journal_path(self, month):
+        return os.path.join(self.records_dir, f"{month}.journal")
+
+    def _partition_signature(self, month):
+        entry = self._manifest.get(month)
+        if entry is None:
+            return None
+        return (file_signature(os.path.join(self.records_dir, entry["file"])),
+                file_signature(self._journal_path(month)))
+
+    def months(self):
+        with self._lock:
+            self._ensure_manifest()
+            return sorted(self._manifest)
+
+    def partition_summary(self):
+        with self._lock:
+            self._ensure_manifest()
+            return {month: (entry["count"], entry["hours"]) for month, entry in self._manifest.items()}
+
+    def business_usage(self, months):
+        """由清单中各月份的使用次数合计，不读取分区
+
+        删除记录后最近使用日期不回退，合并日志或重写分区时按实际记录重新计算。
+        """
+        usage = {}
+        with self._lock:
+            self._ensure_manifest()
+            for month in set(months):
+                entry = self._manifest.get(month)
+                if entry is None:
+                    continue
+                if "usage" not in entry:
+                    # 早期版本的清单没有使用次数，读取一次分区补充，随下次写入保存
+                    self._recount(month, self._read_partition(month))
+                for name, (count, day) in entry["usage"].items():
+                    _use(usage, name, count, day)
+        return {name: tuple(value) for name, value in usage.items()}
+
+    # ---- 多实例 ----
+    def watch_paths(self):
+        # 分区与清单都是写临时文件后重命名；日志原地追加，但每批追加后清单中的日志大小随之改变、
+        # 清单被替换，因此监视目录即可
+        return [self.records_dir]
+
+    def changed_months(self, months):
+        with self._lock:
+            self._ensure_manifest()
+            return [month for month in sorted(set(months))
+                    if month in self._stale_months
+                    or self._partition_signature(month) != self._signatures.get(month)]
+
+    # ---- 分区读写 ----
+    def _is_hot(self, month):
+        first = date.today().replace(day=1)
+        for _ in range(self.hot_months - 1):
+            first = (first - timedelta(days=1)).replace(day=1)
+        return month >= first.strftime("%Y-%m")
+
+    def _read_partition(self, month):
+        entry = self._manifest.get(month)
+        if entry is None:
+            return []
+        path = os.path.join(self.records_dir, entry["file"])
+        if os.path.exists(path):
+            records = read_json_file(path)
+        else:
+            print(f"分区文件不存在: {path}")
+            records = []
+        journal_path = self._journal_path(month)
+        if not os.path.exists(journal_path):
+            return records
+        by_id = {record["id"]: record for record in records}
+        for op in read_journal(journal_path):
+            by_id = JournalStorage._apply(by_id, op)
+        return list(by_id.values())
+
+    def _write_partition(self, month, records):
+        """用 records（已包含该月日志中的操作）整体重写分区，并删除该月的日志"""
+        entry = self._manifest.get(month)
+        old_file = entry["file"] if entry else None
+        tracked = month in self._signatures
+        if tracked and self._partition_signature(month) != self._signatures[month]:
+            # 其他进程改动过该分区：写入内容已合并其改动，但调用方内存中还没有
+            self._stale_months.add(month)
+        if records:
+            if self._is_hot(month):
+                file_name, indent = f"{month}.json", 2
+            else:
+                file_name, indent = f"{month}.json{COMPRESSED_SUFFIXES[default_codec()]}", None
+            write_json_atomic(os.path.join(self.records_dir, file_name), records, indent=indent)
+            hours = sum(_hours_of(r) for r in records)
+            self._manifest[month] = {"file": file_name, "count": len(records), "hours": round(hours, 6),
+                                     "usage": _usage_of(records)}
+        else:
+            file_name = None
+            self._manifest.pop(month, None)
+        if old_file and old_file != file_name:
+            old_path = os.path.join(self.records_dir, old_file)
+            if os.path.exists(old_path):
+                os.remove(old_path)
+        if os.path.exists(self._journal_path(month)):
+            os.remove(self._journal_path(month))
+        if tracked:
+            self._signatures[month] = self._partition_signature(month)
+
+    def _write_all(self, records):
+        partitions = {}
+        for record in records:
+            partitions.setdefault(month_of(record), []).append(record)
+        for month in set(self._manifest) - set(partitions):
+            self._write_partition(month, [])
+        for month, month_records in partitions.items():
+            self._write_partition(month, month_records)
+        self._write_manifest()
+        self._known = {record["id"]: _known_of(record) for record in records}
+
+    # ---- 读取 ----
+    def load_months(self, months):
+        """加载指定月份的记录，按月份升序、月内按添加顺序返回"""
+        records = []
+        with self._lock:
+            self._ensure_manifest()
+            for month in sorted(set(months)):
+                self._signatures[month] = self._partition_signature(month)
+                self._stale_months.discard(month)
+                month_records = self._read_partition(month)
+                for record in month_records:
+                    self._known[record["id"]] = _known_of(record)
+                entry = self._manifest.get(month)
+                if entry is not None and entry["count"] != len(month_records):
+                    # 清单与分区不一致（如写入中途退出）时以分区为准，随下次写入保存
+                    self._recount(month, month_records)
+                records.extend(month_records)
+        return records
+
+    def load(self):
+        return self.load_months(self.months())
+
+    def load_range(self, start_date=None, end_date=None, business=None):
+        months = months_in_range(self.months(), start_date, end_date)
+        return [r for r in self.load_months(months) if _in_range(r, start_date, end_date, business)]
+
+    def iter_range(self, start_date=None, end_date=None, business=None, newest_first=False):
+        # 每次只读取一个分区，导出多年的记录时内存中最多只有一个月的记录
+        months = months_in_range(self.months(), start_date, end_date)
+        for month in reversed(months) if newest_first else months:
+            with self._lock:
+                self._ensure_manifest()
+                records = self._read_partition(month)
+            for record in reversed(records) if newest_first else records:
+                if _in_range(record, start_date, end_date, business):
+                    yield record
+
+    def summarize(self, start_date=None, end_date=None, business=None):
+        if start_date is None and end_date is None and business is None:
+            # 全部记录的合计直接由清单得出，不读取分区
+            summary = self.partition_summary().values()
+            return sum(count for count, _ in summary), sum(hours for _, hours in summary)
+        return super().summarize(start_date, end_date, business)
+
+    def _recount(self, month, records):
+        """按分区的实际内容更新清单中该月的条数、总耗时与使用次数"""
+        hours = sum(_hours_of(r) for r in records)
+        self._manifest[month].update(count=len(records), hours=round(hours, 6), usage=_usage_of(records))
+
+    def _append_ops(self, month, chunks):
+        """把编码好的操作行追加到该月日志，更新清单中的日志大小；需先按增量更新清单中的合计"""
+        tracked = month in self._signatures
+        stale = tracked and self._partition_signature(month) != self._signatures[month]
+        path = self._journal_path(month)
+        append_journal(path, chunks)
+        self._manifest[month]["journal"] = os.path.getsize(path)
+        if stale:
+            # 其他进程改动过该月：增量的条数、耗时以本进程看到的记录为准，可能有偏差，按回放结果重算
+            self._stale_months.add(month)
+            self._recount(month, self._read_partition(month))
+        if tracked:
+            self._signatures[month] = self._partition_signature(month)
+
+    # ---- 写入 ----
+    def apply_ops(self, ops):
+        """按顺序执行一批操作
+
+        已有分区的月份只向该月日志追加操作、按增量更新清单中的条数与总耗时，不重写分区；
+        还没有分区的月份直接写入新的分区。跨月修改提单日期时拆成原月份的删除与新月份的添加。
+        """
+        if not ops:
+            return
+        with self._lock:
+            self._ensure_manifest()
+            # 月份 -> 等待追加到该月日志的操作
+            pending = {}
+            # 本批新建分区的月份 -> id -> 记录
+            created = {}
+
+            def flush():
+                encode = json.JSONEncoder(ensure_ascii=False).encode
+                for month, month_ops in pending.items():
+                    self._append_ops(month, ["".join(encode(op) + "\n" for op in month_ops).encode("utf-8")])
+                pending.clear()
+
+            def bump(month, count, hours):
+                entry = self._manifest[month]
+                entry["count"] += count
+                entry["hours"] = round(entry["hours"] + hours, 6)
+
+            def use(month, business, count, day=None):
+                usage = self._manifest[month].get("usage")
+                if usage is not None:
+                    _use(usage, business, count, day)
+
+            def add(record):
+                known = self._known[record["id"]] = _known_of(record)
+                month, hours, business, day = known
+                if month in created or month not in self._manifest:
+                    created.setdefault(month, OrderedDict())[record["id"]] = record
+                else:
+                    pending.setdefault(month, []).append({"op": "add", "record": record})
+                    bump(month, 1, hours)
+                    use(month, business, 1, day)
+
+            def remove(record_id, known):
+                month, hours, business, _ = known
+                if month in created:
+                    created[month].pop(record_id, None)
+                elif month in self._manifest:
+                    pending.setdefault(month, []).append({"op": "delete", "id": record_id})
+                    bump(month, -1, -hours)
+                    use(month, business, -1)
+
+            def current(record_id, month):
+                # 跨月判断需要完整的记录：先追加已有的操作，再回放该月分区
+                if month in created:
+                    return created[month].get(record_id)
+                flush()
+                return next((r for r in self._read_partition(month) if r["id"] == record_id), None)
+
+            for op in ops:
+                kind = op.get("op")
+                if kind == "add":
+                    add(op["record"])
+                elif kind == "update":
+                    record_id, fields = op["id"], op["fields"]
+                    known = self._known.get(record_id)
+                    if known is None:
+                        print(f"忽略未加载记录的修改: {record_id}")
+                        continue
+                    month, hours, business, day = known
+                    if "submit_date" in fields or "timestamp" in fields:
+                        record = current(record_id, month)
+                        if record is None:
+                            print(f"忽略已被删除记录的修改: {record_id}")
+                            continue
+                        record = dict(record, **fields)
+                        if month_of(record) != month:
+                            # 提单日期跨月修改时移动到新的分区
+                            remove(record_id, known)
+                            add(record)
+                            continue
+                        day = _day_of(record)
+                    new_hours = _hours_of(fields) if "manual_time" in fields else hours
+                    new_business = fields.get("business", business)
+                    if month in created:
+                        record = created[month].get(record_id)
+                        if record is not None:
+                            created[month][record_id] = dict(record, **fields)
+                    else:
+                        pending.setdefault(month, []).append(op)
+                        bump(month, 0, new_hours - hours)
+                        if (new_business, day) != (business, known[3]):
+                            use(month, business, -1)
+                            use(month, new_business, 1, day)
+                    self._known[record_id] = (month, new_hours, new_business, day)
+                elif kind == "delete":
+                    known = self._known.pop(op["id"], None)
+                    if known is not None:
+                        remove(op["id"], known)
+
+            flush()
+            for month, records in created.items():
+                self._write_partition(month, list(records.values()))
+            # 记录全部删除的月份直接合并日志，删除分区文件
+            for month in [m for m, entry in self._manifest.items() if entry["count"] <= 0]:
+                self._write_partition(month, self._read_partition(month))
+            self._write_manifest()
+
+    def append_record(self, record):
+        self.apply_ops([{"op": "add", "record": record}])
+
+    def update_record(self, record_id, fields):
+        self.apply_ops([{"op": "update", "id": record_id, "fields": fields}])
+
+    def delete_record(self, record_id):
+        self.apply_ops([{"op": "delete", "id": record_id}])
+
+    def append_records(self, records):
+        """批量导入：先按月份把添加操作写入临时文件，全部生成后在锁内逐月提交，最后写一次清单
+
+        已有分区的月份把临时文件原样追加到该月日志，没有分区的月份直接写入新的分区；
+        内存中同时最多只保留一个月份的记录。
+        """
+        spools = {}
+        # 月份 -> [条数, 总耗时, 业务 -> [使用次数, 最近提单日期]]
+        totals = {}
+        count = 0
+        encode = json.JSONEncoder(ensure_ascii=False).encode
+        try:
+            for record in records:
+                month = month_of(record)
+                spool = spools.get(month)
+                if spool is None:
+                    spool = spools[month] = tempfile.TemporaryFile()
+                    totals[month] = [0, 0.0, {}]
+                spool.write((encode({"op": "add", "record": record}) + "\n").encode("utf-8"))
+                totals[month][0] += 1
+                totals[month][1] += _hours_of(record)
+                _use(totals[month][2], record.get("business", ""), 1, _day_of(record))
+                count += 1
+            with self._lock:
+                self._ensure_manifest()
+                for month in sorted(spools):
+                    spool = spools[month]
+                    spool.seek(0)
+                    if month in self._manifest:
+                        entry = self._manifest[month]
+                        count, hours, usage = totals[month]
+                        entry["count"] += count
+                        entry["hours"] = round(entry["hours"] + hours, 6)
+                        if "usage" in entry:
+                            for name, (name_count, day) in usage.items():
+                                _use(entry["usage"], name, name_count, day)
+                        self._append_ops(month, iter(lambda: spool.read(1024 * 1024), b""))
+                    else:
+                        month_records = [json.loads(line)["record"] for line in spool]
+                        self._write_partition(month, month_records)
+                        del month_records
+                self._write_manifest()
+        finally:
+            for spool in spools.values():
+                spool.close()
+        return count
+
+    def save_all(self, records):
+        """整体替换全部分区（包括未加载的月份），用于清空等批量变更"""
+        with self._lock:
+            self._ensure_manifest()
+            os.makedirs(self.records_dir, exist_ok=True)
+            self._write_all(records)
+
+    def maybe_compact(self):
+        """把日志超过阈值的月份合并进分区，并把已经变冷但仍未压缩的分区压缩保存"""
+        with self._lock:
+            self._ensure_manifest()
+            stale = [month for month, entry in self._manifest.items()
+                     if entry.get("journal", 0) >= self.compact_threshold
+                     or not self._is_hot(month) and _codec_of(entry["file"]) is None]
+            for month in stale:
+                self._write_partition(month, self._read_partition(month))
+            if stale:
+                self._write_manifest()
+            return bool(stale)
+
+
+# SQLite 记录表中的字段，顺序与插入语句一致
+SQLITE_FIELDS = ("id", "business", "task", "manual_time", "submit_date", "timestamp")
+# 逐条导出时每次读取的行数
+SQLITE_PAGE_SIZE = 1000
+
+
+class SqliteStorage(RecordStorage):
+    """基于标准库 sqlite3 的记录存储
+
+    seq 自增主键保持添加顺序，submit_date、business、timestamp 建有索引，
+    按日期区间查询时只读取需要的行。month 列保存记录所属的月份（与 month_of 一致）并建有索引，
+    界面与按月分区存储一样只加载需要的月份，其余月份的合计直接由索引统计。
+    """
+
+    # 与按月分区存储一样按月加载
+    partitioned = True
+
+    INSERT_SQL = (
+        "INSERT OR REPLACE INTO records (id, business, task, manual_time, submit_date, timestamp, month) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)"
+    )
+    DELETE_SQL = "DELETE FROM records WHERE id = ?"
+    # 每个可编辑字段一条固定语句，sqlite3 会缓存编译结果
+    UPDATE_SQL = {
+        field: f"UPDATE records SET {field} = ? WHERE id = ?"
+        for field in ("business", "task", "manual_time", "submit_date", "timestamp")
+    }
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        # 连接在主线程创建、由写入线程使用，读写均通过锁串行
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+        # 其他连接（其他实例）提交后 data_version 变化，本连接的提交不影响
+        self._data_version = self._read_data_version()
+
+    def _create_schema(self):
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS records (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL UNIQUE,
+                    business TEXT NOT NULL,
+                    task TEXT NOT NULL,
+                    manual_time REAL NOT NULL,
+                    submit_date TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    month TEXT NOT NULL DEFAULT ''
+                )
+            """)
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(records)")}
+            if "month" not in columns:
+                # 早期创建的数据库没有 month 列，补充后按现有记录计算
+                self.conn.execute("ALTER TABLE records ADD COLUMN month TEXT NOT NULL DEFAULT ''")
+                rows = self.conn.execute("SELECT id, submit_date, timestamp FROM records").fetchall()
+                self.conn.executemany("UPDATE records SET month = ? WHERE id = ?", (
+                    (month_of({"submit_date": submit_date, "timestamp": timestamp}), record_id)
+                    for record_id, submit_date, timestamp in rows
+                ))
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_records_month ON records (month)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_records_submit_date ON records (submit_date)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_records_business ON records (business)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_records_timestamp ON records (timestamp)")
+
+    @staticmethod
+    def _row_values(record):
+        return (
+            record["id"],
+            record.get("business", ""),
+            record.get("task", ""),
+            float(record.get("manual_time", 0)),
+            record.get("submit_date", ""),
+            record.get("timestamp", ""),
+            month_of(record),
+        )
+
+    @staticmethod
+    def _range_clause(start_date, end_date, business):
+        conditions = []
+        params = []
+        if start_date:
+            conditions.append("submit_date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("submit_date <= ?")
+            params.append(end_date)
+        if business is not None:
+            conditions.append("business = ?")
+            params.append(business)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return where, params
+
+    def _select(self, where="", params=()):
+        with self._lock:
+            cursor = self.conn.execute(
+                f"SELECT {', '.join(SQLITE_FIELDS)} FROM records{where} ORDER BY seq", params
+            )
+            return [dict(zip(SQLITE_FIELDS, row)) for row in cursor]
+
+    def load(self):
+        return self._select()
+
+    def load_range(self, start_date=None, end_date=None, business=None):
+        where, params = self._range_clause(start_date, end_date, business)
+        return self._select(where, params)
+
+    # ---- 按月加载 ----
+    def months(self):
+        with self._lock:
+            return [row[0] for row in self.conn.execute("SELECT DISTINCT month FROM records ORDER BY month")]
+
+    def load_months(self, months):
+        """加载指定月份的记录，按月份升序、月内按添加顺序返回（与按月分区存储一致）"""
+        months = sorted(set(months))
+        if not months:
+            return []
+        with self._lock:
+            cursor = self.conn.execute(
+                f"SELECT {', '.join(SQLITE_FIELDS)} FROM records "
+                f"WHERE month IN ({', '.join('?' * len(months))}) ORDER BY month, seq", months
+            )
+            return [dict(zip(SQLITE_FIELDS, row)) for row in cursor]
+
+    def partition_summary(self):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT month, COUNT(*), COALESCE(SUM(manual_time), 0) FROM records GROUP BY month"
+            ).fetchall()
+        return {month: (count, hours) for month, count, hours in rows}
+
+    def business_usage(self, months):
+        months = sorted(set(months))
+        if not months:
+            return {}
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT business, COUNT(*), MAX(substr(COALESCE(NULLIF(submit_date, ''), timestamp), 1, 10)) "
+                f"FROM records WHERE month IN ({', '.join('?' * len(months))}) GROUP BY business", months
+            ).fetchall()
+        return {business: (count, day) for business, count, day in rows}
+
+    def iter_range(self, start_date=None, end_date=None, business=None, newest_first=False):
+        # 按 seq 分页读取，不一次取出全部结果，也不在导出期间占用连接
+        where, params = self._range_clause(start_date, end_date, business)
+        where = f"{where} AND" if where else " WHERE"
+        op, order = ("<", "DESC") if newest_first else (">", "ASC")
+        last_seq = None
+        while True:
+            seq_clause = f" seq {op} ?" if last_seq is not None else " 1"
+            with self._lock:
+                rows = self.conn.execute(
+                    f"SELECT seq, {', '.join(SQLITE_FIELDS)} FROM records{where}{seq_clause} "
+                    f"ORDER BY seq {order} LIMIT {SQLITE_PAGE_SIZE}",
+                    params + ([last_seq] if last_seq is not None else []),
+                ).fetchall()
+            for row in rows:
+                yield dict(zip(SQLITE_FIELDS, row[1:]))
+            if len(rows) < SQLITE_PAGE_SIZE:
+                return
+            last_seq = rows[-1][0]
+
+    def summarize(self, start_date=None, end_date=None, business=None):
+        where, params = self._range_clause(start_date, end_date, business)
+        with self._lock:
+            count, total = self.conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(manual_time), 0) FROM records{where}", params
+            ).fetchone()
+        return count, total
+
+    def _execute_op(self, op):
+        kind = op.get("op")
+        if kind == "add":
+            self.conn.execute(self.INSERT_SQL, self._row_values(op["record"]))
+        elif kind == "update":
+            fields = op["fields"]
+            for field, value in fields.items():
+                sql = self.UPDATE_SQL.get(field)
+                if sql is not None:
+                    self.conn.execute(sql, (value, op["id"]))
+            if "submit_date" in fields or "timestamp" in fields:
+                # 提单日期变化时记录可能移到其他月份
+                row = self.conn.execute(
+                    "SELECT submit_date, timestamp FROM records WHERE id = ?", (op["id"],)
+                ).fetchone()
+                if row is not None:
+                    month = month_of({"submit_date": row[0], "timestamp": row[1]})
+                    self.conn.execute("UPDATE records SET month = ? WHERE id = ?", (month, op["id"]))
+        elif kind == "delete":
+            self.conn.execute(self.DELETE_SQL, (op["id"],))
+
+    def apply_ops(self, ops):
+        """一批操作在同一个事务中提交"""
+        with self._lock, self.conn:
+            for op in ops:
+                self._execute_op(op)
+
+    def append_record(self, record):
+        self.apply_ops([{"op": "add", "record": record}])
+
+    def update_record(self, record_id, fields):
+        self.apply_ops([{"op": "update", "id": record_id, "fields": fields}])
+
+    def delete_record(self, record_id):
+        self.apply_ops([{"op": "delete", "id": record_id}])
+
+    def append_records(self, records):
+        """在一个事务中逐行插入，不在内存中累积"""
+        count = 0
+
+        def rows():
+            nonlocal count
+            for record in records:
+                count += 1
+                yield self._row_values(record)
+
+        with self._lock, self.conn:
+            self.conn.executemany(self.INSERT_SQL, rows())
+        return count
+
+    def save_all(self, records):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM records")
+            self.conn.executemany(self.INSERT_SQL, (self._row_values(r) for r in records))
+
+    # ---- 多实例 ----
+    # 多个连接间的并发写入由 SQLite 自身的锁保证，这里只负责发现其他实例的提交
+    def _read_data_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def watch_paths(self):
+        # WAL 模式下其他连接的提交先写入 -wal 文件
+        return [self.db_path, self.db_path + "-wal"]
+
+    def changed_months(self, months):
+        # 无法得知其他实例改了哪些月份，重新加载调用方已加载的全部月份；
+        # 未加载月份的变化由 partition_summary 的合计反映
+        with self._lock:
+            version = self._read_data_version()
+            if version == self._data_version:
+                return []
+            self._data_version = version
+        return sorted(set(months))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def import_json_to_sqlite(data_dir, db_path):
+    """把现有的 JSON 记录（按月分区或老的 records.json）一次性导入 SQLite，返回导入条数
+
+    老的 records.json 直接读取，不会先迁移为按月分区；没有提单日期的老记录与界面加载时一样补充为当天。
+    """
+    partitioned = PartitionedStorage(data_dir)
+    if os.path.exists(partitioned.manifest_path):
+        records = partitioned.load()
+    else:
+        records = JournalStorage(data_dir).load()
+    today = date.today().strftime("%Y-%m-%d")
+    for record in records:
+        if "submit_date" not in record:
+            record["submit_date"] = today
+    # 先导入临时库再重命名，导入中断不会留下半个数据库
+    tmp_path = db_path + ".importing"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    storage = SqliteStorage(tmp_path)
+    try:
+        storage.save_all(records)
+    finally:
+        storage.close()
+    os.replace(tmp_path, db_path)
+    return len(records)
+
+
+def load_settings(data_dir):
+    """读取 settings.json，文件不存在或损坏时返回空配置"""
+    settings_file = os.path.join(data_dir, "settings.json")
+    try:
+        with open(settings_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def open_storage(data_dir):
+    """根据 settings.json 中的 storage 配置创建记录存储
+
+    默认 json 为按月分区的 JSON 文件，journal 为单个 records.json 加追加日志，sqlite 为 records.db。
+    """
+    backend = load_settings(data_dir).get("storage", "json")
+    if backend == "sqlite":
+        db_path = os.path.join(data_dir, "records.db")
+        has_json = any(os.path.exists(os.path.join(data_dir, name)) for name in ("records", "records.json"))
+        if not os.path.exists(db_path) and has_json:
+            count = import_json_to_sqlite(data_dir, db_path)
+            print(f"已从 JSON 记录导入 {count} 条记录到 {db_path}")
+        return SqliteStorage(db_path)
+    if backend == "journal":
+        return JournalStorage(data_dir)
+    return PartitionedStorage(data_dir)
@@ -0,0 +1,149 @@
+from collections import deque
+
+# 默认保留的撤销步数，可在 settings.json 中用 undo_depth 修改
+DEFAULT_UNDO_DEPTH = 100
+
+
+class UndoCommand:
+    """一次可撤销的修改，只保存差异；执行修改后再压入撤销栈"""
+
+    text = ""
+
+    def undo(self):
+        raise NotImplementedError
+
+    def redo(self):
+        raise NotImplementedError
+
+
+class RecordFieldEdit(UndoCommand):
+    """修改记录的一个字段：记录 id 与新旧值
+
+    position 为修改前记录在添加顺序中的位置（见 MainWindow.record_position），
+    修改提单日期后按月份加载会重排记录，撤销时据此放回原位置。
+    """
+
+    def __init__(self, target, record_id, field, old_value, new_value, position=None):
+        self.target = target
+        self.record_id = record_id
+        self.field = field
+        self.old_value = old_value
+        self.new_value = new_value
+        self.position = position
+        self.text = "修改记录"
+
+    def undo(self):
+        self.target.apply_record_field(self.record_id, self.field, self.old_value, self.position)
+
+    def redo(self):
+        self.target.apply_record_field(self.record_id, self.field, self.new_value)
+
+
+class RecordsRemoved(UndoCommand):
+    """删除记录：保存被删除的记录及其在添加顺序中的位置 [(位置, 记录)]，按位置升序
+
+    记录对象从记录集合中移出后只由命令引用，不另外复制。
+    """
+
+    def __init__(self, target, items, text="删除记录"):
+        self.target = target
+        self.items = items
+        self.text = text
+
+    def undo(self):
+        self.target.restore_records(self.items)
+
+    def redo(self):
+        self.target.remove_records([record["id"] for _, record in self.items])
+
+
+class RecordsAdded(RecordsRemoved):
+    """添加记录，撤销与重做的方向与删除相反"""
+
+    def __init__(self, target, items, text="添加记录"):
+        super().__init__(target, items, text)
+
+    def undo(self):
+        RecordsRemoved.redo(self)
+
+    def redo(self):
+        RecordsRemoved.undo(self)
+
+
+class BusinessListChanged(UndoCommand):
+    """业务管理对话框中的一次编辑（增删、置顶、排序），确认时作为一步压入
+
+    before / after 为修改前后的 (名称顺序, 置顶名称)，名称字符串与登记表共用。
+    """
+
+    def __init__(self, registry, before, after):
+        self.registry = registry
+        self.before = before
+        self.after = after
+        self.text = "修改业务名称"
+
+    def undo(self):
+        self.registry.update_all(*self.before)
+
+    def redo(self):
+        self.registry.update_all(*self.after)
+
+
+class UndoStack:
+    """撤销 / 重做栈
+
+    最多保留 depth 步，超出时丢弃最早的一步；压入新命令后清空重做栈。
+    撤销或重做过程中产生的修改不会再被压入栈中（is_replaying 为 True）。
+    """
+
+    def __init__(self, depth=DEFAULT_UNDO_DEPTH):
+        self.depth = max(1, int(depth))
+        self._undo = deque(maxlen=self.depth)
+        self._redo = []
+        self.is_replaying = False
+
+    def push(self, command):
+        if self.is_replaying:
+            return
+        self._undo.append(command)
+        self._redo.clear()
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo(self):
+        """撤销最近一步，返回该命令，没有可撤销的修改时返回 None"""
+        if not self._undo:
+            return None
+        # 执行成功后再移到重做栈，失败时命令留在原处，可以再次撤销
+        command = self._undo[-1]
+        self._replay(command.undo)
+        self._undo.pop()
+        self._redo.append(command)
+        return command
+
+    def redo(self):
+        if not self._redo:
+            return None
+        command = self._redo[-1]
+        self._replay(command.redo)
+        self._redo.pop()
+        self._undo.append(command)
+        return command
+
+    def _replay(self, action):
+        self.is_replaying = True
+        try:
+            action()
+        finally:
+            self.is_replaying = False
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def __len__(self):
+        return len(self._undo)
@@ -1,27 +1,55 @@
+import time
+# 尽早记录启动时刻，--profile-startup 时各阶段以此为起点
+_STARTED = time.perf_counter()
+
 import sys
 import os
-from PySide6.QtWidgets import QApplication
-from PySide6.QtCore import Qt
-from ui.main_window import MainWindow
+from core.perf_stats import perf_stats
+from core.startup_profile import startup_profiler
+
+PROFILE_FLAG = "--profile-startup"
+
 
 def main():
-    app = QApplication(sys.argv)
-    
-    # 设置应用程序样式
-    app.setStyle('Fusion')
-    
-    # Mac 特定的设置
-    if sys.platform == 'darwin':
-        # 设置 Mac 风格的菜单栏
-        app.setAttribute(Qt.AA_DontShowIconsInMenus, True)
-        # 设置应用程序名称，这会影响 Mac 的菜单栏显示
-        app.setApplicationName("工作记录工具")
-    
-    # 创建并显示主窗口
-    window = MainWindow()
-    window.show()
-    
+    # python main.py cli ...：命令行模式，不导入 Qt
+    if len(sys.argv) > 1 and sys.argv[1] == "cli":
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[2:]))
+
+    # 界面中统计热点操作的耗时，Ctrl+Shift+D 打开诊断面板查看
+    perf_stats.enabled = True
+
+    if PROFILE_FLAG in sys.argv:
+        sys.argv.remove(PROFILE_FLAG)
+        startup_profiler.start(_STARTED)
+
+    # 导入耗时单独统计，Qt 及界面模块占启动时间的大头
+    with startup_profiler.phase("导入 PySide6"):
+        from PySide6.QtWidgets import QApplication
+        from PySide6.QtCore import Qt
+    with startup_profiler.phase("导入 ui.main_window"):
+        from ui.main_window import MainWindow
+
+    with startup_profiler.phase("创建 QApplication"):
+        app = QApplication(sys.argv)
+
+        # 设置应用程序样式
+        app.setStyle('Fusion')
+
+        # Mac 特定的设置
+        if sys.platform == 'darwin':
+            # 设置 Mac 风格的菜单栏
+            app.setAttribute(Qt.AA_DontShowIconsInMenus, True)
+            # 设置应用程序名称，这会影响 Mac 的菜单栏显示
+            app.setApplicationName("工作记录工具")
+
+    # 创建并显示主窗口，数据加载等在首帧之后进行
+    with startup_profiler.phase("创建主窗口"):
+        window = MainWindow(deferred_startup=True)
+    with startup_profiler.phase("显示主窗口"):
+        window.show()
+
     sys.exit(app.exec())
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,5 +1,42 @@
 # -*- mode: python ; coding: utf-8 -*-
 
+# 应用只用到 QtCore、QtGui、QtWidgets，其余 Qt 模块不打包，缩小体积并加快启动
+EXCLUDED_MODULES = [
+    'PySide6.QtWebEngineCore', 'PySide6.QtWebEngineWidgets', 'PySide6.QtWebEngineQuick',
+    'PySide6.QtWebChannel', 'PySide6.QtWebSockets', 'PySide6.QtWebView',
+    'PySide6.QtQml', 'PySide6.QtQuick', 'PySide6.QtQuickWidgets', 'PySide6.QtQuickControls2',
+    'PySide6.QtQuick3D', 'PySide6.Qt3DCore', 'PySide6.Qt3DRender', 'PySide6.Qt3DInput',
+    'PySide6.Qt3DLogic', 'PySide6.Qt3DAnimation', 'PySide6.Qt3DExtras',
+    'PySide6.QtMultimedia', 'PySide6.QtMultimediaWidgets', 'PySide6.QtSpatialAudio',
+    'PySide6.QtCharts', 'PySide6.QtDataVisualization', 'PySide6.QtGraphs',
+    'PySide6.QtPdf', 'PySide6.QtPdfWidgets', 'PySide6.QtSvg', 'PySide6.QtSvgWidgets',
+    'PySide6.QtOpenGL', 'PySide6.QtOpenGLWidgets', 'PySide6.QtPrintSupport',
+    'PySide6.QtBluetooth', 'PySide6.QtNfc', 'PySide6.QtPositioning', 'PySide6.QtLocation',
+    'PySide6.QtSensors', 'PySide6.QtSerialPort', 'PySide6.QtSerialBus',
+    'PySide6.QtSql', 'PySide6.QtTest', 'PySide6.QtDesigner', 'PySide6.QtHelp',
+    'PySide6.QtUiTools', 'PySide6.QtRemoteObjects', 'PySide6.QtScxml',
+    'PySide6.QtStateMachine', 'PySide6.QtTextToSpeech', 'PySide6.QtHttpServer',
+    'PySide6.QtConcurrent', 'PySide6.QtAxContainer',
+    'tkinter', 'unittest', 'pydoc', 'xmlrpc',
+]
+
+# 上述模块对应的 Qt 插件、QML 目录与翻译文件
+EXCLUDED_QT_PATHS = (
+    '/qml/', '/plugins/qmltooling/', '/plugins/multimedia/', '/plugins/sqldrivers/',
+    '/plugins/position/', '/plugins/sensors/', '/plugins/webview/', '/plugins/canbus/',
+    '/plugins/designer/', '/plugins/texttospeech/', '/plugins/scxmldatamodel/',
+    '/plugins/renderers/', '/plugins/sceneparsers/', '/plugins/geometryloaders/',
+    '/plugins/renderplugins/', '/plugins/assetimporters/', '/plugins/qmllint/',
+    '/plugins/printsupport/', '/plugins/virtualkeyboard/', '/plugins/networkinformation/',
+    '/plugins/tls/', '/translations/qtwebengine', '/resources/qtwebengine',
+    'QtWebEngineProcess',
+)
+
+
+def keep_qt_entry(entry):
+    dest = '/' + entry[0].replace('\\', '/')
+    return not any(part in dest for part in EXCLUDED_QT_PATHS)
+
 
 a = Analysis(
     ['main.py'],
@@ -10,10 +47,12 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=EXCLUDED_MODULES,
     noarchive=False,
     optimize=0,
 )
+a.binaries = [entry for entry in a.binaries if keep_qt_entry(entry)]
+a.datas = [entry for entry in a.datas if keep_qt_entry(entry)]
 pyz = PYZ(a.pure)
 
 exe = EXE(
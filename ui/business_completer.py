@@ -0,0 +1,34 @@
+from PySide6.QtCore import Qt, QStringListModel
+from PySide6.QtWidgets import QCompleter
+
+# 补全列表最多显示的条数
+MAX_COMPLETIONS = 20
+
+
+class BusinessCompleter(QCompleter):
+    """业务名称补全器
+
+    每次输入都从 BusinessNameIndex 查询，支持中文前缀、子串、拼音全拼/首字母和近似匹配，
+    结果已按匹配程度与使用热度排好序，补全器只负责原样显示，不再自行过滤。
+    """
+
+    def __init__(self, business_index, parent=None):
+        super().__init__(parent)
+        self.business_index = business_index
+        self.completion_model = QStringListModel(self)
+        self.setModel(self.completion_model)
+        self.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+        self.setMaxVisibleItems(10)
+
+    def attach(self, line_edit):
+        # 只响应用户输入，选中补全项后回填文本时不再触发查询
+        line_edit.textEdited.connect(self.update_completions)
+
+    def update_completions(self, text):
+        names = self.business_index.search(text, MAX_COMPLETIONS)
+        self.completion_model.setStringList(names)
+        if names:
+            self.complete()
+        else:
+            self.popup().hide()
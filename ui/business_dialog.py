@@ -1,200 +1,455 @@
-import json
 import os
-import sys
 from PySide6.QtWidgets import (
-    QDialog, QVBoxLayout, QHBoxLayout, QListWidget,
-    QPushButton, QLineEdit, QMessageBox
+    QDialog, QVBoxLayout, QHBoxLayout, QListView, QAbstractItemView, QStyledItemDelegate,
+    QPushButton, QLineEdit, QLabel, QDialogButtonBox, QMessageBox
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QItemSelection, QItemSelectionModel
+from PySide6.QtGui import QKeySequence, QShortcut, QFont, QPalette
+from core.business_registry import BusinessRegistry, write_business_names
+from core.file_cache import data_file_cache, read_json
+from core.paths import get_app_data_dir
+from core.pinyin import initials
+from core.undo_stack import BusinessListChanged
+
+# 使用次数的数据角色
+USAGE_ROLE = Qt.UserRole + 1
+# 删除确认框中最多列出的名称数
+MAX_DELETE_NAMES_SHOWN = 10
+# 列表分批排版的行数，名称很多时刷新不阻塞输入
+LIST_BATCH_SIZE = 500
+
+
+class BusinessListModel(QAbstractListModel):
+    """业务管理对话框的名称列表（对话框内的工作副本，确认后才写回登记表）
+
+    names 为全部名称的顺序，pinned 为置顶的名称；设置搜索词后只显示匹配的名称，
+    搜索词在上一次的基础上追加时只在上次的结果中继续筛选。
+    没有搜索词时可以拖动排序，置顶与未置顶的名称只能在各自的范围内移动（business.json 中置顶的在前）。
+    """
+
+    def __init__(self, names=(), pinned=(), usage_count=None, parent=None):
+        super().__init__(parent)
+        self.names = list(names)
+        # 与 names 同步维护的集合，判断名称是否存在时不扫描列表；拖动排序与置顶只改变顺序，不需要更新
+        self._name_set = set(self.names)
+        self.pinned = set(pinned)
+        self.usage_count = usage_count or (lambda name: 0)
+        self.query = ""
+        # 当前显示的名称，没有搜索词时即 names
+        self._rows = self.names
+        # 名称 -> 显示的行号，按需生成，列表变化时失效
+        self._row_of = None
+        # 名称 -> 搜索用的文字（小写名称与拼音首字母）
+        self._search_keys = {}
+        self._bold = QFont()
+        self._bold.setBold(True)
+
+    # ---- 模型接口 ----
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return name
+        if role == USAGE_ROLE:
+            return self.usage_count(name)
+        if name in self.pinned:
+            if role == Qt.FontRole:
+                return self._bold
+            if role == Qt.ToolTipRole:
+                return "已置顶"
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            # 名称之间的空隙可以放下拖动的名称
+            return Qt.ItemIsDropEnabled if not self.query else Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if not self.query:
+            flags |= Qt.ItemIsDragEnabled
+        return flags
+
+    def supportedDropActions(self):
+        return Qt.MoveAction
+
+    def moveRows(self, source_parent, source_row, count, destination_parent, destination_child):
+        """拖动排序时由视图调用，只在没有搜索词时移动"""
+        if self.query or source_parent.isValid() or destination_parent.isValid():
+            return False
+        if source_row <= destination_child <= source_row + count:
+            return False
+        if not self._can_move(source_row, count, destination_child):
+            return False
+        if not self.beginMoveRows(QModelIndex(), source_row, source_row + count - 1,
+                                  QModelIndex(), destination_child):
+            return False
+        moved = self.names[source_row:source_row + count]
+        del self.names[source_row:source_row + count]
+        if destination_child > source_row:
+            destination_child -= count
+        self.names[destination_child:destination_child] = moved
+        self._row_of = None
+        self.endMoveRows()
+        return True
+
+    def _can_move(self, source_row, count, destination_child):
+        """移动的名称须同为置顶或同为未置顶，且不越过另一组：置顶的前面不能是未置顶的，反之亦然"""
+        moved = self.names[source_row:source_row + count]
+        pinned = moved[0] in self.pinned
+        if any((name in self.pinned) != pinned for name in moved):
+            return False
+        # 放下位置不在被移动的名称之间（调用方已排除），前后的名称都不是被移动的
+        if pinned:
+            # 放下位置之前的名称须为置顶
+            return destination_child == 0 or self.names[destination_child - 1] in self.pinned
+        # 放下位置之后的名称须为未置顶
+        return destination_child >= len(self.names) or self.names[destination_child] not in self.pinned
+
+    # ---- 查询 ----
+    def __contains__(self, name):
+        return name in self._name_set
+
+    def name_at(self, row):
+        return self._rows[row]
+
+    def row_of(self, name):
+        """名称显示的行号，未显示时返回 -1"""
+        if self._row_of is None:
+            self._row_of = {item: row for row, item in enumerate(self._rows)}
+        return self._row_of.get(name, -1)
+
+    def visible_count(self):
+        return len(self._rows)
+
+    def _search_key(self, name):
+        key = self._search_keys.get(name)
+        if key is None:
+            key = self._search_keys[name] = f"{name.casefold()}\n{initials(name)}"
+        return key
+
+    def _filtered(self, names, query):
+        search_key = self._search_key
+        return [name for name in names if query in search_key(name)]
+
+    def set_query(self, text):
+        """按名称子串或拼音首字母筛选，不区分大小写"""
+        query = text.strip().casefold()
+        if query == self.query:
+            return
+        self.beginResetModel()
+        if not query:
+            self._rows = self.names
+        elif self.query and self.query in query:
+            # 搜索词在原来的基础上变长，结果只会变少
+            self._rows = self._filtered(self._rows, query)
+        else:
+            self._rows = self._filtered(self.names, query)
+        self.query = query
+        self._row_of = None
+        self.endResetModel()
+
+    # ---- 修改 ----
+    def _refresh(self):
+        """名称列表变化后按当前搜索词重新生成显示的名称"""
+        self.beginResetModel()
+        self._rows = self._filtered(self.names, self.query) if self.query else self.names
+        self._row_of = None
+        self.endResetModel()
+
+    def add_name(self, name):
+        self.names.append(name)
+        self._name_set.add(name)
+        if not self.query:
+            row = len(self.names) - 1
+            # _rows 即 names，名称已追加，只通知视图
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._row_of = None
+            self.endInsertRows()
+        elif self.query in self._search_key(name):
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows))
+            self._rows.append(name)
+            self._row_of = None
+            self.endInsertRows()
+
+    def remove_names(self, names):
+        removed = set(names)
+        self.names = [name for name in self.names if name not in removed]
+        self._name_set -= removed
+        self.pinned -= removed
+        self._refresh()
+
+    def pin_names(self, names):
+        """置顶：按原来的先后移到最前并标记"""
+        moved = set(names)
+        self.names = [name for name in self.names if name in moved] + [
+            name for name in self.names if name not in moved]
+        self.pinned |= moved
+        self._refresh()
+
+    def unpin_names(self, names):
+        self.pinned -= set(names)
+        if self._rows:
+            self.dataChanged.emit(self.index(0), self.index(len(self._rows) - 1),
+                                  [Qt.FontRole, Qt.ToolTipRole])
+
+
+class BusinessItemDelegate(QStyledItemDelegate):
+    """名称右侧显示在记录中的使用次数"""
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        count = index.data(USAGE_ROLE)
+        painter.save()
+        painter.setPen(option.palette.color(QPalette.PlaceholderText))
+        painter.drawText(option.rect.adjusted(0, 0, -8, 0), Qt.AlignRight | Qt.AlignVCenter,
+                         f"{count} 次" if count else "未使用")
+        painter.restore()
 
-def get_app_data_dir():
-    """获取应用程序数据目录"""
-    # 所有平台统一使用用户主目录的 .bkitsm/data
-    home = os.path.expanduser('~')
-    return os.path.join(home, '.bkitsm', 'data')
 
 class BusinessDialog(QDialog):
-    def __init__(self, parent=None):
+    """业务名称管理
+
+    对话框中的增删、置顶与拖动排序只修改工作副本，点击“确定”时一次写回登记表
+    （只保存一次、作为一步撤销），取消则全部放弃。
+    """
+
+    def __init__(self, parent=None, registry=None, undo_stack=None):
         super().__init__(parent)
         self.setWindowTitle("业务名称管理")
         self.setMinimumSize(400, 500)
-        
-        self.business_names = []
-        self.load_business_names()
-        
+
+        # 通常与主窗口共用登记表，由主窗口负责保存；单独使用时自行加载和保存
+        self.owns_registry = registry is None
+        if registry is None:
+            registry = BusinessRegistry()
+            self.load_business_names(registry)
+        self.registry = registry
+        # 与主窗口共用撤销栈，确认后的修改可以在主窗口中撤销
+        self.undo_stack = undo_stack
+        self.model = BusinessListModel(registry.names(), registry.pinned_names(), registry.usage_count, self)
+
+        # 样式由应用级主题提供 (ui/theme.py)，按对象名区分对话框内的按钮样式
+        self.setObjectName("businessDialog")
         self.init_ui()
-        self.apply_styles()
-    
+
     def init_ui(self):
         layout = QVBoxLayout(self)
-        
+
         # 添加业务名称区域
         add_layout = QHBoxLayout()
         self.business_input = QLineEdit()
         self.business_input.setPlaceholderText("输入业务名称")
+        self.business_input.returnPressed.connect(self.add_business)
         add_layout.addWidget(self.business_input)
-        
+
         add_button = QPushButton("添加")
         add_button.clicked.connect(self.add_business)
         add_layout.addWidget(add_button)
-        
+
         layout.addLayout(add_layout)
-        
-        # 业务名称列表
-        self.list_widget = QListWidget()
-        self.update_list()
-        layout.addWidget(self.list_widget)
-        
-        # 操作按钮区域
+
+        # 搜索框：每次输入即时筛选
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("搜索业务名称（支持拼音首字母）")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(self.apply_search)
+        layout.addWidget(self.search_input)
+
+        # 业务名称列表：可多选，没有搜索词时拖动排序
+        self.list_view = QListView()
+        self.list_view.setModel(self.model)
+        self.list_view.setItemDelegate(BusinessItemDelegate(self.list_view))
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setLayoutMode(QListView.Batched)
+        self.list_view.setBatchSize(LIST_BATCH_SIZE)
+        self.list_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.list_view.setDragDropMode(QAbstractItemView.InternalMove)
+        self.list_view.setDefaultDropAction(Qt.MoveAction)
+        layout.addWidget(self.list_view)
+
+        self.count_label = QLabel()
+        layout.addWidget(self.count_label)
+        self.update_count_label()
+
+        # 操作按钮区域，均作用于全部选中的名称
         button_layout = QHBoxLayout()
-        
+
         delete_button = QPushButton("删除")
         delete_button.clicked.connect(self.delete_business)
         button_layout.addWidget(delete_button)
-        
+
         top_button = QPushButton("置顶")
         top_button.clicked.connect(self.top_business)
         button_layout.addWidget(top_button)
-        
+
+        unpin_button = QPushButton("取消置顶")
+        unpin_button.clicked.connect(self.unpin_business)
+        button_layout.addWidget(unpin_button)
+
         layout.addLayout(button_layout)
-    
-    def apply_styles(self):
-        # 检测是否为暗黑主题
-        is_dark_mode = False
-        if sys.platform == 'darwin':
-            # 在 Mac 上检测系统主题
-            try:
-                from Foundation import NSAppearance
-                appearance = NSAppearance.currentAppearance()
-                is_dark_mode = appearance.name().localizedString().lower().contains('dark')
-            except:
-                pass
-
-        # 根据主题设置颜色
-        if is_dark_mode:
-            # 暗黑主题颜色
-            bg_color = "#2c2c2c"
-            text_color = "#ffffff"
-            input_bg = "#3c3c3c"
-            border_color = "#4c4c4c"
-            button_bg = "#3a84ff"
-            button_hover = "#2b6cd9"
-            list_selected_bg = "#3a84ff"
-            list_selected_text = "#ffffff"
-        else:
-            # 亮色主题颜色
-            bg_color = "#f5f6fa"
-            text_color = "#333333"
-            input_bg = "#ffffff"
-            border_color = "#dcdee5"
-            button_bg = "#3a84ff"
-            button_hover = "#2b6cd9"
-            list_selected_bg = "#e1ecff"
-            list_selected_text = "#3a84ff"
-
-        self.setStyleSheet(f"""
-            QDialog {{
-                background-color: {bg_color};
-                color: {text_color};
-            }}
-            QPushButton {{
-                background-color: {button_bg};
-                color: white;
-                border: none;
-                padding: 5px 15px;
-                border-radius: 3px;
-            }}
-            QPushButton:hover {{
-                background-color: {button_hover};
-            }}
-            QLineEdit {{
-                padding: 5px;
-                border: 1px solid {border_color};
-                border-radius: 3px;
-                background-color: {input_bg};
-                color: {text_color};
-            }}
-            QListWidget {{
-                border: 1px solid {border_color};
-                border-radius: 3px;
-                background-color: {input_bg};
-                color: {text_color};
-            }}
-            QListWidget::item {{
-                padding: 5px;
-            }}
-            QListWidget::item:selected {{
-                background-color: {list_selected_bg};
-                color: {list_selected_text};
-            }}
-        """)
-    
-    def load_business_names(self):
+
+        delete_shortcut = QShortcut(QKeySequence.Delete, self.list_view)
+        delete_shortcut.setContext(Qt.WidgetShortcut)
+        delete_shortcut.activated.connect(self.delete_business)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box.button(QDialogButtonBox.Ok).setText("确定")
+        button_box.button(QDialogButtonBox.Cancel).setText("取消")
+        # 回车用于添加业务名称，不触发确定
+        button_box.button(QDialogButtonBox.Ok).setAutoDefault(False)
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+    def load_business_names(self, registry):
         try:
             data_dir = get_app_data_dir()
-            business_file = os.path.join(data_dir, "business.json")
-            if os.path.exists(business_file):
-                with open(business_file, "r", encoding="utf-8") as f:
-                    self.business_names = json.load(f)
+            # 与主窗口共用缓存，文件未变化时不再读盘
+            names = data_file_cache.get(os.path.join(data_dir, "business.json"), read_json, [])
+            pinned = data_file_cache.get(os.path.join(data_dir, "business_pins.json"), read_json, [])
+            registry.replace_all(names, pinned)
         except Exception as e:
             QMessageBox.warning(self, "警告", f"加载业务名称失败: {str(e)}")
-    
+
     def save_business_names(self):
+        # 共用登记表时由主窗口在变更通知中保存
+        if not self.owns_registry:
+            return
         data_dir = get_app_data_dir()
         os.makedirs(data_dir, exist_ok=True)
         try:
-            business_file = os.path.join(data_dir, "business.json")
-            with open(business_file, "w", encoding="utf-8") as f:
-                json.dump(self.business_names, f, ensure_ascii=False, indent=2)
+            base = self.registry.mark_synced()
+            write_business_names(data_dir, self.registry.names(), self.registry.pinned_names(), base)
         except Exception as e:
             QMessageBox.warning(self, "警告", f"保存业务名称失败: {str(e)}")
-    
-    def update_list(self):
-        self.list_widget.clear()
-        self.list_widget.addItems(self.business_names)
-    
+
+    # ---- 工作副本 ----
+    def edited_names(self):
+        """对话框中修改后的 (名称顺序, 置顶名称)，置顶的名称排在最前（取消置顶的名称随之移到置顶名称之后）"""
+        pinned, unpinned = [], []
+        for name in self.model.names:
+            (pinned if name in self.model.pinned else unpinned).append(name)
+        return pinned + unpinned, pinned
+
+    def has_changes(self):
+        names, pinned = self.edited_names()
+        return names != self.registry.names() or pinned != self.registry.pinned_names()
+
+    def accept(self):
+        """一次写回登记表并保存，整个编辑作为一步撤销"""
+        if self.has_changes():
+            before = (self.registry.names(), self.registry.pinned_names())
+            after = self.edited_names()
+            self.registry.update_all(*after)
+            if self.undo_stack is not None:
+                self.undo_stack.push(BusinessListChanged(self.registry, before, after))
+            self.save_business_names()
+        super().accept()
+
+    def reject(self):
+        if self.has_changes():
+            reply = QMessageBox.question(
+                self, "放弃修改", "放弃对业务名称的修改吗？",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+            )
+            if reply != QMessageBox.Yes:
+                return
+        super().reject()
+
+    # ---- 列表 ----
+    def apply_search(self, text):
+        self.model.set_query(text)
+        self.update_count_label()
+
+    def update_count_label(self):
+        total = len(self.model.names)
+        shown = self.model.visible_count()
+        text = f"共 {total} 个业务名称，置顶 {len(self.model.pinned)} 个"
+        if shown != total:
+            text += f"，显示 {shown} 个"
+        elif total > 1:
+            text += "；拖动可调整顺序"
+        self.count_label.setText(text)
+
+    def selected_names(self):
+        """选中的名称，按显示顺序"""
+        # 按选区展开行号，全选上万个名称时不逐个生成索引
+        rows = set()
+        for selection_range in self.list_view.selectionModel().selection():
+            rows.update(range(selection_range.top(), selection_range.bottom() + 1))
+        return [self.model.name_at(row) for row in sorted(rows)]
+
+    def select_names(self, names):
+        """重新选中名称（列表刷新后），连续的行合并为一个选区"""
+        rows = sorted(row for row in map(self.model.row_of, names) if row >= 0)
+        selection = QItemSelection()
+        start = previous = None
+        for row in rows + [None]:
+            if start is not None and row != previous + 1:
+                selection.select(self.model.index(start), self.model.index(previous))
+                start = None
+            if start is None:
+                start = row
+            previous = row
+        self.list_view.selectionModel().select(selection, QItemSelectionModel.ClearAndSelect)
+        if rows:
+            self.list_view.selectionModel().setCurrentIndex(self.model.index(rows[0]), QItemSelectionModel.NoUpdate)
+            self.list_view.scrollTo(self.model.index(rows[0]))
+
+    # ---- 操作 ----
     def add_business(self):
         business = self.business_input.text().strip()
         if not business:
             QMessageBox.warning(self, "警告", "请输入业务名称")
             return
-        
-        if business in self.business_names:
+
+        if business in self.model:
             QMessageBox.warning(self, "警告", "该业务名称已存在")
             return
-        
-        self.business_names.append(business)
-        self.save_business_names()
-        self.update_list()
+
+        self.model.add_name(business)
         self.business_input.clear()
-    
+        self.select_names([business])
+        self.update_count_label()
+
     def delete_business(self):
-        current_item = self.list_widget.currentItem()
-        if not current_item:
+        names = self.selected_names()
+        if not names:
             QMessageBox.warning(self, "警告", "请选择要删除的业务名称")
             return
-        
-        business = current_item.text()
+
+        shown = "\n".join(names[:MAX_DELETE_NAMES_SHOWN])
+        if len(names) > MAX_DELETE_NAMES_SHOWN:
+            shown += f"\n… 等 {len(names)} 个"
         reply = QMessageBox.question(
             self, "确认删除",
-            f'确定要删除业务名称"{business}"吗？',
+            f"确定要删除以下业务名称吗？\n{shown}",
             QMessageBox.Yes | QMessageBox.No,
             QMessageBox.No
         )
-        
+
         if reply == QMessageBox.Yes:
-            self.business_names.remove(business)
-            self.save_business_names()
-            self.update_list()
-    
+            self.model.remove_names(names)
+            self.update_count_label()
+
     def top_business(self):
-        current_item = self.list_widget.currentItem()
-        if not current_item:
+        names = self.selected_names()
+        if not names:
             QMessageBox.warning(self, "警告", "请选择要置顶的业务名称")
             return
-        
-        business = current_item.text()
-        self.business_names.remove(business)
-        self.business_names.insert(0, business)
-        self.save_business_names()
-        self.update_list()
\ No newline at end of file
+
+        self.model.pin_names(names)
+        self.select_names(names)
+        self.update_count_label()
+
+    def unpin_business(self):
+        names = self.selected_names()
+        if not names:
+            QMessageBox.warning(self, "警告", "请选择要取消置顶的业务名称")
+            return
+
+        self.model.unpin_names(names)
+        self.update_count_label()
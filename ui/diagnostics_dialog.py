@@ -0,0 +1,108 @@
+from datetime import datetime
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QMessageBox
+)
+from PySide6.QtCore import Qt, QTimer
+from core.perf_stats import perf_stats
+
+# 面板打开期间自动刷新的间隔
+REFRESH_INTERVAL_MS = 1000
+STATS_COLUMNS = (("操作", None), ("次数", "count"), ("p50 (ms)", "p50_ms"),
+                 ("p95 (ms)", "p95_ms"), ("最大 (ms)", "max_ms"), ("最近 (ms)", "last_ms"))
+
+
+def format_bytes(value):
+    if value is None:
+        return "未知"
+    return f"{value / (1024 * 1024):.1f} MB"
+
+
+class DiagnosticsDialog(QDialog):
+    """性能诊断面板：各热点操作的耗时统计、进程内存与记录条数
+
+    info_provider 返回附加信息的字典（记录条数等），同时写入导出的快照。
+    """
+
+    def __init__(self, parent=None, info_provider=None):
+        super().__init__(parent)
+        self.setWindowTitle("性能诊断")
+        self.setMinimumSize(640, 360)
+        self.info_provider = info_provider or dict
+
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel()
+        self.summary_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout.addWidget(self.summary_label)
+
+        self.stats_table = QTableWidget(0, len(STATS_COLUMNS))
+        self.stats_table.setHorizontalHeaderLabels([title for title, _ in STATS_COLUMNS])
+        self.stats_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.stats_table.verticalHeader().setVisible(False)
+        self.stats_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.stats_table)
+
+        button_layout = QHBoxLayout()
+        reset_button = QPushButton("清空统计")
+        reset_button.clicked.connect(self.reset_stats)
+        button_layout.addWidget(reset_button)
+        dump_button = QPushButton("导出快照")
+        dump_button.clicked.connect(self.dump_snapshot)
+        button_layout.addWidget(dump_button)
+        button_layout.addStretch()
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.close)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start(REFRESH_INTERVAL_MS)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        snapshot = perf_stats.snapshot(self.info_provider())
+        parts = [f"进程内存 (RSS): {format_bytes(snapshot['rss_bytes'])}"]
+        if "record_count" in snapshot:
+            parts.append(f"已加载记录: {snapshot['record_count']} 条")
+        if "total_record_count" in snapshot:
+            parts.append(f"全部记录: {snapshot['total_record_count']} 条")
+        if not perf_stats.enabled:
+            parts.append("耗时统计未启用")
+        self.summary_label.setText("    ".join(parts))
+
+        operations = snapshot["operations"]
+        self.stats_table.setRowCount(len(operations))
+        for row, (name, stats) in enumerate(operations.items()):
+            for column, (_, key) in enumerate(STATS_COLUMNS):
+                if key is None:
+                    item = QTableWidgetItem(name)
+                else:
+                    value = stats[key]
+                    item = QTableWidgetItem(str(value) if key == "count" else f"{value:.2f}")
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.stats_table.setItem(row, column, item)
+
+    def reset_stats(self):
+        perf_stats.reset()
+        self.refresh()
+
+    def dump_snapshot(self):
+        default_name = f"perf-snapshot-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        path, _ = QFileDialog.getSaveFileName(self, "导出性能快照", default_name, "JSON 文件 (*.json)")
+        if not path:
+            return
+        try:
+            perf_stats.dump(path, self.info_provider())
+        except Exception as e:
+            QMessageBox.warning(self, "警告", f"导出快照失败: {str(e)}")
+            return
+        QMessageBox.information(self, "提示", f"性能快照已导出到 {path}")
@@ -1,26 +1,53 @@
 import os
 import json
 import sys
-from datetime import datetime
+from datetime import datetime, date
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QLineEdit, QPushButton, QTableWidget,
-    QTableWidgetItem, QMessageBox, QCompleter,
+    QLabel, QLineEdit, QPushButton, QTableView,
+    QAbstractItemView, QMessageBox,
     QComboBox, QGridLayout, QSizePolicy, QSpacerItem,
-    QHeaderView, QApplication, QDateEdit
+    QHeaderView, QApplication, QDateEdit, QCheckBox, QFileDialog
 )
-from PySide6.QtCore import Qt, QStringListModel, QSize, QCoreApplication, QDate
-from PySide6.QtGui import QColor, QFont, QIcon
-from .business_dialog import BusinessDialog
-
-def get_app_data_dir():
-    """获取应用程序数据目录"""
-    # 所有平台统一使用用户主目录的 .bkitsm/data
-    home = os.path.expanduser('~')
-    return os.path.join(home, '.bkitsm', 'data')
+from PySide6.QtCore import Qt, QSize, QCoreApplication, QDate, QEvent, QFileSystemWatcher, QTimer
+from PySide6.QtGui import QColor, QFont, QIcon, QKeySequence, QShortcut
+from core.business_index import BusinessNameIndex
+from core.business_registry import BusinessRegistry, ADDED, REMOVED, MOVED_TO_TOP, RESET, EDITED
+from core.exporters import EXPORT_FORMATS, create_exporter, export_to_file, user_templates
+from core.file_cache import data_file_cache, read_json, read_lines
+from core.line_template import TemplateError
+from core.paths import get_app_data_dir
+from core.perf_stats import perf_stats
+from core.public_matcher import PublicBusinessMatcher, DEFAULT_PUBLIC_INI
+from core.record_index import RecordFilter
+from core.record_rules import RecordValidationError, build_record, check_task, parse_manual_time, normalize_submit_date
+from core.record_store import RecordStore
+from core.record_text import generate_record_text, parse_record_lines
+from core.reports import RecordColumns, DEFAULT_WORKDAY_HOURS
+from core.startup_profile import startup_profiler
+from core.storage import open_storage, load_settings, month_of, months_in_range
+from core.undo_stack import UndoStack, DEFAULT_UNDO_DEPTH, RecordFieldEdit, RecordsAdded, RecordsRemoved
+from .business_completer import BusinessCompleter
+from .persistence import PersistenceWorker
+from .record_model import RecordTableModel, RecordSortProxy, DeleteButtonDelegate, COLUMNS, ACTION_COLUMN, MAX_INCREMENTAL_ROWS
+from .theme import theme_manager, AUTO
+
+# 表头按内容计算列宽时采样的行数
+RESIZE_CONTENTS_PRECISION = 200
+# 批量粘贴时提示框中最多列出的错误行数
+MAX_PASTE_ERRORS_SHOWN = 20
+# 数据文件被其他实例修改后，等待连续变化结束再检查的时间
+EXTERNAL_RELOAD_DELAY_MS = 300
+# 打开性能诊断面板的快捷键
+DIAGNOSTICS_SHORTCUT = "Ctrl+Shift+D"
+# 切换亮色 / 暗色主题的快捷键
+THEME_SHORTCUT = "Ctrl+Shift+T"
+# 重做的快捷键，平台默认的重做键（如 Windows 的 Ctrl+Y）同样可用
+REDO_SHORTCUT = "Ctrl+Shift+Z"
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, deferred_startup=False):
+        """deferred_startup 为 True 时先显示窗口，首帧绘制后再加载数据"""
         super().__init__()
         self.setWindowTitle("工作记录工具")
         self.setMinimumSize(800, 700)
@@ -43,13 +70,47 @@ class MainWindow(QMainWindow):
         except Exception as e:
             pass
 
-        # 初始化数据
-        self.records = []
-        self.business_names = []
+        # 初始化数据，记录按 id 索引，删除和编辑无需线性查找
+        self.records = RecordStore()
+        # 按月分区存储时已加载的月份（None 表示一次加载全部），未加载月份的 (条数, 耗时) 合计
+        self.loaded_months = None
+        self.archived_totals = (0, 0.0)
+        # 业务名称登记表，与业务管理对话框共用，变更时只更新受影响的条目
+        self.business_registry = BusinessRegistry()
+        self.business_registry.subscribe(self.on_business_registry_changed)
+        # 业务名称补全索引，包含业务名称与公共业务，按记录中的使用情况排序
+        self.business_index = BusinessNameIndex(usage=self.business_registry)
         self.data_dir = get_app_data_dir()
-        # 确保数据目录与核心配置文件存在
-        self.ensure_data_environment()
-
+        self.public_matcher = None
+        # 筛选栏在表格之前创建，创建前不需要同步业务下拉框
+        self.filter_business_combo = None
+        with startup_profiler.phase("  准备数据目录与存储"):
+            # 确保数据目录与核心配置文件存在
+            self.ensure_data_environment()
+            # 记录存储：默认按月分区的 JSON 文件，settings.json 中可切换为追加日志或 SQLite
+            self.storage = open_storage(self.data_dir)
+            # 保存操作交给后台线程合并写入，界面线程不再等待磁盘
+            self.persistence = PersistenceWorker(self.storage, parent=self)
+            self.persistence.pendingChanged.connect(self.update_save_status)
+            self.persistence.writeFinished.connect(self.update_save_status)
+            self.persistence.writeFailed.connect(self.on_save_failed)
+            self.save_failed = False
+            # 记录与业务名称修改的撤销栈，只保存每次修改的差异
+            self.undo_stack = UndoStack(load_settings(self.data_dir).get("undo_depth", DEFAULT_UNDO_DEPTH))
+
+        # 样式表在创建子控件之前设置，子控件创建时只需套用一次样式
+        with startup_profiler.phase("  应用样式表"):
+            self.apply_styles()
+
+        with startup_profiler.phase("  构建界面"):
+            self.build_ui()
+
+        # 数据加载放在首帧之后，窗口先显示出来
+        self.startup_pending = deferred_startup
+        if not deferred_startup:
+            self.finish_startup()
+
+    def build_ui(self):
         # 创建主窗口部件
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
@@ -57,12 +118,9 @@ class MainWindow(QMainWindow):
         self.layout.setSpacing(15)
         self.layout.setContentsMargins(20, 20, 20, 20)
 
-        # 创建输入区域 (移到加载数据之前)
+        # 创建输入区域
         self.create_input_area()
 
-        # 初始化数据 (移到创建输入区域之后)
-        self.load_data()
-
         # 创建今日记录标签
         today_records_label = QLabel("今日记录")
         today_records_label.setObjectName("sectionLabel")
@@ -80,10 +138,19 @@ class MainWindow(QMainWindow):
         self.sort_business_button.setChecked(False) # Start with ascending
         self.sort_business_button.clicked.connect(self.sort_records_by_business)
         today_records_layout.addWidget(self.sort_business_button, alignment=Qt.AlignBottom)
+
+        # 恢复按添加顺序显示
+        self.default_order_button = QPushButton("默认排序")
+        self.default_order_button.setMaximumWidth(80)
+        self.default_order_button.clicked.connect(self.reset_record_order)
+        today_records_layout.addWidget(self.default_order_button, alignment=Qt.AlignBottom)
         today_records_layout.addStretch() # 将按钮推到左边，占满剩余空间
 
         self.layout.addWidget(today_records_container)
 
+        # 创建筛选栏
+        self.create_filter_bar()
+
         # 创建表格
         self.create_table()
 
@@ -98,15 +165,74 @@ class MainWindow(QMainWindow):
         # 创建操作按钮区域
         self.create_action_buttons_area()
 
-        # 应用样式
-        self.apply_styles()
+        # 创建状态栏，显示待写入数量与写入耗时
+        self.create_status_bar()
 
         # 设置回车键触发添加记录
         self.manual_time_input.returnPressed.connect(self.add_record)
 
-        # 初始化表格和统计信息
-        self.update_table()
-        self.update_stats()
+        # 多行提单文本粘贴到表格或输入框时批量添加
+        paste_shortcut = QShortcut(QKeySequence.Paste, self.table)
+        paste_shortcut.setContext(Qt.WidgetShortcut)
+        paste_shortcut.activated.connect(self.paste_records)
+        for widget in (self.business_combo.lineEdit(), self.task_input, self.manual_time_input):
+            widget.installEventFilter(self)
+
+        # 撤销 / 重做记录与业务名称的修改；输入框获得焦点时仍撤销输入框中的文字
+        undo_shortcut = QShortcut(QKeySequence.Undo, self)
+        undo_shortcut.activated.connect(self.undo)
+        for sequence in dict.fromkeys([QKeySequence(REDO_SHORTCUT), QKeySequence(QKeySequence.Redo)]):
+            redo_shortcut = QShortcut(sequence, self)
+            redo_shortcut.activated.connect(self.redo)
+
+        # 隐藏的性能诊断面板
+        self.diagnostics_dialog = None
+        diagnostics_shortcut = QShortcut(QKeySequence(DIAGNOSTICS_SHORTCUT), self)
+        diagnostics_shortcut.activated.connect(self.show_diagnostics_dialog)
+
+        theme_shortcut = QShortcut(QKeySequence(THEME_SHORTCUT), self)
+        theme_shortcut.activated.connect(self.toggle_theme)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.KeyPress and event.matches(QKeySequence.Paste):
+            text = QApplication.clipboard().text()
+            # 只有多行文本按批量粘贴处理，单行仍粘贴到输入框
+            if sum(1 for line in text.splitlines() if line.strip()) > 1:
+                self.paste_records(text)
+                return True
+        return super().eventFilter(obj, event)
+
+    def finish_startup(self):
+        """加载数据并填充表格、统计，开始监视数据文件"""
+        self.startup_pending = False
+        with startup_profiler.phase("加载数据"):
+            self.load_data()
+        with startup_profiler.phase("填充表格与统计"):
+            self.update_table()
+            self.update_stats()
+        with startup_profiler.phase("监视数据文件"):
+            # 监视 public.ini、business.json 的变化，文件未变时直接使用缓存；
+            # 同时监视数据目录与记录文件，发现其他实例的修改后增量合并
+            self.external_reload_timer = QTimer(self)
+            self.external_reload_timer.setSingleShot(True)
+            self.external_reload_timer.timeout.connect(self.reload_external_changes)
+            self.file_watcher = QFileSystemWatcher(self)
+            self.file_watcher.fileChanged.connect(self.on_data_file_changed)
+            self.file_watcher.directoryChanged.connect(self.on_data_dir_changed)
+            self.watch_data_files()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.startup_pending:
+            # 首帧已绘制，剩余初始化在下一轮事件循环中进行
+            self.startup_pending = False
+            startup_profiler.mark("首帧绘制")
+            QTimer.singleShot(0, self.finish_deferred_startup)
+
+    def finish_deferred_startup(self):
+        self.finish_startup()
+        startup_profiler.mark("启动完成")
+        startup_profiler.print_report()
 
     def create_input_area(self):
         # 创建输入区域容器
@@ -132,6 +258,9 @@ class MainWindow(QMainWindow):
         self.business_combo.setMinimumWidth(250)
         self.business_combo.setMinimumHeight(28)
         self.business_combo.setPlaceholderText("选择或输入业务名称")
+        self.business_completer = BusinessCompleter(self.business_index, self)
+        self.business_combo.setCompleter(self.business_completer)
+        self.business_completer.attach(self.business_combo.lineEdit())
         self.update_business_combo()
         self.add_button = QPushButton("添加记录")
         self.add_button.setMinimumHeight(28)
@@ -199,17 +328,22 @@ class MainWindow(QMainWindow):
 
         self.layout.addWidget(input_container)
 
-    def update_business_combo(self):
-        self.business_combo.clear()
-        # 根据截图，业务名称下拉框显示所有业务名称，不区分是否在记录中使用
-        self.business_combo.addItems(self.business_names)
-
 
     def create_table(self):
         # 5列：业务、提单时间、任务、耗时、操作
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["业务", "提单时间", "任务", "耗时", "操作"])
+        # 使用模型/视图，只绘制可见行，增删改只通知受影响的行
+        self.record_model = RecordTableModel(self.records, self)
+        self.record_model.editRequested.connect(self.on_table_item_changed)
+        # 排序只在视图层进行，不改变记录的保存顺序
+        self.sort_proxy = RecordSortProxy(self)
+        self.sort_proxy.setSourceModel(self.record_model)
+        self.table = QTableView()
+        self.table.setModel(self.sort_proxy)
+
+        self.delete_delegate = DeleteButtonDelegate(self.table)
+        self.delete_delegate.deleteRequested.connect(self.delete_record)
+        self.table.setItemDelegateForColumn(ACTION_COLUMN, self.delete_delegate)
+        self.table.setMouseTracking(True)
 
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)  # 业务名称
@@ -219,62 +353,157 @@ class MainWindow(QMainWindow):
         header.setSectionResizeMode(4, QHeaderView.ResizeMode.Fixed)  # 操作
         header.resizeSection(4, 70)
         header.setMinimumSectionSize(80)
+        # 按内容调整列宽时只采样部分行，避免记录很多时遍历全部数据
+        header.setResizeContentsPrecision(RESIZE_CONTENTS_PRECISION)
+        # 点击表头按该列排序，之前的排序列依次作为次要排序
+        header.setSectionsClickable(True)
+        header.sectionClicked.connect(self.on_header_clicked)
+
+        # 固定行高，避免对全部行执行 resizeRowsToContents
+        vertical_header = self.table.verticalHeader()
+        vertical_header.setVisible(False)
+        vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical_header.setDefaultSectionSize(34)
 
         self.table.setAlternatingRowColors(False)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setEditTriggers(QTableWidget.DoubleClicked | QTableWidget.EditKeyPressed)
-        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
         self.table.setShowGrid(False)
-        self.table.setStyleSheet("""
-            QTableWidget {
-                border: 1px solid #dcdee5;
-                border-radius: 5px;
-                background-color: white;
-                gridline-color: transparent;
-            }
-            QTableWidget::item {
-                padding: 5px;
-                border-bottom: 1px solid #f0f1f5;
-                background-color: white;
-            }
-            QTableWidget::item:selected {
-                background-color: #e1ecff;
-                color: #3a84ff;
-                border: 1px solid #3a84ff;
-            }
-            QTableWidget QLineEdit,
-            QTableWidget QComboBox {
-                border: 1px solid #3a84ff;
-                padding: 0 4px;
-                background: white;
-                font-size: 11px;
-                border-radius: 3px;
-            }
-            QTableWidget QLineEdit:focus,
-            QTableWidget QComboBox:focus {
-                border-color: #2b6cd9;
-            }
-            QComboBox::drop-down {
-                width: 20px;
-            }
-            QComboBox::down-arrow {
-            }
-            QHeaderView::section {
-                background-color: #f5f6fa;
-                padding: 5px;
-                border: none;
-                border-bottom: 1px solid #dcdee5;
-                font-weight: bold;
-                font-size: 11px;
-            }
-            QLabel {
-                color: #63656e;
-                font-size: 11px;
-            }
-        """)
-        self.table.itemChanged.connect(self.on_table_item_changed)
         self.layout.addWidget(self.table)
 
+    def create_filter_bar(self):
+        filter_container = QWidget()
+        filter_layout = QHBoxLayout(filter_container)
+        filter_layout.setContentsMargins(0, 0, 0, 0)
+        filter_layout.setSpacing(8)
+
+        # 日期区间，勾选后生效
+        self.filter_date_check = QCheckBox("提单时间")
+        self.filter_start_date = QDateEdit()
+        self.filter_end_date = QDateEdit()
+        for date_edit in (self.filter_start_date, self.filter_end_date):
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat("yyyy-MM-dd")
+            date_edit.setDate(QDate.currentDate())
+            date_edit.setMaximumWidth(120)
+            date_edit.setEnabled(False)
+
+        # 业务名称，"全部业务"表示不限
+        self.filter_business_combo = QComboBox()
+        self.filter_business_combo.setEditable(True)
+        self.filter_business_combo.setMinimumWidth(150)
+        self.update_filter_business_combo()
+
+        # 公共/普通业务
+        self.filter_kind_combo = QComboBox()
+        self.filter_kind_combo.addItem("全部类型", RecordFilter.KIND_ALL)
+        self.filter_kind_combo.addItem("公共业务", RecordFilter.KIND_PUBLIC)
+        self.filter_kind_combo.addItem("普通业务", RecordFilter.KIND_NORMAL)
+
+        today_button = QPushButton("今日")
+        week_button = QPushButton("本周")
+        clear_button = QPushButton("清除筛选")
+        today_button.clicked.connect(self.filter_today)
+        week_button.clicked.connect(self.filter_this_week)
+        clear_button.clicked.connect(self.clear_filter)
+
+        filter_layout.addWidget(self.filter_date_check)
+        filter_layout.addWidget(self.filter_start_date)
+        filter_layout.addWidget(QLabel("至"))
+        filter_layout.addWidget(self.filter_end_date)
+        filter_layout.addWidget(self.filter_business_combo)
+        filter_layout.addWidget(self.filter_kind_combo)
+        filter_layout.addWidget(today_button)
+        filter_layout.addWidget(week_button)
+        filter_layout.addWidget(clear_button)
+        filter_layout.addStretch()
+
+        self.filter_date_check.toggled.connect(self.filter_start_date.setEnabled)
+        self.filter_date_check.toggled.connect(self.filter_end_date.setEnabled)
+        self.filter_date_check.toggled.connect(self.apply_filter)
+        self.filter_start_date.dateChanged.connect(self.apply_filter)
+        self.filter_end_date.dateChanged.connect(self.apply_filter)
+        self.filter_business_combo.currentTextChanged.connect(self.apply_filter)
+        self.filter_kind_combo.currentIndexChanged.connect(self.apply_filter)
+
+        self.layout.addWidget(filter_container)
+
+    def update_filter_business_combo(self):
+        """筛选栏的业务下拉框：业务名称列表与记录中出现过的业务"""
+        if self.filter_business_combo is None:
+            return
+        current = self.filter_business_combo.currentText()
+        names = list(dict.fromkeys(self.business_registry.names() + sorted(self.records.index.businesses())))
+        self.filter_business_combo.blockSignals(True)
+        self.filter_business_combo.clear()
+        self.filter_business_combo.addItem("全部业务")
+        self.filter_business_combo.addItems(names)
+        self.filter_business_combo.setCurrentText(current or "全部业务")
+        self.filter_business_combo.blockSignals(False)
+
+    def current_filter(self):
+        """根据筛选栏生成筛选条件"""
+        start_date = end_date = None
+        if self.filter_date_check.isChecked():
+            start_date = self.filter_start_date.date().toString("yyyy-MM-dd")
+            end_date = self.filter_end_date.date().toString("yyyy-MM-dd")
+        business = self.filter_business_combo.currentText().strip()
+        if business == "全部业务":
+            business = None
+        kind = self.filter_kind_combo.currentData()
+        matcher = self.get_public_matcher() if kind != RecordFilter.KIND_ALL else None
+        return RecordFilter(start_date, end_date, business, kind, matcher)
+
+    def apply_filter(self):
+        record_filter = self.current_filter()
+        if not record_filter.is_empty():
+            # 筛选涉及的月份按需加载，不限日期时加载全部月份
+            self.ensure_range_loaded(record_filter.start_date, record_filter.end_date)
+        self.record_model.set_filter(record_filter)
+        self.update_stats()
+
+    def set_filter_dates(self, start, end):
+        # 批量修改筛选栏时屏蔽信号，最后统一应用一次
+        widgets = (self.filter_date_check, self.filter_start_date, self.filter_end_date)
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.filter_date_check.setChecked(True)
+        self.filter_start_date.setEnabled(True)
+        self.filter_end_date.setEnabled(True)
+        self.filter_start_date.setDate(start)
+        self.filter_end_date.setDate(end)
+        for widget in widgets:
+            widget.blockSignals(False)
+        self.apply_filter()
+
+    def filter_today(self):
+        today = QDate.currentDate()
+        self.set_filter_dates(today, today)
+
+    def filter_this_week(self):
+        today = QDate.currentDate()
+        monday = today.addDays(1 - today.dayOfWeek())
+        self.set_filter_dates(monday, monday.addDays(6))
+
+    def clear_filter(self):
+        widgets = (self.filter_date_check, self.filter_start_date, self.filter_end_date,
+                   self.filter_business_combo, self.filter_kind_combo)
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.filter_date_check.setChecked(False)
+        self.filter_start_date.setEnabled(False)
+        self.filter_end_date.setEnabled(False)
+        self.filter_business_combo.setCurrentText("全部业务")
+        self.filter_kind_combo.setCurrentIndex(0)
+        for widget in widgets:
+            widget.blockSignals(False)
+        self.apply_filter()
+
+    @property
+    def filtered_records(self):
+        """当前筛选条件下的记录（按添加顺序），未筛选时为 None"""
+        return self.record_model.filtered_records()
+
     def create_stats_area(self):
         stats_container = QWidget()
         stats_container.setObjectName("statsContainer")
@@ -287,22 +516,44 @@ class MainWindow(QMainWindow):
         stats_font.setPointSize(10)
         stats_font.setBold(True)
 
+        self.filter_time_total = QLabel("筛选耗时: 0小时")
+        self.today_time_total = QLabel("今日耗时: 0小时")
+        self.week_time_total = QLabel("本周耗时: 0小时")
         self.manual_time_total = QLabel("总耗时: 0小时")
         # 将"今日总记录数"改为"总记录单量"
         self.records_today = QLabel("总记录单量: 0条")
 
-        for label in [self.manual_time_total, self.records_today]:
+        stats_labels = [self.filter_time_total, self.today_time_total, self.week_time_total, self.manual_time_total, self.records_today]
+        for label in stats_labels:
             label.setFont(stats_font)
 
-        # 添加伸展空间以使标签居中
-        stats_layout.addStretch()
-        stats_layout.addWidget(self.manual_time_total)
-        stats_layout.addStretch() # 在两者之间添加伸展空间
-        stats_layout.addWidget(self.records_today)
+        # 添加伸展空间以使标签居中，标签之间也添加伸展空间
         stats_layout.addStretch()
+        for label in stats_labels:
+            stats_layout.addWidget(label)
+            stats_layout.addStretch()
 
         self.layout.addWidget(stats_container)
 
+    def create_status_bar(self):
+        self.save_status_label = QLabel("已保存")
+        self.statusBar().addPermanentWidget(self.save_status_label)
+
+    def update_save_status(self, *args):
+        text = f"待写入: {self.persistence.pending}" if self.persistence.pending else "已保存"
+        if self.persistence.last_latency_ms is not None:
+            text += f"  上次写入耗时: {self.persistence.last_latency_ms:.1f}ms"
+        self.save_status_label.setText(text)
+        if not self.persistence.pending:
+            self.save_failed = False
+
+    def on_save_failed(self, message):
+        self.statusBar().showMessage(f"保存失败，稍后重试: {message}", 5000)
+        # 连续失败时只提示一次，直到下次写入成功
+        if not self.save_failed:
+            self.save_failed = True
+            QMessageBox.warning(self, "警告", f"保存数据失败: {message}")
+
     def create_action_buttons_area(self):
         button_container = QWidget()
         button_layout = QHBoxLayout(button_container)
@@ -311,10 +562,14 @@ class MainWindow(QMainWindow):
 
         self.manage_button = QPushButton("管理业务")
         self.generate_text_button = QPushButton("生成文本")
+        self.export_button = QPushButton("导出记录")
+        self.report_button = QPushButton("统计报表")
         self.clear_records_button = QPushButton("清空记录")
 
         self.manage_button.clicked.connect(self.show_business_dialog)
         self.generate_text_button.clicked.connect(self.generate_record_text)
+        self.export_button.clicked.connect(self.export_records)
+        self.report_button.clicked.connect(self.show_report_dialog)
         self.clear_records_button.clicked.connect(self.clear_all_records)
 
         # 设置清空按钮的object name以便应用特定样式
@@ -325,9 +580,12 @@ class MainWindow(QMainWindow):
 
         button_layout.addWidget(self.manage_button)
         button_layout.addWidget(self.generate_text_button)
+        button_layout.addWidget(self.export_button)
+        button_layout.addWidget(self.report_button)
         button_layout.addWidget(self.clear_records_button)
 
-        for button in [self.manage_button, self.generate_text_button, self.clear_records_button]:
+        for button in [self.manage_button, self.generate_text_button, self.export_button, self.report_button,
+                       self.clear_records_button]:
             button.setMinimumHeight(button_height)
             # 移除固定宽度设置，使用Expanding策略填充宽度
             # button.setFixedWidth(button_width)
@@ -339,190 +597,54 @@ class MainWindow(QMainWindow):
         self.layout.addWidget(button_container)
 
     def apply_styles(self):
-        # 检测是否为暗黑主题
-        is_dark_mode = False
-        if sys.platform == 'darwin':
-            # 在 Mac 上检测系统主题
-            try:
-                from Foundation import NSAppearance
-                appearance = NSAppearance.currentAppearance()
-                is_dark_mode = appearance.name().localizedString().lower().contains('dark')
-            except:
-                pass
-
-        # 根据主题设置颜色
-        if is_dark_mode:
-            # 暗黑主题颜色
-            bg_color = "#2c2c2c"
-            text_color = "#ffffff"
-            input_bg = "#3c3c3c"
-            border_color = "#4c4c4c"
-            header_bg = "#363636"
-            hover_color = "#4a4a4a"
-            button_bg = "#3a84ff"
-            button_hover = "#2b6cd9"
-            button_pressed = "#0052cc"
-            clear_button_bg = "#ea3636"
-            clear_button_hover = "#c42b2b"
-            clear_button_pressed = "#a12121"
-            table_selected_bg = "#3a84ff"
-            table_selected_text = "#ffffff"
-            table_alternate_bg = "#323232"
-        else:
-            # 亮色主题颜色（保持原有颜色）
-            bg_color = "#f5f6fa"
-            text_color = "#333333"
-            input_bg = "#ffffff"
-            border_color = "#dcdee5"
-            header_bg = "#f5f6fa"
-            hover_color = "#e1ecff"
-            button_bg = "#3a84ff"
-            button_hover = "#2b6cd9"
-            button_pressed = "#0052cc"
-            clear_button_bg = "#ea3636"
-            clear_button_hover = "#c42b2b"
-            clear_button_pressed = "#a12121"
-            table_selected_bg = "#e1ecff"
-            table_selected_text = "#3a84ff"
-            table_alternate_bg = "#ffffff"
-
-        self.setStyleSheet(f"""
-            QMainWindow {{
-                background-color: {bg_color};
-                color: {text_color};
-            }}
-            #sectionLabel {{
-                font-size: 14px;
-                font-weight: bold;
-                color: {text_color};
-                margin-top: 10px;
-                margin-bottom: 5px;
-            }}
-            #inputContainer,
-            #statsContainer {{
-                background-color: {input_bg};
-                border-radius: 5px;
-            }}
-            QPushButton {{
-                background-color: {button_bg};
-                color: white;
-                border: none;
-                padding: 5px 10px;
-                border-radius: 3px;
-                font-size: 11px;
-            }}
-            QPushButton:hover {{
-                background-color: {button_hover};
-            }}
-            QPushButton:pressed {{
-                background-color: {button_pressed};
-            }}
-            QPushButton#clear_records_button {{
-                background-color: {clear_button_bg};
-            }}
-            QPushButton#clear_records_button:hover {{
-                background-color: {clear_button_hover};
-            }}
-            QPushButton#clear_records_button:pressed {{
-                background-color: {clear_button_pressed};
-            }}
-            QLineEdit, QComboBox {{
-                padding: 5px 10px;
-                border: 1px solid {border_color};
-                border-radius: 3px;
-                background-color: {input_bg};
-                color: {text_color};
-                font-size: 11px;
-            }}
-            QLineEdit:focus, QComboBox:focus {{
-                border-color: {button_bg};
-            }}
-            QComboBox::drop-down {{
-                width: 20px;
-            }}
-            QComboBox::down-arrow {{
-                width: 12px;
-                height: 12px;
-            }}
-            QComboBox QAbstractItemView {{
-                border: 1px solid {border_color};
-                background-color: {input_bg};
-                color: {text_color};
-                selection-background-color: {hover_color};
-                selection-color: {button_bg};
-                outline: none;
-            }}
-            QComboBox QAbstractItemView::item {{
-                min-height: 25px;
-                padding: 5px;
-                font-size: 14px;
-            }}
-            QPushButton#timeControlButton {{
-                background-color: {input_bg};
-                color: {text_color};
-                border: 1px solid {border_color};
-                border-radius: 3px;
-                padding: 2px;
-                font-size: 12px;
-                font-weight: bold;
-            }}
-            QPushButton#timeControlButton:hover {{
-                background-color: {hover_color};
-                border-color: {button_bg};
-            }}
-            QPushButton#timeControlButton:pressed {{
-                background-color: {button_bg};
-                color: white;
-            }}
-            QTableWidget {{
-                border: 1px solid {border_color};
-                border-radius: 5px;
-                background-color: {input_bg};
-                color: {text_color};
-                gridline-color: transparent;
-            }}
-            QTableWidget::item {{
-                padding: 5px;
-                border-bottom: 1px solid {border_color};
-                background-color: {input_bg};
-            }}
-            QTableWidget::item:selected {{
-                background-color: {table_selected_bg};
-                color: {table_selected_text};
-                border: 1px solid {button_bg};
-            }}
-            QTableWidget QLineEdit,
-            QTableWidget QComboBox {{
-                border: 1px solid {button_bg};
-                padding: 0 4px;
-                background: {input_bg};
-                color: {text_color};
-                font-size: 11px;
-                border-radius: 3px;
-            }}
-            QTableWidget QLineEdit:focus,
-            QTableWidget QComboBox:focus {{
-                border-color: {button_hover};
-            }}
-            QHeaderView::section {{
-                background-color: {header_bg};
-                padding: 5px;
-                border: none;
-                border-bottom: 1px solid {border_color};
-                font-weight: bold;
-                font-size: 11px;
-                color: {text_color};
-            }}
-            QLabel {{
-                color: {text_color};
-                font-size: 11px;
-            }}
-        """)
+        # 样式表设置在应用上、按主题缓存，主窗口、表格与各对话框共用；
+        # settings.json 中 theme 可指定 light / dark，默认跟随系统
+        theme_manager.apply(load_settings(self.data_dir).get("theme", AUTO))
+
+    def toggle_theme(self):
+        """临时在亮色与暗色主题之间切换"""
+        theme_manager.toggle()
 
     def update_business_combo(self):
+        """整体重新加载业务下拉框，仅在登记表整体替换时使用"""
         self.business_combo.clear()
         # 根据截图，业务名称下拉框显示所有业务名称，不区分是否在记录中使用
-        self.business_combo.addItems(self.business_names)
+        self.business_combo.addItems(self.business_registry.names())
+        # 补全索引只增删有变化的名称
+        self.business_index.sync(self.business_registry.names() + list(self.load_public_businesses()))
+        self.update_filter_business_combo()
+
+    def on_business_registry_changed(self, kind, name):
+        """业务名称变化时只更新受影响的下拉框条目，并安排保存"""
+        if kind in (RESET, EDITED):
+            self.update_business_combo()
+            # 整体替换来自加载或其他实例的修改，无需保存
+            if kind == RESET:
+                return
+        if kind == ADDED:
+            self.business_combo.addItem(name)
+            self.business_index.add(name)
+            if self.filter_business_combo is not None and self.filter_business_combo.findText(name) < 0:
+                self.filter_business_combo.addItem(name)
+        elif kind == REMOVED:
+            row = self.business_combo.findText(name)
+            if row >= 0:
+                self.business_combo.removeItem(row)
+            if name not in self.load_public_businesses():
+                self.business_index.remove(name)
+            # 记录中仍在使用的业务保留在筛选下拉框中
+            if self.filter_business_combo is not None and not self.records.index.ids_for_business(name):
+                row = self.filter_business_combo.findText(name)
+                if row >= 0:
+                    self.filter_business_combo.removeItem(row)
+        elif kind == MOVED_TO_TOP:
+            row = self.business_combo.findText(name)
+            if row > 0:
+                text = self.business_combo.currentText()
+                self.business_combo.removeItem(row)
+                self.business_combo.insertItem(0, name)
+                self.business_combo.setEditText(text)
+        self.save_business_names()
 
 
     def add_record(self):
@@ -531,83 +653,195 @@ class MainWindow(QMainWindow):
         manual_time = self.manual_time_input.text().strip()
         submit_date = self.date_edit.date().toString("yyyy-MM-dd")
 
-        if not all([business, task, manual_time, submit_date]):
-            QMessageBox.warning(self, "警告", "请填写所有字段")
+        # 必填、任务描述长度与耗时的校验规则与命令行导入共用
+        try:
+            record = build_record(business, task, manual_time, submit_date)
+        except RecordValidationError as e:
+            QMessageBox.warning(self, "警告", str(e))
             return
 
-        # 验证任务描述长度
-        if len(task) < 10:
-            QMessageBox.warning(self, "警告", "任务描述至少需要10个字符")
+        # 先加载提单日期所在的月份，新记录与该月已有记录一起显示、统计
+        self.ensure_months_loaded([month_of(record)])
+
+        # 通过模型追加，表格只插入一行
+        self.record_model.append_record(record)
+        self.business_registry.record_use(business, submit_date)
+        # 新业务名称追加到登记表，已存在时为 O(1) 判断
+        self.business_registry.add(business)
+
+        self.save_record_op("add", record)
+        self.undo_stack.push(RecordsAdded(self, [(self.records.index_of(record["id"]), record)]))
+        self.update_stats()
+        self.clear_inputs()
+
+    def paste_records(self, text=None):
+        """解析粘贴的多行提单文本（业务 yyyymmdd 任务 耗时），合格的记录一次性添加"""
+        if text is None:
+            text = QApplication.clipboard().text()
+        records, errors = parse_record_lines(text)
+        if errors:
+            details = "\n".join(f"第 {line_no} 行: {message}" for line_no, message in errors[:MAX_PASTE_ERRORS_SHOWN])
+            if len(errors) > MAX_PASTE_ERRORS_SHOWN:
+                details += f"\n... 共 {len(errors)} 行"
+            if not records:
+                QMessageBox.warning(self, "警告", f"没有可以添加的记录:\n{details}")
+                return
+            reply = QMessageBox.question(
+                self, "确认粘贴",
+                f"以下 {len(errors)} 行无法添加:\n{details}\n\n是否添加其余 {len(records)} 条记录？",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No
+            )
+            if reply != QMessageBox.Yes:
+                return
+        if not records:
             return
+        self.add_records(records)
+        self.statusBar().showMessage(f"已粘贴 {len(records)} 条记录", 5000)
+
+    def add_records(self, records):
+        """一次添加多条记录：表格只插入一次、后台合并为一次写入、统计只刷新一次"""
+        self.ensure_months_loaded({month_of(record) for record in records})
+        self.record_model.append_records(records)
+        for record in records:
+            self.business_registry.record_use(record["business"], record["submit_date"])
+        for business in dict.fromkeys(record["business"] for record in records):
+            self.business_registry.add(business)
+        self.persistence.record_ops("add", records)
+        self.undo_stack.push(RecordsAdded(
+            self, [(self.records.index_of(record["id"]), record) for record in records], "粘贴记录"))
+        self.update_stats()
 
-        try:
-            manual_time = float(manual_time)
-        except ValueError:
-            QMessageBox.warning(self, "警告", "耗时必须是数字")
+    def remove_records(self, record_ids):
+        """删除多条记录（撤销添加、重做删除时使用），返回被删除的记录"""
+        record_ids = [record_id for record_id in record_ids if record_id in self.records]
+        if len(record_ids) > MAX_INCREMENTAL_ROWS:
+            # 大批量时直接修改记录集合，表格整体刷新一次
+            removed = [self.records.remove(record_id) for record_id in record_ids]
+            self.update_table()
+        else:
+            removed = [self.record_model.remove_record(record_id) for record_id in record_ids]
+        if removed:
+            self.persistence.record_ops("delete", removed)
+        self.update_stats()
+        return removed
+
+    def restore_records(self, items):
+        """把记录放回添加顺序中的原位置（撤销删除、重做添加时使用），items 为按位置升序的 [(位置, 记录)]"""
+        self.ensure_months_loaded({month_of(record) for _, record in items})
+        # 其他实例可能已经加回了同一条记录
+        items = [(index, record) for index, record in items if record["id"] not in self.records]
+        if not items:
             return
+        for n, (index, record) in enumerate(items):
+            if len(items) - n > MAX_INCREMENTAL_ROWS or not self.records.can_insert_in_place(index):
+                # 剩余的记录较多，或有记录放不回空槽（逐条插入每条都要重建）时，
+                # 把剩余的记录按位置归并到现有记录中，整体重建一次
+                self.records.insert_many(items[n:])
+                self.rebuild_business_usage()
+                self.update_table()
+                break
+            self.record_model.insert_record(index, record)
+        records = [record for _, record in items]
+        for business in dict.fromkeys(record["business"] for record in records):
+            self.business_registry.add(business)
+        # 连同位置一起登记，追加日志重启后回放时记录仍在原位置
+        self.persistence.record_ops("add", records, [index for index, _ in items])
+        self.update_stats()
 
-        record = {
-            "business": business,
-            "task": task,
-            "manual_time": manual_time,
-            "submit_date": submit_date,
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+    def apply_record_field(self, record_id, field, value, position=None):
+        """修改记录的一个字段并登记保存，记录不存在时返回 None
+
+        position 为 record_position 保存的位置，撤销时把记录放回该位置。
+        """
+        if record_id not in self.records:
+            return None
+        record = self.record_model.update_field(record_id, field, value)
+        if field == "business":
+            self.business_registry.record_use(value, record.get("submit_date"))
+            self.business_registry.add(value)
+        self.save_record_op("update", record, {field: value})
+        if position is not None:
+            self.restore_record_position(record_id, position)
+        if field == "submit_date":
+            # 改到未加载的月份时加载该月，避免其合计与内存中的记录重复统计；
+            # 放到下一轮事件循环，不在模型写入数据的过程中重置模型
+            month = month_of(record)
+            QTimer.singleShot(0, lambda: self.load_edited_month(month))
+        self.update_stats()
+        return record
 
-        self.records.append(record)
+    def load_edited_month(self, month):
+        """修改提单日期后加载记录所在的月份并刷新统计"""
+        self.ensure_months_loaded([month])
+        self.update_stats()
 
-        if business and business not in self.business_names:
-            self.business_names.append(business)
-            self.save_business_names()
-            self.update_business_combo()
+    def record_position(self, record_id):
+        """记录在添加顺序中的位置：(位置, 后一条记录的 id)
+
+        按月份加载会在前面插入记录，撤销时优先以后一条记录为准，它已被删除时再按位置放回。
+        """
+        index = self.records.index_of(record_id)
+        following = self.records.at(index + 1)["id"] if index + 1 < len(self.records) else None
+        return index, following
+
+    def restore_record_position(self, record_id, position):
+        """把记录移回 record_position 保存的位置（只调整内存中的顺序，不写入文件）"""
+        index, following = position
+        if following is not None and following in self.records:
+            index = self.records.index_of(following)
+            if self.records.index_of(record_id) < index:
+                index -= 1
+        elif following is None:
+            index = len(self.records) - 1
+        index = min(index, len(self.records) - 1)
+        if self.records.index_of(record_id) == index:
+            return
+        record = self.record_model.remove_record(record_id)
+        self.record_model.insert_record(index, record)
 
-        self.save_data()
-        self.update_table()
-        self.update_stats()
-        self.clear_inputs()
+    def undo(self):
+        try:
+            command = self.undo_stack.undo()
+        except Exception as e:
+            QMessageBox.warning(self, "警告", f"撤销失败: {str(e)}")
+            return
+        self.statusBar().showMessage(f"已撤销: {command.text}" if command else "没有可以撤销的操作", 3000)
 
-    def update_table(self):
-        records_to_show = getattr(self, 'filtered_records', None) or self.records
-        # 在程序化更新表格时屏蔽 itemChanged 信号，避免触发校验导致弹窗循环
-        self.table.blockSignals(True)
-        self.table.setRowCount(len(records_to_show))
-        for i, record in enumerate(reversed(records_to_show)):
-            self.table.setItem(i, 0, QTableWidgetItem(record["business"]))
-            date_str = record.get("submit_date", "")
-            date_fmt = date_str.replace("-", "") if date_str else ""
-            self.table.setItem(i, 1, QTableWidgetItem(date_fmt))
-            self.table.setItem(i, 2, QTableWidgetItem(record["task"]))
-            self.table.setItem(i, 3, QTableWidgetItem(str(record["manual_time"])))
-            delete_btn = QPushButton("删除")
-            delete_btn.setFixedSize(60, 24)
-            delete_btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #ea3636;
-                    color: white;
-                    border: none;
-                    padding: 2px;
-                    border-radius: 3px;
-                    font-size: 10px;
-                }
-                QPushButton:hover {
-                    background-color: #c42b2b;
-                }
-                QPushButton:pressed {
-                    background-color: #a12121;
-                }
-            """)
-            # 直接传递当前表格行号i
-            delete_btn.clicked.connect(lambda checked, row=i: self.delete_record(row))
-            self.table.setCellWidget(i, 4, delete_btn)
-        self.table.resizeRowsToContents()
-        self.table.blockSignals(False)
+    def redo(self):
+        try:
+            command = self.undo_stack.redo()
+        except Exception as e:
+            QMessageBox.warning(self, "警告", f"重做失败: {str(e)}")
+            return
+        self.statusBar().showMessage(f"已重做: {command.text}" if command else "没有可以重做的操作", 3000)
 
+    @perf_stats.timed("update_table")
+    def update_table(self):
+        # 整体刷新表格（加载、排序、清空后使用），日常增删改走模型的增量接口
+        self.record_model.reset()
 
+    @perf_stats.timed("update_stats")
     def update_stats(self):
-        manual_total = sum(r["manual_time"] for r in self.records) if self.records else 0
+        # 直接读取增量维护的汇总数据，无需遍历全部记录
+        aggregates = self.records.aggregates
+        today = date.today()
+        _, today_total = aggregates.date_total(today.isoformat())
+        _, week_total = aggregates.week_total(today)
+        # 总计包括尚未加载的月份，其合计来自分区清单
+        archived_count, archived_hours = self.archived_totals
+        manual_total = aggregates.total_hours + archived_hours
         # 修改统计逻辑为总记录单量
-        total_records_count = len(self.records)
-
+        total_records_count = aggregates.count + archived_count
+
+        # 筛选生效时显示筛选范围内的合计
+        record_filter = self.record_model.record_filter()
+        if record_filter is not None:
+            filter_count, filter_total = aggregates.filter_total(record_filter)
+            self.filter_time_total.setText(f"筛选耗时: {filter_total:.1f}小时 ({filter_count}条)")
+        self.filter_time_total.setVisible(record_filter is not None)
+        self.today_time_total.setText(f"今日耗时: {today_total:.1f}小时")
+        self.week_time_total.setText(f"本周耗时: {week_total:.1f}小时")
         self.manual_time_total.setText(f"总耗时: {manual_total:.1f}小时")
         # 更新标签文本
         self.records_today.setText(f"总记录单量: {total_records_count}条")
@@ -643,35 +877,38 @@ class MainWindow(QMainWindow):
             QMessageBox.No
         )
         if reply == QMessageBox.Yes:
-            records_to_show = getattr(self, 'filtered_records', None) or self.records
-            # 表格是倒序显示的，所以要反向取
-            record = list(reversed(records_to_show))[row]
-            if record in self.records:
-                self.records.remove(record)
-                self.save_data()
-                self.update_table()
+            # 表格行经排序代理映射到记录 id，避免相同内容的记录删错
+            record_id = self.record_model.record_id(self.sort_proxy.source_row(row))
+            if record_id in self.records:
+                index = self.records.index_of(record_id)
+                record = self.record_model.remove_record(record_id)
+                self.save_record_op("delete", record)
+                self.undo_stack.push(RecordsRemoved(self, [(index, record)]))
                 self.update_stats()
             else:
                 QMessageBox.warning(self, "错误", "删除记录失败，未找到对应数据。")
 
     def load_public_businesses(self):
         """加载公共业务名称列表"""
-        public_businesses = []
+        public_businesses = ()
         try:
             public_file = os.path.join(self.data_dir, "public.ini")
-            if os.path.exists(public_file):
-                with open(public_file, "r", encoding="utf-8") as f:
-                    public_businesses = [line.strip() for line in f.readlines() if line.strip()]
-            else:
+            if not os.path.exists(public_file):
                 # 如果文件不存在，创建默认的public.ini文件
                 self.create_default_public_ini()
-                # 重新读取刚创建的文件
-                with open(public_file, "r", encoding="utf-8") as f:
-                    public_businesses = [line.strip() for line in f.readlines() if line.strip()]
+            # 文件未变化时直接返回缓存的解析结果
+            public_businesses = data_file_cache.get(public_file, read_lines, ())
         except Exception as e:
             print(f"加载公共业务文件失败: {str(e)}")
         return public_businesses
 
+    def get_public_matcher(self):
+        """返回公共业务匹配器，公共业务列表不变时复用已构建的自动机"""
+        public_businesses = self.load_public_businesses()
+        if self.public_matcher is None or self.public_matcher.patterns != public_businesses:
+            self.public_matcher = PublicBusinessMatcher(public_businesses)
+        return self.public_matcher
+
     def create_default_public_ini(self):
         """创建默认的public.ini文件"""
         try:
@@ -679,75 +916,7 @@ class MainWindow(QMainWindow):
             os.makedirs(self.data_dir, exist_ok=True)
             
             public_file = os.path.join(self.data_dir, "public.ini")
-            default_content = """BKChat
-全面运维质量评估
-HomePage
-货币化
-PowerAPP
-CDN防盗刷
-TGSRE门户
-发海魔北的质量管理
-蓝鲸社区
-员工培训
-招聘
-SreData
-海外测速
-业务交接专项
-项目管理
-子公司效率提升
-ASKR
-故障应急体系
-实时充值流水对账
-海外Gcloud平台组件风险消除
-用户管理
-权限中心
-配置平台
-作业平台
-PaaS3.0
-APIGateway
-标准运维
-流程服务
-节点管理
-监控平台
-日志平台
-容器管理平台
-蓝盾
-DBM
-审计中心
-BSCP
-图表平台
-BKBase
-海垒
-BKFlow
-业务受理
-BKSec
-BKSAM
-WeTerm
-CodeCC
-自动化建设
-安全产品
-运营产品
-通用测试
-二方技术服务
-能力发展​
-学习探索
-混沌工程
-ITSM规范化项目
-TGPA
-部门年会筹备
-724运维大会筹备
-中心年会筹备
-微享项目
-SRE商店
-研发流程数字化
-云研发P4
-Avatar测试环境管理
-岗位智能体
-运维操作看板
-云研发软件安装
-云研发自动化助手
-SRE研发服务
-团队例会"""
+            default_content = DEFAULT_PUBLIC_INI
             
             with open(public_file, "w", encoding="utf-8") as f:
                 f.write(default_content)
@@ -763,11 +932,6 @@ SRE研发服务
             public_file = os.path.join(self.data_dir, "public.ini")
             if not os.path.exists(public_file):
                 self.create_default_public_ini()
-            # records.json
-            records_file = os.path.join(self.data_dir, "records.json")
-            if not os.path.exists(records_file):
-                with open(records_file, "w", encoding="utf-8") as f:
-                    json.dump([], f, ensure_ascii=False, indent=2)
             # business.json
             business_file = os.path.join(self.data_dir, "business.json")
             if not os.path.exists(business_file):
@@ -779,52 +943,66 @@ SRE研发服务
 
     def generate_record_text(self):
         # 根据需求生成文本格式，分为公共记录单和批量创建记录单
-        if not self.records:
+        # 筛选生效时只使用筛选出的记录
+        records_to_show = self.filtered_records
+        if records_to_show is None:
+            records_to_show = self.records
+        if not records_to_show:
             QMessageBox.information(self, "提示", "没有记录可以生成文本")
             return
 
-        # 加载公共业务名称
-        public_businesses = self.load_public_businesses()
-        
-        # 分类记录
-        public_records = []
-        normal_records = []
-        
-        records_to_show = getattr(self, 'filtered_records', None) or self.records
-        for record in reversed(records_to_show):
-            business_name = record.get("business", "")
-            # 检查是否为公共业务
-            is_public = any(public_business in business_name for public_business in public_businesses)
-            
-            if is_public:
-                public_records.append(record)
-            else:
-                normal_records.append(record)
-
-        # 生成文本
-        text = ""
-        
-        # 批量创建记录单
-        if normal_records:
-            text += "小鲸 批量创建记录单\n"
-            for record in normal_records:
-                date_fmt = record.get("submit_date", "").replace("-", "") if record.get("submit_date") else ""
-                text += f"{record['business']} {date_fmt} {record['task']} {record['manual_time']:.1f}\n"
-            text += "\n"
-        
-        # 公共记录单
-        if public_records:
-            text += "小鲸 公共记录单\n"
-            for record in public_records:
-                date_fmt = record.get("submit_date", "").replace("-", "") if record.get("submit_date") else ""
-                text += f"{record['business']} {date_fmt} {record['task']} {record['manual_time']:.1f}\n"
+        # 分类与格式化与命令行共用，公共业务名称按 public.ini 匹配
+        with perf_stats.measure("generate_record_text"):
+            text = generate_record_text(records_to_show, self.get_public_matcher())
 
         clipboard = QApplication.clipboard()
-        clipboard.setText(text.strip())
+        clipboard.setText(text)
         QMessageBox.information(self, "提示", "记录文本已复制到剪贴板")
 
+    def export_records(self):
+        """把筛选范围内的记录（未筛选时为全部历史记录，包括尚未加载的月份）导出到文件"""
+        # 内置格式与 settings.json 中 export_templates 定义的模板
+        choices = []
+        for fmt, exporter_class in EXPORT_FORMATS.items():
+            choices.append((f"{exporter_class.title} (*{exporter_class.suffix})", fmt, None, ""))
+        for name, (template, header) in user_templates(load_settings(self.data_dir)).items():
+            choices.append((f"{name} (*.txt)", None, template, header))
+        path, selected = QFileDialog.getSaveFileName(
+            self, "导出记录", f"工作记录-{date.today().strftime('%Y%m%d')}",
+            ";;".join(choice[0] for choice in choices))
+        if not path:
+            return
+        _, fmt, template, header = next((c for c in choices if c[0] == selected), choices[0])
+        matcher = self.get_public_matcher()
+        try:
+            exporter = create_exporter(fmt, matcher, template, header)
+        except TemplateError as e:
+            QMessageBox.warning(self, "警告", f"导出模板有误: {str(e)}")
+            return
+        if not os.path.splitext(path)[1]:
+            path += exporter.suffix
+
+        record_filter = self.record_model.record_filter()
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            # 先写出尚未落盘的修改，再从存储中逐月读取，不把全部历史记录载入内存
+            self.persistence.flush()
+            if record_filter is None:
+                records = self.storage.iter_range(newest_first=exporter.newest_first)
+            else:
+                records = filter(record_filter.matches, self.storage.iter_range(
+                    record_filter.start_date, record_filter.end_date, newest_first=exporter.newest_first))
+            with perf_stats.measure("export_records"):
+                count = export_to_file(exporter, records, path)
+        except Exception as e:
+            QMessageBox.warning(self, "警告", f"导出记录失败: {str(e)}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+        QMessageBox.information(self, "提示", f"已导出 {count} 条记录到 {path}")
+
     def clear_all_records(self):
-        if not self.records:
+        if not self.records and not self.archived_totals[0]:
             QMessageBox.information(self, "提示", "没有记录可以清空")
             return
 
@@ -836,126 +1014,285 @@ SRE研发服务
         )
 
         if reply == QMessageBox.Yes:
-            self.records = []
+            # 清空会删除全部分区，先加载尚未加载的月份，撤销时才能放回；
+            # 之后这些月份仍视为已加载（均为空），不会再从尚未写入的旧文件中读回
+            self.ensure_range_loaded()
+            # 撤销栈只引用被移出的记录对象，不复制
+            self.undo_stack.push(RecordsRemoved(self, list(enumerate(self.records)), "清空记录"))
+            self.records.clear()
+            self.archived_totals = (0, 0.0)
             self.save_data()
             self.update_table()
             self.update_stats()
             QMessageBox.information(self, "提示", "所有记录已清空")
 
+    @perf_stats.timed("load_data")
     def load_data(self):
         try:
-            if os.path.exists(os.path.join(self.data_dir, "records.json")):
-                with open(os.path.join(self.data_dir, "records.json"), "r", encoding="utf-8") as f:
-                    self.records = json.load(f)
-                # 兼容老数据：无submit_date时补充为当前日期
-                for r in self.records:
-                    if "submit_date" not in r:
-                        r["submit_date"] = datetime.now().strftime("%Y-%m-%d")
-            if os.path.exists(os.path.join(self.data_dir, "business.json")):
-                with open(os.path.join(self.data_dir, "business.json"), "r", encoding="utf-8") as f:
-                    self.business_names = json.load(f)
+            if self.storage.partitioned:
+                # 按月分区或 SQLite 存储时启动只加载本周与本月涉及的月份，其余月份在筛选时按需加载
+                today = date.today()
+                monday = date.fromordinal(today.toordinal() - today.weekday())
+                self.loaded_months = {monday.strftime("%Y-%m"), today.strftime("%Y-%m")}
+                records = self.storage.load_months(self.loaded_months)
+            else:
+                # 从存储加载全部记录，老的 records.json 会自动补充 id
+                records = self.storage.load()
+            self.fill_missing_submit_dates(records)
+            self.records.replace_all(records)
+            self.update_archived_totals()
+            self.rebuild_business_usage()
+            business_names = data_file_cache.get(self.business_file, read_json, [])
+            pinned = data_file_cache.get(self.business_pins_file, read_json, [])
+            self.business_registry.replace_all(business_names, pinned)
         except Exception as e:
             QMessageBox.warning(self, "警告", f"加载数据失败: {str(e)}")
         self.update_business_combo()
 
-    def save_data(self):
-        os.makedirs(self.data_dir, exist_ok=True)
+    @staticmethod
+    def fill_missing_submit_dates(records):
+        # 兼容老数据：无submit_date时补充为当前日期（在建立汇总之前补充）
+        for r in records:
+            if "submit_date" not in r:
+                r["submit_date"] = datetime.now().strftime("%Y-%m-%d")
+
+    def update_archived_totals(self):
+        """重新计算尚未加载月份的合计"""
+        if self.loaded_months is None:
+            self.archived_totals = (0, 0.0)
+            return
+        count, hours = 0, 0.0
+        for month, (month_count, month_hours) in self.storage.partition_summary().items():
+            if month not in self.loaded_months:
+                count += month_count
+                hours += month_hours
+        self.archived_totals = (count, hours)
+
+    def rebuild_business_usage(self):
+        """重新统计业务使用次数：已加载的记录加上存储中未加载月份的统计，结果与加载了哪些月份无关"""
+        archived = None
+        if self.loaded_months is not None:
+            try:
+                archived = self.storage.business_usage(set(self.storage.months()) - self.loaded_months)
+            except Exception as e:
+                print(f"读取业务使用统计失败: {str(e)}")
+        self.business_registry.rebuild_usage(self.records, archived)
+
+    def ensure_months_loaded(self, months):
+        """加载尚未加载的月份并并入当前记录，非分区存储时不做任何事"""
+        if self.loaded_months is None:
+            return
+        missing = set(months) - self.loaded_months
+        if not missing:
+            return
         try:
-            with open(os.path.join(self.data_dir, "records.json"), "w", encoding="utf-8") as f:
-                json.dump(self.records, f, ensure_ascii=False, indent=2)
+            loaded = self.storage.load_months(missing)
         except Exception as e:
-            QMessageBox.warning(self, "警告", f"保存数据失败: {str(e)}")
+            QMessageBox.warning(self, "警告", f"加载数据失败: {str(e)}")
+            return
+        self.loaded_months |= missing
+        self.fill_missing_submit_dates(loaded)
+        # 已在内存中的记录（如刚修改到该月、尚未写入的）以内存为准
+        loaded = [r for r in loaded if r.get("id") not in self.records]
+        if loaded:
+            # 保持按月份先后、月内按添加顺序排列
+            records = sorted(self.records.to_list() + loaded, key=month_of)
+            self.records.replace_all(records)
+            self.rebuild_business_usage()
+            self.record_model.reset()
+            self.update_filter_business_combo()
+        self.update_archived_totals()
+        self.statusBar().showMessage(f"已加载 {len(missing)} 个月份的记录，共 {len(loaded)} 条", 5000)
+
+    def ensure_range_loaded(self, start_date=None, end_date=None):
+        """加载与提单日期区间有交集的月份，不限日期时加载全部"""
+        if self.loaded_months is None:
+            return
+        self.ensure_months_loaded(months_in_range(self.storage.months(), start_date, end_date))
+
+    @perf_stats.timed("save_data")
+    def save_data(self):
+        # 整体重写快照，仅用于清空等批量变更
+        self.persistence.save_records(self.records.to_list())
+
+    def save_record_op(self, op, record, fields=None):
+        """登记单条记录的增删改，由后台线程合并后追加到日志"""
+        self.persistence.record_op(op, record, fields)
+
+    @property
+    def business_file(self):
+        return os.path.join(self.data_dir, "business.json")
+
+    @property
+    def business_pins_file(self):
+        return os.path.join(self.data_dir, "business_pins.json")
 
     def save_business_names(self):
-        os.makedirs(self.data_dir, exist_ok=True)
-        try:
-            with open(os.path.join(self.data_dir, "business.json"), "w", encoding="utf-8") as f:
-                json.dump(self.business_names, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            QMessageBox.warning(self, "警告", f"保存业务名称失败: {str(e)}")
+        # business.json 保持名称列表格式（置顶的在前），置顶标记单独保存；
+        # 写入时与其他实例、命令行同时新增的名称合并
+        registry = self.business_registry
+        base = registry.mark_synced()
+        self.persistence.save_business_names(self.data_dir, registry.names(), registry.pinned_names(), base)
 
     def show_business_dialog(self):
-        dialog = BusinessDialog(self)
-        # 业务名称管理对话框执行后，重新加载并更新业务名称下拉框
+        # 对话框首次使用时才导入，不占用启动时间
+        from .business_dialog import BusinessDialog
+        # 对话框与主窗口共用业务名称登记表，修改即时同步到下拉框，保存交给后台线程
+        with perf_stats.measure("business_dialog.load"):
+            dialog = BusinessDialog(self, self.business_registry, self.undo_stack)
         dialog.exec() # 运行对话框，等待关闭
-        # 对话框关闭后，无论如何都重新加载并更新业务名称下拉框
-        self.load_business_names()
-        self.update_business_combo()
 
-    # 添加从文件重新加载业务名称的方法 (仅用于对话框修改后刷新)
-    def load_business_names(self):
+    def show_report_dialog(self):
+        from .report_dialog import ReportDialog
+        workday_hours = load_settings(self.data_dir).get("workday_hours", DEFAULT_WORKDAY_HOURS)
+        dialog = ReportDialog(self, self.report_columns, workday_hours)
+        dialog.exec()
+
+    def report_columns(self):
+        """全部历史记录（包括尚未加载的月份）的列式数据，从存储中逐月读取，不载入表格"""
+        self.persistence.flush()
+        return RecordColumns(self.storage.iter_range(), self.get_public_matcher())
+
+    def show_diagnostics_dialog(self):
+        from .diagnostics_dialog import DiagnosticsDialog
+        # 非模态，打开期间可以继续操作并观察耗时变化
+        if self.diagnostics_dialog is None:
+            self.diagnostics_dialog = DiagnosticsDialog(self, self.diagnostics_info)
+        self.diagnostics_dialog.show()
+        self.diagnostics_dialog.raise_()
+        self.diagnostics_dialog.activateWindow()
+
+    def diagnostics_info(self):
+        """诊断面板与性能快照中的附加信息"""
+        archived_count, _ = self.archived_totals
+        return {
+            "record_count": len(self.records),
+            "total_record_count": len(self.records) + archived_count,
+            "loaded_months": sorted(self.loaded_months) if self.loaded_months is not None else None,
+            "storage": type(self.storage).__name__,
+            "pending_writes": self.persistence.pending,
+        }
+
+    def watch_data_files(self):
+        """把数据文件交给文件监视器，变化时推送失效而不是每次读取前 stat"""
+        watched_paths = set(self.file_watcher.files()) | set(self.file_watcher.directories())
+        for name in ("public.ini", "business.json", "business_pins.json"):
+            path = os.path.join(self.data_dir, name)
+            if path in watched_paths:
+                continue
+            watched = os.path.exists(path) and self.file_watcher.addPath(path)
+            data_file_cache.set_watched(path, watched)
+        # 数据目录与记录存储的文件，用于发现其他实例的写入
+        for path in [self.data_dir] + self.storage.watch_paths():
+            if path not in watched_paths and os.path.exists(path):
+                self.file_watcher.addPath(path)
+
+    def on_data_file_changed(self, path):
+        data_file_cache.invalidate(path)
+        # 文件被替换或删除后监视会失效，重新加入（失败时退回 stat 校验）
+        self.watch_data_files()
+        self.schedule_external_reload()
+
+    def on_data_dir_changed(self, path):
+        # 目录中有文件被创建、替换（原子写入）或删除
+        self.watch_data_files()
+        self.schedule_external_reload()
+
+    def schedule_external_reload(self):
+        # 连续的文件变化合并为一次检查；本实例自己的写入同样会触发，检查时不会产生变化
+        if not self.external_reload_timer.isActive():
+            self.external_reload_timer.start(EXTERNAL_RELOAD_DELAY_MS)
+
+    def reload_external_changes(self):
+        """合并其他实例（或同步工具）对数据文件的修改"""
+        # 先写出本实例尚未落盘的变更：写入时已与磁盘内容合并，之后磁盘即为双方修改的结果
+        self.persistence.flush()
+        self.reload_business_names()
+        self.reload_changed_records()
+
+    def reload_business_names(self):
+        names = data_file_cache.get(self.business_file, read_json, [])
+        pinned = data_file_cache.get(self.business_pins_file, read_json, [])
+        if names != self.business_registry.names() or set(pinned) != set(self.business_registry.pinned_names()):
+            self.business_registry.replace_all(names, pinned)
+            self.statusBar().showMessage("业务名称已被其他实例修改，已重新加载", 5000)
+
+    def reload_changed_records(self):
+        """只重新读取被修改过的月份，并按记录 id 把差异应用到表格"""
+        if self.loaded_months is not None:
+            scope = self.loaded_months
+        else:
+            scope = {month_of(r) for r in self.records}
         try:
-            if os.path.exists(os.path.join(self.data_dir, "business.json")):
-                with open(os.path.join(self.data_dir, "business.json"), "r", encoding="utf-8") as f:
-                    self.business_names = json.load(f)
+            months = self.storage.changed_months(scope)
+            disk_records = self.storage.load_months(months) if months else []
+            self.update_archived_totals()
         except Exception as e:
-             QMessageBox.warning(self, "警告", f"重新加载业务名称失败: {str(e)}")
+            print(f"读取其他实例的修改失败: {str(e)}")
+            return
+        if months:
+            self.fill_missing_submit_dates(disk_records)
+            added, updated, removed = self.apply_record_delta(set(months), disk_records)
+            if added or updated or removed:
+                self.rebuild_business_usage()
+                self.update_filter_business_combo()
+                self.statusBar().showMessage(
+                    f"已合并其他实例的修改: 新增 {added} 条, 修改 {updated} 条, 删除 {removed} 条", 5000)
+        self.update_stats()
+
+    def apply_record_delta(self, months, disk_records):
+        """以磁盘上 months 内的记录为准，增量更新内存中同月份的记录，返回 (新增, 修改, 删除) 条数"""
+        disk = {record["id"]: record for record in disk_records}
+        removed_ids = [r["id"] for r in self.records if month_of(r) in months and r["id"] not in disk]
+        for record_id in removed_ids:
+            self.record_model.remove_record(record_id)
+        added = updated = 0
+        for record_id, record in disk.items():
+            current = self.records.get(record_id)
+            if current is None:
+                self.record_model.append_record(record)
+                added += 1
+                continue
+            changed = {field: value for field, value in record.items() if current.get(field) != value}
+            for field, value in changed.items():
+                self.record_model.update_field(record_id, field, value)
+            updated += bool(changed)
+        return added, updated, len(removed_ids)
 
     # 添加处理表格单元格编辑完成后的方法
-    def on_table_item_changed(self, item):
-        if item is None:
-            return
-        # 若当前处于程序化更新阶段（屏蔽信号中），直接忽略
-        if self.table.signalsBlocked():
-            return
-        row = item.row()
-        col = item.column()
-        new_value = item.text().strip()
-        # 只允许编辑业务、提单时间、任务、耗时
-        field = None
-        if col == 0:
-            field = "business"
-        elif col == 1:
-            field = "submit_date"
-        elif col == 2:
-            field = "task"
-        elif col == 3:
-            field = "manual_time"
-        else:
+    def on_table_item_changed(self, record_id, field, new_value):
+        # 模型不直接写入数据，校验失败时表格自动保持原值
+        try:
+            if field == "manual_time":
+                new_value = parse_manual_time(new_value)
+            elif field == "task":
+                # 验证任务描述长度
+                check_task(new_value)
+            elif field == "submit_date":
+                # 提单日期决定记录所在的月份分区，统一为 yyyy-MM-dd（兼容 yyyyMMdd）
+                new_value = normalize_submit_date(new_value)
+        except RecordValidationError as e:
+            QMessageBox.warning(self, "警告", str(e))
             return
-        if field == "manual_time":
-            try:
-                new_value = float(new_value)
-            except ValueError:
-                QMessageBox.warning(self, "警告", "耗时必须是数字")
-                self.update_table()
+        # 按记录 id 直接定位，无需在列表中查找
+        record = self.records.get(record_id)
+        if record is not None:
+            old_value = record.get(field)
+            if old_value == new_value:
                 return
-        elif field == "task":
-            # 验证任务描述长度
-            if len(new_value) < 10:
-                # 将单元格还原为原值，但不触发二次校验
-                records_to_show = getattr(self, 'filtered_records', None) or self.records
-                original_index = len(records_to_show) - 1 - row
-                original_value = records_to_show[original_index].get("task", "") if 0 <= original_index < len(records_to_show) else ""
-                self.table.blockSignals(True)
-                self.table.setItem(row, 2, QTableWidgetItem(original_value))
-                self.table.blockSignals(False)
-                QMessageBox.warning(self, "警告", "任务描述至少需要10个字符")
-                return
-        # 找到原始 records 列表中对应的记录 (考虑倒序显示)
-        records_to_show = getattr(self, 'filtered_records', None) or self.records
-        original_index = len(records_to_show) - 1 - row
-        if 0 <= original_index < len(records_to_show):
-            # 找到原始数据在 self.records 中的索引
-            record = records_to_show[original_index]
-            # 需要同步修改 self.records
-            idx_in_all = self.records.index(record)
-            self.records[idx_in_all][field] = new_value
-            if field == "business" and new_value not in self.business_names:
-                self.business_names.append(new_value)
-                self.save_business_names()
-                self.update_business_combo()
-            self.save_data()
-            self.update_stats()
+            # 修改提单日期可能加载其他月份并重排记录，保存原位置供撤销时放回
+            position = self.record_position(record_id) if field == "submit_date" else None
+            self.apply_record_field(record_id, field, new_value)
+            self.undo_stack.push(RecordFieldEdit(self, record_id, field, old_value, new_value, position))
         else:
-            QMessageBox.warning(self, "错误", "更新记录失败，索引超出范围。")
+            QMessageBox.warning(self, "错误", "更新记录失败，未找到对应数据。")
             self.update_table()
 
     # 添加业务排序方法
     def sort_records_by_business(self):
         is_ascending = not self.sort_business_button.isChecked()
-        # 使用 lambda 函数作为 key，按业务名称排序
-        self.records.sort(key=lambda x: x['business'], reverse=not is_ascending)
+        # 通过排序代理按拼音排序，不修改也不保存记录本身的顺序
+        self.sort_proxy.sort_by("business", descending=not is_ascending)
 
         # 更新按钮文本以显示当前排序状态
         if is_ascending:
@@ -964,6 +1301,39 @@ SRE研发服务
         else:
             self.sort_business_button.setText("业务排序 (降序)")
             self.sort_business_button.setChecked(True)
+        self.update_sort_indicator()
 
-        # 更新表格显示
-        self.update_table()
\ No newline at end of file
+    def on_header_clicked(self, section):
+        field = COLUMNS[section][0]
+        if field is None:
+            self.update_sort_indicator()
+            return
+        # 再次点击主排序列时切换升降序
+        sort_keys = self.sort_proxy.sort_keys()
+        descending = bool(sort_keys) and sort_keys[0] == (field, False)
+        self.sort_proxy.sort_by(field, descending)
+        self.update_sort_indicator()
+
+    def reset_record_order(self):
+        self.sort_proxy.clear_sort()
+        self.sort_business_button.setText("业务排序 (升序)")
+        self.sort_business_button.setChecked(False)
+        self.update_sort_indicator()
+
+    def update_sort_indicator(self):
+        header = self.table.horizontalHeader()
+        sort_keys = self.sort_proxy.sort_keys()
+        columns = [field for field, _ in COLUMNS]
+        if sort_keys and sort_keys[0][0] in columns:
+            field, descending = sort_keys[0]
+            header.setSortIndicatorShown(True)
+            header.setSortIndicator(columns.index(field), Qt.DescendingOrder if descending else Qt.AscendingOrder)
+        else:
+            header.setSortIndicatorShown(False)
+
+    def closeEvent(self, event):
+        # 退出前同步写入尚未落盘的变更
+        if not self.persistence.close():
+            QMessageBox.warning(self, "警告", "部分数据未能保存，请检查数据目录是否可写")
+        self.storage.close()
+        super().closeEvent(event)
@@ -0,0 +1,196 @@
+import queue
+import threading
+import time
+from PySide6.QtCore import QObject, QTimer, Signal
+from core.business_registry import write_business_names
+from core.perf_stats import perf_stats
+from core.record import record_dict
+
+# 合并窗口：窗口内的多次变更只触发一次写入
+DEFAULT_DEBOUNCE_MS = 500
+# 写入失败后的重试间隔
+RETRY_INTERVAL_MS = 3000
+
+
+def _merged_business(older, newer):
+    """合并两次都未写入的业务名称：内容取新的，同步点取旧的（文件仍是旧同步点时的状态）"""
+    if older is None or newer is None:
+        return newer if newer is not None else older
+    return newer[:3] + older[3:]
+
+
+class _WriteBatch:
+    """一次写入的内容：记录整体快照、增量操作及业务名称，均为调用时的副本"""
+
+    def __init__(self, snapshot=None, ops=None, business=None, count=0):
+        self.snapshot = snapshot
+        self.ops = ops or []
+        # (数据目录, 名称, 置顶名称, 上次同步时的名称与置顶名称)，只保留最后一次
+        self.business = business
+        # 合并进本批次的变更通知数
+        self.count = count
+
+    def is_empty(self):
+        return self.snapshot is None and not self.ops and self.business is None
+
+    def merged(self, newer):
+        """与更新的批次合并：新快照覆盖旧快照及其之前的操作"""
+        if newer.snapshot is not None:
+            snapshot, ops = newer.snapshot, newer.ops
+        else:
+            snapshot, ops = self.snapshot, self.ops + newer.ops
+        return _WriteBatch(snapshot, ops, _merged_business(self.business, newer.business),
+                           self.count + newer.count)
+
+
+class PersistenceWorker(QObject):
+    """后台保存记录、业务名称等数据文件
+
+    界面线程只登记变更，合并窗口结束后打包成一个批次交给专用写入线程，
+    每个窗口最多写入一次；写入失败的批次会与后续变更合并后重试。
+    """
+
+    # 尚未落盘的变更数
+    pendingChanged = Signal(int)
+    # 一次写入完成，参数为耗时（毫秒）
+    writeFinished = Signal(float)
+    writeFailed = Signal(str)
+    # 写入线程 -> 界面线程
+    _batchWritten = Signal(int, float)
+    _batchFailed = Signal(str)
+
+    def __init__(self, storage, debounce_ms=DEFAULT_DEBOUNCE_MS, parent=None):
+        super().__init__(parent)
+        self.storage = storage
+        self.pending = 0
+        self.last_latency_ms = None
+        self._batch = _WriteBatch()
+        self.debounce_ms = debounce_ms
+        self._retry = False
+        # 写入失败、等待与下一批次合并重试的批次，仅由写入线程访问
+        self._failed_batch = None
+        self._queue = queue.Queue()
+        self._batchWritten.connect(self._on_batch_written)
+        self._batchFailed.connect(self._on_batch_failed)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._dispatch)
+
+        self._thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+        self._thread.start()
+
+    # ---- 界面线程：登记变更 ----
+    def record_op(self, op, record, fields=None):
+        """登记单条记录的增删改"""
+        if op == "add":
+            entry = {"op": "add", "record": record_dict(record)}
+        elif op == "update":
+            entry = {"op": "update", "id": record["id"], "fields": dict(fields)}
+        else:
+            entry = {"op": "delete", "id": record["id"]}
+        self._batch.ops.append(entry)
+        self._mark_dirty()
+
+    def record_ops(self, op, records, indexes=None):
+        """登记一批记录的同一种操作（如批量粘贴），只触发一次状态更新
+
+        indexes 为放回原位置的记录（撤销删除）在添加顺序中的位置，与 records 一一对应、按升序排列，
+        追加日志回放时按位置插入。
+        """
+        for i, record in enumerate(records):
+            if op == "add":
+                entry = {"op": "add", "record": record_dict(record)}
+                if indexes is not None:
+                    entry["index"] = indexes[i]
+                self._batch.ops.append(entry)
+            else:
+                self._batch.ops.append({"op": "delete", "id": record["id"]})
+        if records:
+            self._mark_dirty(len(records))
+
+    def save_records(self, records):
+        """登记整体快照，之前未写入的增量操作随之作废"""
+        self._batch.snapshot = [record_dict(r) for r in records]
+        self._batch.ops = []
+        self._mark_dirty()
+
+    def save_business_names(self, data_dir, names, pinned, base):
+        """登记业务名称与置顶标记，写入时与文件中其他实例新增的名称合并，参数需为调用方不再修改的副本"""
+        self._batch.business = _merged_business(self._batch.business, (data_dir, names, pinned, base))
+        self._mark_dirty()
+
+    def _mark_dirty(self, count=1):
+        self._batch.count += count
+        self.pending += count
+        self.pendingChanged.emit(self.pending)
+        # 计时器已在运行时不重新计时，保证连续变更时每个窗口仍写入一次
+        if not self._timer.isActive():
+            self._timer.start(self.debounce_ms)
+
+    def _dispatch(self):
+        if self._batch.is_empty() and not self._retry:
+            return
+        self._queue.put(self._batch)
+        self._batch = _WriteBatch()
+        self._retry = False
+
+    def flush(self):
+        """立即写入全部待写内容并等待完成，返回是否全部写入成功"""
+        self._timer.stop()
+        self._dispatch()
+        self._queue.join()
+        return self._failed_batch is None
+
+    def close(self):
+        """退出前同步写入，然后结束写入线程"""
+        ok = self.flush()
+        self._queue.put(None)
+        self._thread.join()
+        return ok
+
+    # ---- 写入线程 ----
+    def _run(self):
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                if self._failed_batch is not None:
+                    batch = self._failed_batch.merged(batch)
+                    self._failed_batch = None
+                started = time.perf_counter()
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    self._failed_batch = batch
+                    self._batchFailed.emit(str(e))
+                else:
+                    self._batchWritten.emit(batch.count, (time.perf_counter() - started) * 1000)
+            finally:
+                self._queue.task_done()
+
+    @perf_stats.timed("persistence.write")
+    def _write(self, batch):
+        if batch.snapshot is not None:
+            self.storage.save_all(batch.snapshot)
+        if batch.ops:
+            self.storage.apply_ops(batch.ops)
+            self.storage.maybe_compact()
+        if batch.business is not None:
+            # 在数据目录锁内重新读取并合并，不会覆盖其他实例或命令行同时新增的名称
+            write_business_names(*batch.business)
+
+    # ---- 界面线程：写入结果 ----
+    def _on_batch_written(self, count, latency_ms):
+        self.pending = max(0, self.pending - count)
+        self.last_latency_ms = latency_ms
+        self.pendingChanged.emit(self.pending)
+        self.writeFinished.emit(latency_ms)
+
+    def _on_batch_failed(self, message):
+        print(f"保存失败，稍后重试: {message}")
+        self.writeFailed.emit(message)
+        self._retry = True
+        if not self._timer.isActive():
+            self._timer.start(RETRY_INTERVAL_MS)
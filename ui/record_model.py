@@ -0,0 +1,528 @@
+from PySide6.QtCore import (
+    Qt, QAbstractTableModel, QAbstractProxyModel, QModelIndex, QRect, QEvent, Signal
+)
+from PySide6.QtGui import QColor, QPainter
+from PySide6.QtWidgets import QStyledItemDelegate, QStyle
+from core.pinyin import collation_key
+from .theme import theme_manager
+
+# 表格列定义：(记录字段, 表头)，字段为 None 的列为操作列
+COLUMNS = [
+    ("business", "业务"),
+    ("submit_date", "提单时间"),
+    ("task", "任务"),
+    ("manual_time", "耗时"),
+    (None, "操作"),
+]
+ACTION_COLUMN = 4
+
+# 可排序字段及其比较键：名称类按拼音排序，键按字符串缓存
+SORT_KEY_FUNCS = {
+    "business": lambda r: collation_key(r.get("business", "")),
+    "task": lambda r: collation_key(r.get("task", "")),
+    "submit_date": lambda r: r.get("submit_date", ""),
+    "manual_time": lambda r: float(r.get("manual_time", 0) or 0),
+    "timestamp": lambda r: r.get("timestamp", ""),
+}
+
+
+class RecordTableModel(QAbstractTableModel):
+    """记录表格模型，按倒序（最新在上）展示 RecordStore 中的记录
+
+    设置筛选条件后只展示满足条件的记录，可见记录 id 按添加顺序保存在 _visible 中。
+    """
+
+    # 单元格编辑请求：(记录 id, 字段名, 新文本)，由主窗口校验后再写回
+    editRequested = Signal(str, str, str)
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self._store = store
+        self._filter = None
+        self._visible = None
+
+    def _count(self):
+        return len(self._store) if self._visible is None else len(self._visible)
+
+    # ---- 行号与记录 id 互转（表格倒序显示） ----
+    def _visible_before(self, index):
+        """可见记录中添加顺序位于 index 之前的条数
+
+        _visible 按添加顺序排列，各记录在 RecordStore 中的位置递增，直接二分查找，
+        每步 O(log n) 取位置，不为全部可见记录计算位置。
+        """
+        index_of = self._store.index_of
+        visible = self._visible
+        lo, hi = 0, len(visible)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if index_of(visible[mid]) < index:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _position(self, record_id):
+        index = self._store.index_of(record_id)
+        if self._visible is None or index < 0:
+            return index
+        pos = self._visible_before(index)
+        if pos < len(self._visible) and self._visible[pos] == record_id:
+            return pos
+        return -1
+
+    def row_of(self, record_id):
+        index = self._position(record_id)
+        return -1 if index < 0 else self._count() - 1 - index
+
+    def record_at(self, row):
+        index = self._count() - 1 - row
+        if not 0 <= index < self._count():
+            return None
+        if self._visible is None:
+            return self._store.at(index)
+        return self._store.get(self._visible[index])
+
+    def record_id(self, row):
+        record = self.record_at(row)
+        return None if record is None else record["id"]
+
+    # ---- Qt 模型接口 ----
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._count()
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section][1]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        field = COLUMNS[index.column()][0]
+        if field is None:
+            return None
+        record = self.record_at(index.row())
+        if record is None:
+            return None
+        if field == "submit_date":
+            # 日期文字按天缓存，不再逐行格式化
+            return record.compact_date
+        return str(record.get(field, ""))
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if COLUMNS[index.column()][0] is not None:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        # 不在模型内直接修改数据，交给主窗口校验后调用 update_field
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        field = COLUMNS[index.column()][0]
+        if field is None:
+            return False
+        record_id = self.record_id(index.row())
+        if record_id is not None:
+            self.editRequested.emit(record_id, field, str(value).strip())
+        return False
+
+    # ---- 筛选 ----
+    def set_filter(self, record_filter):
+        """设置筛选条件，None 或空条件表示展示全部记录"""
+        if record_filter is not None and record_filter.is_empty():
+            record_filter = None
+        self._filter = record_filter
+        self.reset()
+
+    def record_filter(self):
+        return self._filter
+
+    def filtered_records(self):
+        """筛选生效时按添加顺序返回可见记录，否则返回 None"""
+        if self._visible is None:
+            return None
+        return [self._store.get(record_id) for record_id in self._visible]
+
+    def row_records(self):
+        """按表格行顺序返回全部可见记录"""
+        if self._visible is None:
+            return list(reversed(self._store))
+        return [self._store.get(record_id) for record_id in reversed(self._visible)]
+
+    # ---- 增量修改接口，只通知受影响的行 ----
+    def reset(self):
+        """整体刷新（加载、排序、清空、修改筛选后使用）"""
+        self.beginResetModel()
+        if self._filter is None:
+            self._visible = None
+        else:
+            self._visible = [r["id"] for r in self._store.query(self._filter)]
+        self.endResetModel()
+
+    def append_record(self, record):
+        if self._filter is not None and not self._filter.matches(record):
+            self._store.append(record)
+            return
+        # 新记录追加在末尾，对应表格第 0 行
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._store.append(record)
+        if self._visible is not None:
+            self._visible.append(record["id"])
+        self.endInsertRows()
+
+    def append_records(self, records):
+        """批量追加（粘贴多条记录），表格只发出一次插入通知"""
+        if self._filter is None:
+            shown = len(records)
+        else:
+            shown = sum(1 for record in records if self._filter.matches(record))
+        if not shown:
+            for record in records:
+                self._store.append(record)
+            return
+        # 新记录依次追加在末尾，对应表格第 0 ~ shown-1 行
+        self.beginInsertRows(QModelIndex(), 0, shown - 1)
+        for record in records:
+            self._store.append(record)
+            if self._visible is not None and self._filter.matches(record):
+                self._visible.append(record["id"])
+        self.endInsertRows()
+
+    def insert_record(self, index, record):
+        """插入到添加顺序的第 index 个位置（撤销删除时恢复原位置）"""
+        if self._filter is not None and not self._filter.matches(record):
+            self._store.insert(index, record)
+            return
+        index = min(max(0, index), len(self._store))
+        if self._visible is None:
+            row = len(self._store) - index
+        else:
+            pos = self._visible_before(index)
+            row = len(self._visible) - pos
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._store.insert(index, record)
+        if self._visible is not None:
+            self._visible.insert(pos, record["id"])
+        self.endInsertRows()
+
+    def remove_record(self, record_id):
+        """删除记录并返回被删除的记录"""
+        row = self.row_of(record_id)
+        if row < 0:
+            return self._store.remove(record_id)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        record = self._store.remove(record_id)
+        if self._visible is not None:
+            del self._visible[self._count() - 1 - row]
+        self.endRemoveRows()
+        return record
+
+    def update_field(self, record_id, field, value):
+        row = self.row_of(record_id)
+        record = self._store.update(record_id, {field: value})
+        visible = self._filter is None or self._filter.matches(record)
+        if row >= 0 and visible:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1))
+        elif row >= 0:
+            # 修改后不再满足筛选条件，移出表格
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._visible[self._count() - 1 - row]
+            self.endRemoveRows()
+        elif visible:
+            # 修改后开始满足筛选条件，按添加顺序插入
+            pos = self._visible_before(self._store.index_of(record_id))
+            row = len(self._visible) - pos
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._visible.insert(pos, record_id)
+            self.endInsertRows()
+        return record
+
+
+# 一次插入超过该行数时排序代理整体重排，不再逐行插入
+MAX_INCREMENTAL_ROWS = 64
+
+
+class RecordSortProxy(QAbstractProxyModel):
+    """多列排序代理
+
+    只在视图层重排行，不修改 RecordStore 中的记录顺序。排序时先为每行计算一次比较键，
+    再按次要到主要字段依次稳定排序；相同键的行保持原表格顺序。增删改时用二分查找
+    调整单行位置，不整体重排。
+    """
+
+    MAX_SORT_KEYS = 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # [(字段, 是否降序)]，第一个为主排序字段
+        self._sort_keys = []
+        # 代理行 -> 源行；未排序时为 None，表示一一对应
+        self._p2s = None
+        self._s2p = None
+
+    # ---- 排序设置 ----
+    def sort_keys(self):
+        return list(self._sort_keys)
+
+    def set_sort_keys(self, sort_keys):
+        # 整体重排，视图重新读取全部可见行
+        self.beginResetModel()
+        self._sort_keys = list(sort_keys)[:self.MAX_SORT_KEYS]
+        self._rebuild()
+        self.endResetModel()
+
+    def sort_by(self, field, descending=False):
+        """把 field 设为主排序字段，之前的排序字段依次作为次要字段"""
+        keys = [(f, d) for f, d in self._sort_keys if f != field]
+        self.set_sort_keys([(field, descending)] + keys)
+
+    def clear_sort(self):
+        self.set_sort_keys([])
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        field = COLUMNS[column][0]
+        if field is not None:
+            self.sort_by(field, order == Qt.DescendingOrder)
+
+    # ---- 映射 ----
+    def _row_key(self, record):
+        return tuple(SORT_KEY_FUNCS[field](record) for field, _ in self._sort_keys)
+
+    def _less(self, key_a, row_a, key_b, row_b):
+        for (_, descending), a, b in zip(self._sort_keys, key_a, key_b):
+            if a != b:
+                return a > b if descending else a < b
+        return row_a < row_b
+
+    def _rebuild(self):
+        source = self.sourceModel()
+        if not self._sort_keys or source is None:
+            self._p2s = None
+            self._s2p = None
+            return
+        records = source.row_records()
+        order = list(range(len(records)))
+        # 从次要字段到主要字段依次做稳定排序，每个字段的键只计算一次
+        for field, descending in reversed(self._sort_keys):
+            key_func = SORT_KEY_FUNCS[field]
+            keys = [key_func(record) for record in records]
+            order.sort(key=keys.__getitem__, reverse=descending)
+        self._p2s = order
+        self._s2p = None
+
+    def _source_to_proxy(self):
+        if self._s2p is None:
+            s2p = [0] * len(self._p2s)
+            for proxy_row, source_row in enumerate(self._p2s):
+                s2p[source_row] = proxy_row
+            self._s2p = s2p
+        return self._s2p
+
+    def _insert_position(self, source_row):
+        """二分查找源行在当前排序中的位置"""
+        source = self.sourceModel()
+        key = self._row_key(source.record_at(source_row))
+        lo, hi = 0, len(self._p2s)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            other = self._p2s[mid]
+            if self._less(self._row_key(source.record_at(other)), other, key, source_row):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def source_row(self, proxy_row):
+        return proxy_row if self._p2s is None else self._p2s[proxy_row]
+
+    def mapToSource(self, proxy_index):
+        source = self.sourceModel()
+        if source is None or not proxy_index.isValid():
+            return QModelIndex()
+        return source.index(self.source_row(proxy_index.row()), proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        row = source_index.row()
+        if self._p2s is not None:
+            row = self._source_to_proxy()[row]
+        return self.index(row, source_index.column())
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not 0 <= row < self.rowCount() or not 0 <= column < self.columnCount():
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        source = self.sourceModel()
+        if parent.isValid() or source is None:
+            return 0
+        return source.rowCount() if self._p2s is None else len(self._p2s)
+
+    def columnCount(self, parent=QModelIndex()):
+        source = self.sourceModel()
+        if parent.isValid() or source is None:
+            return 0
+        return source.columnCount()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        return self.sourceModel().headerData(section, orientation, role)
+
+    # ---- 跟随源模型的增量变化 ----
+    def setSourceModel(self, source):
+        super().setSourceModel(source)
+        source.modelAboutToBeReset.connect(self.beginResetModel)
+        source.modelReset.connect(self._on_source_reset)
+        source.rowsAboutToBeInserted.connect(self._on_rows_about_to_be_inserted)
+        source.rowsInserted.connect(self._on_rows_inserted)
+        source.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        source.rowsRemoved.connect(self._on_rows_removed)
+        source.dataChanged.connect(self._on_data_changed)
+        self._rebuild()
+
+    def _on_source_reset(self):
+        self._rebuild()
+        self.endResetModel()
+
+    def _on_rows_about_to_be_inserted(self, parent, first, last):
+        if self._p2s is None:
+            self.beginInsertRows(QModelIndex(), first, last)
+
+    def _on_rows_inserted(self, parent, first, last):
+        if self._p2s is None:
+            self.endInsertRows()
+            return
+        count = last - first + 1
+        if count > MAX_INCREMENTAL_ROWS:
+            # 一次插入很多行（批量粘贴）时整体重排比逐行二分插入更快
+            self.beginResetModel()
+            self._rebuild()
+            self.endResetModel()
+            return
+        self._p2s = [row + count if row >= first else row for row in self._p2s]
+        self._s2p = None
+        for source_row in range(first, last + 1):
+            pos = self._insert_position(source_row)
+            self.beginInsertRows(QModelIndex(), pos, pos)
+            self._p2s.insert(pos, source_row)
+            self._s2p = None
+            self.endInsertRows()
+
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        if self._p2s is None:
+            self.beginRemoveRows(QModelIndex(), first, last)
+            return
+        s2p = self._source_to_proxy()
+        for pos in sorted((s2p[row] for row in range(first, last + 1)), reverse=True):
+            self.beginRemoveRows(QModelIndex(), pos, pos)
+            del self._p2s[pos]
+            self._s2p = None
+            self.endRemoveRows()
+
+    def _on_rows_removed(self, parent, first, last):
+        if self._p2s is None:
+            self.endRemoveRows()
+            return
+        count = last - first + 1
+        self._p2s = [row - count if row > last else row for row in self._p2s]
+        self._s2p = None
+
+    def _on_data_changed(self, top_left, bottom_right):
+        last_column = self.columnCount() - 1
+        for source_row in range(top_left.row(), bottom_right.row() + 1):
+            if self._p2s is not None:
+                pos = self._source_to_proxy()[source_row]
+                del self._p2s[pos]
+                new_pos = self._insert_position(source_row)
+                self._p2s.insert(pos, source_row)
+                if new_pos != pos:
+                    # 排序字段被修改，只移动这一行；目标位置按移动前的行号计算
+                    destination = new_pos + 1 if new_pos > pos else new_pos
+                    self.beginMoveRows(QModelIndex(), pos, pos, QModelIndex(), destination)
+                    del self._p2s[pos]
+                    self._p2s.insert(new_pos, source_row)
+                    self._s2p = None
+                    self.endMoveRows()
+            proxy_row = self.mapFromSource(self.sourceModel().index(source_row, 0)).row()
+            self.dataChanged.emit(self.index(proxy_row, 0), self.index(proxy_row, last_column))
+
+
+class DeleteButtonDelegate(QStyledItemDelegate):
+    """在操作列中绘制删除按钮，替代每行一个 QPushButton"""
+
+    deleteRequested = Signal(int)
+
+    BUTTON_WIDTH = 60
+    BUTTON_HEIGHT = 24
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pressed_row = -1
+
+    def button_rect(self, cell_rect):
+        width = min(self.BUTTON_WIDTH, cell_rect.width())
+        height = min(self.BUTTON_HEIGHT, cell_rect.height())
+        return QRect(
+            cell_rect.x() + (cell_rect.width() - width) // 2,
+            cell_rect.y() + (cell_rect.height() - height) // 2,
+            width, height
+        )
+
+    def paint(self, painter, option, index):
+        rect = self.button_rect(option.rect)
+        # 颜色取自当前主题，绘制时不需要样式表
+        if self._pressed_row == index.row():
+            color = theme_manager.color("danger_pressed")
+        elif option.state & QStyle.State_MouseOver:
+            color = theme_manager.color("danger_hover")
+        else:
+            color = theme_manager.color("danger")
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(color)
+        painter.drawRoundedRect(rect, 3, 3)
+        font = painter.font()
+        font.setPixelSize(10)
+        painter.setFont(font)
+        painter.setPen(QColor("white"))
+        painter.drawText(rect, Qt.AlignCenter, "删除")
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        size.setWidth(max(size.width(), self.BUTTON_WIDTH + 10))
+        size.setHeight(max(size.height(), self.BUTTON_HEIGHT + 8))
+        return size
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() not in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease):
+            return False
+        if event.button() != Qt.LeftButton:
+            return False
+        inside = self.button_rect(option.rect).contains(event.position().toPoint())
+        if event.type() == QEvent.MouseButtonPress:
+            self._pressed_row = index.row() if inside else -1
+            return inside
+        # 鼠标释放时在同一按钮内才视为点击
+        clicked = inside and self._pressed_row == index.row()
+        self._pressed_row = -1
+        if clicked:
+            self.deleteRequested.emit(index.row())
+        return clicked
@@ -0,0 +1,153 @@
+from datetime import date
+from PySide6.QtWidgets import (
+    QApplication, QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox, QDateEdit,
+    QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox
+)
+from PySide6.QtCore import Qt, QDate
+from core.perf_stats import perf_stats
+from core.reports import (
+    PERIOD_TITLES, PERIOD_MONTH, DEFAULT_WORKDAY_HOURS, build_report, report_tables, format_cell,
+    coverage_text, month_bounds
+)
+
+
+class ReportDialog(QDialog):
+    """统计报表：业务 × 周 / 月耗时、公共 / 普通拆分、每日工时与任务排行
+
+    columns_provider() 返回全部历史记录的 RecordColumns，打开时读取一次，
+    之后切换周期或日期区间只重新汇总，不再读取记录。
+    """
+
+    def __init__(self, parent=None, columns_provider=None, workday_hours=DEFAULT_WORKDAY_HOURS):
+        super().__init__(parent)
+        self.setWindowTitle("统计报表")
+        self.setMinimumSize(820, 520)
+        self.columns_provider = columns_provider
+        self.workday_hours = workday_hours
+        self.columns = None
+        self.tables = []
+
+        layout = QVBoxLayout(self)
+        range_layout = QHBoxLayout()
+        self.period_combo = QComboBox()
+        for period, title in PERIOD_TITLES.items():
+            self.period_combo.addItem(title, period)
+        self.start_date_edit = QDateEdit()
+        self.end_date_edit = QDateEdit()
+        for edit in (self.start_date_edit, self.end_date_edit):
+            edit.setCalendarPopup(True)
+            edit.setDisplayFormat("yyyy-MM-dd")
+        range_layout.addWidget(QLabel("周期:"))
+        range_layout.addWidget(self.period_combo)
+        range_layout.addWidget(QLabel("提单日期:"))
+        range_layout.addWidget(self.start_date_edit)
+        range_layout.addWidget(QLabel("至"))
+        range_layout.addWidget(self.end_date_edit)
+        for title, months_back, months in (("本月", 0, 1), ("上月", 1, 1), ("近一年", 0, 12)):
+            button = QPushButton(title)
+            button.clicked.connect(lambda _=False, b=months_back, n=months: self.set_recent_months(b, n))
+            range_layout.addWidget(button)
+        range_layout.addStretch()
+        layout.addLayout(range_layout)
+
+        self.summary_label = QLabel()
+        self.summary_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout.addWidget(self.summary_label)
+
+        self.tab_widget = QTabWidget()
+        layout.addWidget(self.tab_widget)
+
+        button_layout = QHBoxLayout()
+        copy_button = QPushButton("复制当前表格")
+        copy_button.clicked.connect(self.copy_current_table)
+        button_layout.addWidget(copy_button)
+        reload_button = QPushButton("重新读取记录")
+        reload_button.clicked.connect(self.reload)
+        button_layout.addWidget(reload_button)
+        button_layout.addStretch()
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.close)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        # 默认按周汇总本月
+        self.set_recent_months(0, 1, refresh=False)
+        self.period_combo.currentIndexChanged.connect(self.refresh)
+        self.start_date_edit.dateChanged.connect(self.refresh)
+        self.end_date_edit.dateChanged.connect(self.refresh)
+        self.reload()
+
+    def set_recent_months(self, months_back, months, refresh=True):
+        """最近 months 个月（截至往前 months_back 个月所在月的月末）"""
+        today = date.today()
+        _, end = month_bounds(today, months_back)
+        start, _ = month_bounds(today, months_back + months - 1)
+        for edit, value in ((self.start_date_edit, start), (self.end_date_edit, end)):
+            edit.blockSignals(True)
+            edit.setDate(QDate(value.year, value.month, value.day))
+            edit.blockSignals(False)
+        if months > 1:
+            self.period_combo.blockSignals(True)
+            self.period_combo.setCurrentIndex(self.period_combo.findData(PERIOD_MONTH))
+            self.period_combo.blockSignals(False)
+        if refresh:
+            self.refresh()
+
+    def reload(self):
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            with perf_stats.measure("report.load"):
+                self.columns = self.columns_provider()
+        except Exception as e:
+            QMessageBox.warning(self, "警告", f"读取记录失败: {str(e)}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+        self.refresh()
+
+    def refresh(self):
+        if self.columns is None:
+            return
+        start = self.start_date_edit.date().toString("yyyy-MM-dd")
+        end = self.end_date_edit.date().toString("yyyy-MM-dd")
+        if start > end:
+            start, end = end, start
+        with perf_stats.measure("report.build"):
+            report = build_report(self.columns, self.period_combo.currentData(), start, end,
+                                  workday_hours=self.workday_hours)
+        public_total = sum(report.public_hours)
+        self.summary_label.setText(
+            f"共 {report.record_count} 条，合计 {report.total_hours:.1f} 小时"
+            f"（公共 {public_total:.1f} / 普通 {report.total_hours - public_total:.1f}）    "
+            + coverage_text(report))
+        self.show_tables(report_tables(report))
+
+    def show_tables(self, tables):
+        current = self.tab_widget.currentIndex()
+        self.tab_widget.clear()
+        self.tables = tables
+        for title, headers, rows in tables:
+            table = QTableWidget(len(rows), len(headers))
+            table.setHorizontalHeaderLabels(headers)
+            table.setEditTriggers(QTableWidget.NoEditTriggers)
+            table.verticalHeader().setVisible(False)
+            table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+            for row, values in enumerate(rows):
+                for column, value in enumerate(values):
+                    item = QTableWidgetItem(format_cell(value))
+                    if isinstance(value, (int, float)):
+                        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                    table.setItem(row, column, item)
+            self.tab_widget.addTab(table, title)
+        self.tab_widget.setCurrentIndex(max(current, 0))
+
+    def copy_current_table(self):
+        """以制表符分隔复制当前表格，可直接粘贴到 Excel"""
+        index = self.tab_widget.currentIndex()
+        if index < 0 or index >= len(self.tables):
+            return
+        _, headers, rows = self.tables[index]
+        lines = ["\t".join(headers)]
+        lines.extend("\t".join(format_cell(value) for value in values) for values in rows)
+        QApplication.clipboard().setText("\n".join(lines))
+        QMessageBox.information(self, "提示", "表格已复制到剪贴板")
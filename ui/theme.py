@@ -0,0 +1,282 @@
+import sys
+from PySide6.QtCore import QObject, Qt, Signal
+from PySide6.QtGui import QColor, QGuiApplication
+from core.perf_stats import perf_stats
+
+# 主题：跟随系统、亮色、暗色（settings.json 中的 theme）
+AUTO = "auto"
+LIGHT = "light"
+DARK = "dark"
+
+# 各主题的颜色
+PALETTES = {
+    LIGHT: {
+        "bg": "#f5f6fa",
+        "text": "#333333",
+        "input_bg": "#ffffff",
+        "border": "#dcdee5",
+        "row_border": "#f0f1f5",
+        "header_bg": "#f5f6fa",
+        "hover": "#e1ecff",
+        "button": "#3a84ff",
+        "button_hover": "#2b6cd9",
+        "button_pressed": "#0052cc",
+        "danger": "#ea3636",
+        "danger_hover": "#c42b2b",
+        "danger_pressed": "#a12121",
+        "selected_bg": "#e1ecff",
+        "selected_text": "#3a84ff",
+    },
+    DARK: {
+        "bg": "#2c2c2c",
+        "text": "#ffffff",
+        "input_bg": "#3c3c3c",
+        "border": "#4c4c4c",
+        "row_border": "#4c4c4c",
+        "header_bg": "#363636",
+        "hover": "#4a4a4a",
+        "button": "#3a84ff",
+        "button_hover": "#2b6cd9",
+        "button_pressed": "#0052cc",
+        "danger": "#ea3636",
+        "danger_hover": "#c42b2b",
+        "danger_pressed": "#a12121",
+        "selected_bg": "#3a84ff",
+        "selected_text": "#ffffff",
+    },
+}
+
+
+def build_stylesheet(c):
+    """按颜色生成整个应用的样式表（主窗口、表格、各对话框共用）"""
+    return f"""
+        QMainWindow, QDialog {{
+            background-color: {c['bg']};
+            color: {c['text']};
+        }}
+        #sectionLabel {{
+            font-size: 14px;
+            font-weight: bold;
+            color: {c['text']};
+            margin-top: 10px;
+            margin-bottom: 5px;
+        }}
+        #inputContainer,
+        #statsContainer {{
+            background-color: {c['input_bg']};
+            border-radius: 5px;
+        }}
+        QPushButton {{
+            background-color: {c['button']};
+            color: white;
+            border: none;
+            padding: 5px 10px;
+            border-radius: 3px;
+            font-size: 11px;
+        }}
+        QPushButton:hover {{
+            background-color: {c['button_hover']};
+        }}
+        QPushButton:pressed {{
+            background-color: {c['button_pressed']};
+        }}
+        QPushButton#clear_records_button {{
+            background-color: {c['danger']};
+        }}
+        QPushButton#clear_records_button:hover {{
+            background-color: {c['danger_hover']};
+        }}
+        QPushButton#clear_records_button:pressed {{
+            background-color: {c['danger_pressed']};
+        }}
+        QDialog#businessDialog QPushButton {{
+            padding: 5px 15px;
+        }}
+        QLineEdit, QComboBox {{
+            padding: 5px 10px;
+            border: 1px solid {c['border']};
+            border-radius: 3px;
+            background-color: {c['input_bg']};
+            color: {c['text']};
+            font-size: 11px;
+        }}
+        QLineEdit:focus, QComboBox:focus {{
+            border-color: {c['button']};
+        }}
+        QComboBox::drop-down {{
+            width: 20px;
+        }}
+        QComboBox::down-arrow {{
+            width: 12px;
+            height: 12px;
+        }}
+        QComboBox QAbstractItemView {{
+            border: 1px solid {c['border']};
+            background-color: {c['input_bg']};
+            color: {c['text']};
+            selection-background-color: {c['hover']};
+            selection-color: {c['button']};
+            outline: none;
+        }}
+        QComboBox QAbstractItemView::item {{
+            min-height: 25px;
+            padding: 5px;
+            font-size: 14px;
+        }}
+        QPushButton#timeControlButton {{
+            background-color: {c['input_bg']};
+            color: {c['text']};
+            border: 1px solid {c['border']};
+            border-radius: 3px;
+            padding: 2px;
+            font-size: 12px;
+            font-weight: bold;
+        }}
+        QPushButton#timeControlButton:hover {{
+            background-color: {c['hover']};
+            border-color: {c['button']};
+        }}
+        QPushButton#timeControlButton:pressed {{
+            background-color: {c['button']};
+            color: white;
+        }}
+        QTableView {{
+            border: 1px solid {c['border']};
+            border-radius: 5px;
+            background-color: {c['input_bg']};
+            color: {c['text']};
+            gridline-color: transparent;
+        }}
+        QTableView::item {{
+            padding: 5px;
+            border-bottom: 1px solid {c['row_border']};
+            background-color: {c['input_bg']};
+        }}
+        QTableView::item:selected {{
+            background-color: {c['selected_bg']};
+            color: {c['selected_text']};
+            border: 1px solid {c['button']};
+        }}
+        QTableView QLineEdit,
+        QTableView QComboBox {{
+            border: 1px solid {c['button']};
+            padding: 0 4px;
+            background: {c['input_bg']};
+            color: {c['text']};
+            font-size: 11px;
+            border-radius: 3px;
+        }}
+        QTableView QLineEdit:focus,
+        QTableView QComboBox:focus {{
+            border-color: {c['button_hover']};
+        }}
+        QHeaderView::section {{
+            background-color: {c['header_bg']};
+            padding: 5px;
+            border: none;
+            border-bottom: 1px solid {c['border']};
+            font-weight: bold;
+            font-size: 11px;
+            color: {c['text']};
+        }}
+        QListView {{
+            border: 1px solid {c['border']};
+            border-radius: 3px;
+            background-color: {c['input_bg']};
+            color: {c['text']};
+        }}
+        QListView::item {{
+            padding: 5px;
+        }}
+        QListView::item:selected {{
+            background-color: {c['selected_bg']};
+            color: {c['selected_text']};
+        }}
+        QLabel {{
+            color: {c['text']};
+            font-size: 11px;
+        }}
+    """
+
+
+def detect_theme():
+    """检测系统当前是亮色还是暗色主题"""
+    app = QGuiApplication.instance()
+    if app is not None:
+        scheme = app.styleHints().colorScheme()
+        if scheme == Qt.ColorScheme.Dark:
+            return DARK
+        if scheme == Qt.ColorScheme.Light:
+            return LIGHT
+    if sys.platform == 'darwin':
+        # Qt 无法判断时在 Mac 上直接读取系统外观
+        try:
+            from Foundation import NSAppearance
+            appearance = NSAppearance.currentAppearance()
+            if 'dark' in str(appearance.name()).lower():
+                return DARK
+        except Exception:
+            pass
+    return LIGHT
+
+
+class ThemeManager(QObject):
+    """整个应用共用的主题
+
+    每个主题的样式表只生成一次并缓存，设置在 QApplication 上，各窗口、对话框与表格
+    不再各自 setStyleSheet；切换主题时只替换一次应用样式表，Qt 统一重新套用样式。
+    跟随系统 (AUTO) 时监听系统的亮色 / 暗色切换。
+    """
+
+    themeChanged = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.mode = AUTO
+        self.theme = None
+        self._stylesheets = {}
+        self._colors = {}
+        self._watching = False
+
+    def stylesheet(self, theme):
+        sheet = self._stylesheets.get(theme)
+        if sheet is None:
+            sheet = self._stylesheets[theme] = build_stylesheet(PALETTES[theme])
+        return sheet
+
+    def color(self, name):
+        """当前主题中的颜色，供自绘的控件（如表格中的删除按钮）使用"""
+        key = (self.theme or LIGHT, name)
+        color = self._colors.get(key)
+        if color is None:
+            color = self._colors[key] = QColor(PALETTES[key[0]][name])
+        return color
+
+    def apply(self, mode=None):
+        """按 mode（AUTO / LIGHT / DARK，默认沿用当前设置）套用主题，主题未变时不做任何事"""
+        app = QGuiApplication.instance()
+        if app is None:
+            return
+        if mode is not None:
+            self.mode = mode if mode in (LIGHT, DARK) else AUTO
+        if not self._watching:
+            app.styleHints().colorSchemeChanged.connect(self.on_color_scheme_changed)
+            self._watching = True
+        theme = detect_theme() if self.mode == AUTO else self.mode
+        if theme == self.theme:
+            return
+        with perf_stats.measure("apply_theme"):
+            app.setStyleSheet(self.stylesheet(theme))
+        self.theme = theme
+        self.themeChanged.emit(theme)
+
+    def toggle(self):
+        """在亮色与暗色之间切换（不再跟随系统）"""
+        self.apply(LIGHT if self.theme == DARK else DARK)
+
+    def on_color_scheme_changed(self, scheme):
+        if self.mode == AUTO:
+            self.apply()
+
+
+theme_manager = ThemeManager()